@@ -0,0 +1,4 @@
+"""Benchmarks of the Matrix42 SDK against a local stand-in of the ESM server.
+
+Run each module with ``python -m benchmarks.<module>`` from the repository root.
+"""
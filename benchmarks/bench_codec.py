@@ -0,0 +1,58 @@
+"""Decoding and encoding of a large list page: the former `json.loads(r.text)` versus the codec layer."""
+
+import json
+import time
+from matrix42sdk import Codec
+
+
+ROWS = 20000
+ROUNDS = 10
+
+
+def _page():
+    rows = [
+        {
+            "ID": "b5b5a3c0-%08d" % i,
+            "Name": "Software %d" % i,
+            "Version": "1.%d.0" % (i % 100),
+            "LastUpdate": "2021-06-01T12:00:%02d.123Z" % (i % 60),
+            "Price": i * 1.25,
+            "Tags": ["a", "b", "c"],
+        }
+        for i in range(ROWS)
+    ]
+    return rows, json.dumps(rows).encode()
+
+
+def _time(func, arg):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(arg)
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    rows, content = _page()
+    print("page of %d rows, %.1f MB" % (ROWS, len(content) / 1e6))
+    for codec in (Codec.StdlibCodec, Codec.OrjsonCodec):
+        if codec is Codec.OrjsonCodec and Codec.orjson is None:
+            print("orjson is not installed, pip install matrix42sdk[fast]")
+            continue
+        Codec.set_codec(codec)
+        old = _time(lambda body: json.loads(body.decode()), content)
+        new = _time(Codec.loads, content)
+        print(
+            "%-6s loads: r.text path %7.1f ms, bytes %7.1f ms, %5.2fx"
+            % (codec.name, old, new, old / new)
+        )
+        old = _time(lambda doc: json.dumps(doc).encode(), rows)
+        new = _time(Codec.dumps, rows)
+        print(
+            "%-6s dumps: json.dumps   %7.1f ms, codec %7.1f ms, %5.2fx"
+            % (codec.name, old, new, old / new)
+        )
+    Codec.set_codec(None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Throughput of `get_fragment` with the pooled session versus one connection per request."""
+
+import os
+import requests
+import time
+from benchmarks.server import StandInServer, fragment_id
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+
+
+CALLS = 500
+
+
+class _OneShotSession(object):
+    """Mimics the former behaviour: module-level `requests` calls, a new connection each time."""
+
+    def get(self, *args, **kwargs):
+        return requests.get(*args, **kwargs)
+
+    def post(self, *args, **kwargs):
+        return requests.post(*args, **kwargs)
+
+
+def _run(service):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        service.get_fragment("SPSSoftwareType", fragment_id(0))
+    return CALLS / (time.perf_counter() - start)
+
+
+def main():
+    os.environ.pop("MATRIX42_URL", None)
+    os.environ.pop("MATRIX42SDK_API_TOKEN", None)
+    with StandInServer() as server:
+        pooled = FragmentsDataService(_url=server.url, _api_token="bench")
+        one_shot = FragmentsDataService(
+            _url=server.url, _api_token="bench", _session=_OneShotSession()
+        )
+        new = _run(pooled)
+        old = _run(one_shot)
+    print("one connection per request: %8.1f calls/s" % old)
+    print("pooled keep-alive session:  %8.1f calls/s" % new)
+    print("speed-up:                   %8.2fx" % (new / old))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Import time of the SDK and the cost of creating clients that may never send a request.
+
+Compares the former eager authentication, a token request while the client is created, with the
+lazy clients and with clients of a shared :class:`ClientFactory <matrix42sdk.Clients.ClientFactory>`.
+Every eager client gets its own token cache, like in a new process or serverless invocation.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.server import StandInServer
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Clients import ClientFactory
+from matrix42sdk.TokenCache import AccessTokenCache
+
+
+IMPORTS = 10
+CLIENTS = 200
+
+
+def _process_seconds(code):
+    times = list()
+    for _ in range(IMPORTS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _per_client(create):
+    start = time.perf_counter()
+    for _ in range(CLIENTS):
+        create()
+    return (time.perf_counter() - start) / CLIENTS
+
+
+def main():
+    os.environ.pop("MATRIX42_URL", None)
+    os.environ.pop("MATRIX42SDK_API_TOKEN", None)
+    bare = _process_seconds("pass")
+    imported = _process_seconds(
+        "import matrix42sdk.api_endpoints.fragments, matrix42sdk.api_endpoints.objects"
+    )
+    print("import of the data services:  %8.1f ms" % ((imported - bare) * 1000))
+
+    with StandInServer() as server:
+        kwargs = dict(_url=server.url, _api_token="bench")
+
+        def eager():
+            client = FragmentsDataService(_token_cache=AccessTokenCache(), **kwargs)
+            client.get_matrix42_access_header()
+
+        factory = ClientFactory(**kwargs)
+        results = [
+            ("eager authentication", _per_client(eager)),
+            ("lazy client", _per_client(lambda: FragmentsDataService(**kwargs))),
+            ("client of a ClientFactory", _per_client(factory.fragments)),
+        ]
+    for name, seconds in results:
+        print("%-29s %8.1f us per client" % (name + ":", seconds * 1e6))
+
+
+if __name__ == "__main__":
+    main()
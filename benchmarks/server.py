@@ -0,0 +1,252 @@
+"""Minimal in-process stand-in for the Matrix42 ESM REST API.
+
+Serves the token route and the Generic Data Service routes of the objects and fragments over
+HTTP/1.1, so that keep-alive connections can be reused by the client:
+
+* ``POST .../ApiToken/GenerateAccessTokenFromApiToken/``
+* ``GET .../fragments/<ddname>`` with `pageSize`, `pageNumber` and "ID IN (...)" where clauses,
+  ``GET .../fragments/<ddname>/<id>`` and ``GET .../fragments/<ddname>/<id>/<relation>``
+* ``GET .../objects/<ciName>/<id>``
+* the writes of both services, answered like the ESM server does without data
+
+Every Data Definition holds the same `rows` generated fragments with the Ids "f00000000",
+"f00000001", ... Latency, the size of the rows and a rate of 503 answers can be injected.
+"""
+
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+DEFAULT_ROWS = 10000
+DEFAULT_RELATIONS = 200
+
+_ROUTE = re.compile(r"/api/data/(fragments|objects)/([^?]*)", re.IGNORECASE)
+_IDS_IN = re.compile(r"ID\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+
+
+def fragment_id(index):
+    return "f%08d" % index
+
+
+def _row(index, payload_bytes):
+    row = {
+        "ID": fragment_id(index),
+        "Name": "Software %d" % index,
+        "Version": "1.%d.0" % (index % 100),
+        "LastUpdate": "2021-06-01T12:%02d:%02d.123Z" % (index // 60 % 60, index % 60),
+        "TimeStamp": "AAAAAAA%05d" % (index % 100000),
+        "Price": index * 1.25,
+        "Installations": index % 1000,
+    }
+    if payload_bytes:
+        row["Description"] = "x" * payload_bytes
+    return json.dumps(row).encode()
+
+
+class _Data(object):
+    """The answers of the server, rendered once so that serving them costs little."""
+
+    def __init__(self, rows, relations, payload_bytes):
+        self.rows = [_row(i, payload_bytes) for i in range(rows)]
+        self.relations = self.rows[:relations]
+        self.index = dict((fragment_id(i), i) for i in range(rows))
+
+    @staticmethod
+    def page(rows, query):
+        size = query.get("pageSize")
+        if size is not None:
+            size = int(size[0])
+            start = size * int(query.get("pageNumber", ["0"])[0])
+            rows = rows[start : start + size]
+        return b"[" + b",".join(rows) + b"]"
+
+    def list_body(self, query):
+        where = query.get("where", [""])[0]
+        match = _IDS_IN.search(where)
+        if match is None:
+            return self.page(self.rows, query)
+        ids = (i.strip().strip("'").lower() for i in match.group(1).split(","))
+        return self.page(
+            [self.rows[self.index[i]] for i in ids if i in self.index], query
+        )
+
+    def fragment_body(self, fragmentId):
+        index = self.index.get(fragmentId.lower())
+        return None if index is None else self.rows[index]
+
+    def object_body(self, objectId):
+        fragment = self.fragment_body(objectId)
+        if fragment is None:
+            return None
+        # the core fragment and a multi-fragment with ten rows
+        return b'{"ID":"%s","SPSSoftwareTypeClassBase":%s,"SPSCommonClassBase":[%s]}' % (
+            objectId.encode(),
+            fragment,
+            b",".join(self.rows[:10]),
+        )
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=b"", headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for header in headers:
+            self.send_header(*header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _drain(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+    def _inject(self):
+        """Waits for the injected latency, returns True if the request was answered with an error."""
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        if server.error_rate and random.random() < server.error_rate:
+            self._reply(503, b'{"ExceptionName":"Unavailable"}', [("Retry-After", "0")])
+            return True
+        return False
+
+    def _route(self):
+        url = urlsplit(self.path)
+        match = _ROUTE.search(url.path)
+        if match is None:
+            return None, [], dict()
+        segments = [s for s in match.group(2).split("/") if s]
+        return match.group(1).lower(), segments, parse_qs(url.query)
+
+    def do_GET(self):
+        if self._inject():
+            return
+        service, segments, query = self._route()
+        data = self.server.data
+        body = None
+        if service == "fragments" and len(segments) == 1:
+            body = data.list_body(query)
+        elif service == "fragments" and len(segments) == 2:
+            body = data.fragment_body(segments[1])
+        elif service == "fragments" and len(segments) == 3:
+            body = data.page(data.relations, query)
+        elif service == "fragments" and len(segments) == 4:
+            # adding a relation
+            body = b""
+        elif service == "objects" and len(segments) == 2:
+            body = data.object_body(segments[1])
+        if body is None:
+            self._reply(404, b'{"ExceptionName":"NotFound"}')
+        else:
+            self._reply(200, body)
+
+    def do_POST(self):
+        self._drain()
+        if "ApiToken" in self.path:
+            self._reply(200, json.dumps({"RawToken": "stand-in-token"}).encode())
+        elif not self._inject():
+            self._reply(200, b'"b5b5a3c0"')
+
+    def do_PUT(self):
+        self._drain()
+        if not self._inject():
+            self._reply(204)
+
+    def do_DELETE(self):
+        if not self._inject():
+            self._reply(204)
+
+
+def _create_httpd(host, port, rows, relations, payload_bytes, latency, error_rate):
+    httpd = ThreadingHTTPServer((host, port), _Handler)
+    httpd.daemon_threads = True
+    httpd.data = _Data(rows, relations, payload_bytes)
+    httpd.latency = latency
+    httpd.error_rate = error_rate
+    return httpd
+
+
+def _serve(options, addresses):
+    httpd = _create_httpd(**options)
+    addresses.put(httpd.server_address[:2])
+    httpd.serve_forever()
+
+
+class StandInServer(object):
+    """Starts the stand-in server on a free local port in a background thread.
+
+    Use as a context manager; `url` holds the base URL to pass to the SDK clients.
+
+    Args:
+        rows (int): Number of fragments in every Data Definition.
+        relations (int): Number of related fragments of every fragment.
+        payload_bytes (int): Length of an additional text attribute of every fragment.
+        latency (float): Seconds every data request is delayed before it is answered.
+        error_rate (float): Share of the data requests answered with 503 and "Retry-After: 0".
+        isolated (bool): Serves from a child process instead of a thread, so that the server
+            neither competes with the client for the GIL nor counts in its memory measurements.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        *,
+        rows=DEFAULT_ROWS,
+        relations=DEFAULT_RELATIONS,
+        payload_bytes=0,
+        latency=0.0,
+        error_rate=0.0,
+        isolated=False,
+    ):
+        options = dict(
+            host=host,
+            port=port,
+            rows=rows,
+            relations=relations,
+            payload_bytes=payload_bytes,
+            latency=latency,
+            error_rate=error_rate,
+        )
+        self._httpd = self._process = self._thread = None
+        if isolated:
+            addresses = multiprocessing.Queue()
+            self._process = multiprocessing.Process(
+                target=_serve, args=(options, addresses), daemon=True
+            )
+            self._process.start()
+            self._address = addresses.get(timeout=60)
+        else:
+            self._httpd = _create_httpd(**options)
+            self._address = self._httpd.server_address[:2]
+            self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return "http://%s:%s" % self._address
+
+    def __enter__(self):
+        if self._thread is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+        else:
+            self._httpd.shutdown()
+            self._httpd.server_close()
@@ -0,0 +1,395 @@
+"""Throughput, latency and peak memory of every endpoint method against the stand-in server.
+
+Each scenario calls one endpoint method, or one bulk or streaming path, repeatedly and reports
+
+* throughput in calls/s and rows/s,
+* p50 and p99 latency of a single call,
+* the peak of the memory allocated by the client during one call, traced with `tracemalloc`
+  in a separate pass so that tracing does not slow down the timed calls.
+
+The server runs in a child process, so that it neither competes with the client for the GIL nor
+counts in its memory. Latency, row size and a rate of 503 answers can be injected, see ``--help``.
+
+Every run is saved as JSON in the results directory and compared with the previous run of the same
+configuration, or with ``--baseline``; throughput, p99 or memory worse by more than ``--threshold``
+are reported as regression and make the run exit with status 1.
+
+Run with ``python -m benchmarks.suite`` from the repository root.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from benchmarks.server import StandInServer, fragment_id
+from matrix42sdk import Codec
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.AuthNClient import generate_access_token
+from matrix42sdk.Resilience import AIMDLimiter, RetryPolicy, TransportPolicy
+from matrix42sdk.TokenCache import AccessTokenCache
+
+
+try:
+    from matrix42sdk.api_endpoints.async_fragments import AsyncFragmentsDataService
+    from matrix42sdk.AsyncClient import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+DD = "SPSSoftwareTypeClassBase"
+CI = "SPSSoftwareType"
+RELATION = "AttachedUsers"
+
+DEFAULT_RESULTS_DIR = ".benchmarks"
+DEFAULT_THRESHOLD = 0.15
+
+
+def percentile(values, share):
+    """Returns the nearest-rank percentile of `values`, e.g. `share=0.99` for p99."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(share * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _rows(result):
+    # number of rows a call returned, for the rows/s throughput
+    if result is None:
+        return 0
+    if isinstance(result, (list, dict)):
+        return len(result)
+    if hasattr(result, "found"):
+        return len(result.found)
+    if hasattr(result, "__len__"):
+        return len(result)
+    return 1
+
+
+def _failures(result):
+    # endpoint methods print errors and return None, bulk methods report them per item
+    if result is None:
+        return 1
+    failed = getattr(result, "failed", None)
+    return len(failed) if isinstance(failed, list) else 0
+
+
+class Scenario(object):
+    """One benchmarked call.
+
+    Args:
+        name (str): Name in the report, e.g. "fragments.get_fragment".
+        call (callable): Makes the call and returns its result; generators are consumed.
+        bulk (bool): Heavy calls are repeated `rounds` times instead of `calls` times.
+    """
+
+    def __init__(self, name, call, bulk=False):
+        self.name = name
+        self.call = call
+        self.bulk = bulk
+
+    def once(self):
+        result = self.call()
+        if hasattr(result, "__next__"):
+            count = 0
+            for _ in result:
+                count += 1
+            return count, 0
+        return _rows(result), _failures(result)
+
+    def measure(self, repeat):
+        latencies, rows, failures = list(), 0, 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            start = time.perf_counter()
+            try:
+                count, failed = self.once()
+            except Exception:
+                count, failed = 0, 1
+            latencies.append(time.perf_counter() - start)
+            rows += count
+            failures += failed
+        elapsed = time.perf_counter() - started
+
+        tracemalloc.start()
+        try:
+            self.once()
+        except Exception:
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        return {
+            "calls": repeat,
+            "calls_per_s": repeat / elapsed,
+            "rows_per_s": rows / elapsed,
+            "p50_ms": percentile(latencies, 0.5) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "peak_kib": peak / 1024,
+            "failures": failures,
+        }
+
+
+def scenarios(url, rows, stack):
+    """Returns the scenarios of all endpoint methods, bulk and streaming paths.
+
+    Clients which need closing are registered with the ExitStack `stack`.
+    """
+    # retries of injected 503s are part of the measurement, a tripped circuit breaker is not
+    policy = TransportPolicy(RetryPolicy(), AIMDLimiter(), None)
+    kwargs = dict(
+        _url=url, _api_token="bench", _policy=policy, _token_cache=AccessTokenCache()
+    )
+    frg = FragmentsDataService(**kwargs)
+    obj = ObjectsDataService(**kwargs)
+    ids = [fragment_id(i) for i in range(0, rows, max(1, rows // 1000))]
+    updates = [(i, {"Name": "renamed"}) for i in ids[:500]]
+    body = frg.get_fragment(DD, ids[0])
+    page = 500
+
+    result = [
+        Scenario(
+            "token.generate_access_token",
+            lambda: generate_access_token(
+                {"Content-Type": "application/json"},
+                url,
+                "bench",
+                False,
+                _session=frg.session,
+            ),
+        ),
+        Scenario("fragments.get_fragment", lambda: frg.get_fragment(DD, ids[0])),
+        Scenario(
+            "fragments.get_fragments_list",
+            lambda: frg.get_fragments_list(
+                DD, columns="Name", pageSize=page, pageNumber=0
+            ),
+        ),
+        Scenario(
+            "fragments.get_fragments_list[all]",
+            lambda: frg.get_fragments_list(DD, columns="Name"),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.get_fragments_list[stream]",
+            lambda: frg.get_fragments_list(DD, columns="Name", stream=True),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.iter_fragments",
+            lambda: frg.iter_fragments(DD, columns="Name", page_size=page),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.get_fragments_list_parallel",
+            lambda: frg.get_fragments_list_parallel(DD, columns="Name", page_size=page),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.get_fragments_columnar",
+            lambda: frg.get_fragments_columnar(DD, columns="Name", page_size=page),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.get_fragments_by_ids",
+            lambda: frg.get_fragments_by_ids(DD, ids, columns="Name"),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.get_fragment_relations_list",
+            lambda: frg.get_fragment_relations_list(DD, ids[0], RELATION),
+        ),
+        Scenario(
+            "fragments.iter_fragment_relations",
+            lambda: frg.iter_fragment_relations(DD, ids[0], RELATION, page_size=50),
+        ),
+        Scenario("fragments.create_fragment", lambda: frg.create_fragment(DD, body)),
+        Scenario("fragments.update_fragment", lambda: frg.update_fragment(DD, body)),
+        Scenario("fragments.delete_fragement", lambda: frg.delete_fragement(DD, ids[0])),
+        Scenario(
+            "fragments.add_fragment_relation",
+            lambda: frg.add_fragment_relation(DD, ids[0], RELATION, ids[1]),
+        ),
+        Scenario(
+            "fragments.delete_fragment_relation",
+            lambda: frg.delete_fragment_relation(DD, ids[0], RELATION, ids[1]),
+        ),
+        Scenario(
+            "fragments.update_fragments",
+            lambda: frg.update_fragments(DD, updates),
+            bulk=True,
+        ),
+        Scenario(
+            "fragments.add_fragment_relations",
+            lambda: frg.add_fragment_relations(DD, ids[0], RELATION, ids[:400]),
+            bulk=True,
+        ),
+        Scenario("objects.get_object", lambda: obj.get_object(CI, ids[0])),
+        Scenario(
+            "objects.get_object[stream]", lambda: obj.get_object(CI, ids[0], stream=True)
+        ),
+        Scenario(
+            "objects.create_object",
+            lambda: obj.create_object(CI, {"SPSSoftwareTypeClassBase": body}),
+        ),
+        Scenario(
+            "objects.update_object",
+            lambda: obj.update_object(
+                CI, {"ID": ids[0], "SPSSoftwareTypeClassBase": body}
+            ),
+        ),
+        Scenario("objects.delete_object", lambda: obj.delete_object(CI, ids[0])),
+    ]
+
+    if aiohttp is not None:
+        loop = asyncio.new_event_loop()
+        afrg = AsyncFragmentsDataService(**kwargs)
+        stack.callback(loop.close)
+        stack.callback(lambda: loop.run_until_complete(afrg.close()))
+        result.append(
+            Scenario(
+                "async.get_fragment[x100]",
+                lambda: loop.run_until_complete(
+                    afrg.gather(*(afrg.get_fragment(DD, i) for i in ids[:100]))
+                ),
+                bulk=True,
+            )
+        )
+    return result
+
+
+def _previous(results_dir, config):
+    # the newest saved run with the same configuration
+    for path in sorted(glob.glob(os.path.join(results_dir, "run-*.json")), reverse=True):
+        with open(path) as fp:
+            run = json.load(fp)
+        if run.get("config") == config:
+            return path, run
+    return None, None
+
+
+def regressions(results, baseline, threshold):
+    """Returns (scenario, metric, old, new) of every metric worse than `baseline` by more than `threshold`."""
+    found = list()
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric, higher_is_better in (
+            ("calls_per_s", True),
+            ("p99_ms", False),
+            ("peak_kib", False),
+        ):
+            before, after = old[metric], new[metric]
+            if higher_is_better:
+                worse = after < before * (1 - threshold)
+            else:
+                worse = after > before * (1 + threshold)
+            if worse:
+                found.append((name, metric, before, after))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.suite", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument(
+        "--calls", type=int, default=200, help="repetitions of single calls"
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="repetitions of bulk calls")
+    parser.add_argument(
+        "--rows", type=int, default=10000, help="fragments per Data Definition"
+    )
+    parser.add_argument(
+        "--payload-bytes", type=int, default=0, help="extra text per fragment"
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="server latency")
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="share of 503 answers"
+    )
+    parser.add_argument("--only", help="runs the scenarios whose name contains this text")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument(
+        "--baseline", help="saved run to compare with, default: the previous one"
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    os.environ.pop("MATRIX42_URL", None)
+    os.environ.pop("MATRIX42SDK_API_TOKEN", None)
+    config = dict(
+        calls=args.calls,
+        rounds=args.rounds,
+        rows=args.rows,
+        payload_bytes=args.payload_bytes,
+        latency_ms=args.latency_ms,
+        error_rate=args.error_rate,
+        codec=Codec.get_codec().name,
+        python=platform.python_version(),
+    )
+
+    results = dict()
+    server = StandInServer(
+        rows=args.rows,
+        payload_bytes=args.payload_bytes,
+        latency=args.latency_ms / 1000,
+        error_rate=args.error_rate,
+        isolated=True,
+    )
+    with server, contextlib.ExitStack() as stack:
+        print(
+            "%-40s %10s %10s %9s %9s %10s %6s"
+            % ("scenario", "calls/s", "rows/s", "p50 ms", "p99 ms", "peak KiB", "fail")
+        )
+        for scenario in scenarios(server.url, args.rows, stack):
+            if args.only and args.only not in scenario.name:
+                continue
+            repeat = args.rounds if scenario.bulk else args.calls
+            # the endpoint methods print every update and error
+            with contextlib.redirect_stdout(io.StringIO()):
+                measured = scenario.measure(repeat)
+            results[scenario.name] = measured
+            print(
+                "%-40s %10.1f %10.1f %9.2f %9.2f %10.1f %6d"
+                % (
+                    scenario.name,
+                    measured["calls_per_s"],
+                    measured["rows_per_s"],
+                    measured["p50_ms"],
+                    measured["p99_ms"],
+                    measured["peak_kib"],
+                    measured["failures"],
+                )
+            )
+
+    if args.baseline:
+        baseline_path = args.baseline
+        with open(baseline_path) as fp:
+            baseline = json.load(fp)
+    else:
+        baseline_path, baseline = _previous(args.results_dir, config)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    path = os.path.join(args.results_dir, "run-%s.json" % time.strftime("%Y%m%d-%H%M%S"))
+    with open(path, "w") as fp:
+        json.dump({"config": config, "results": results}, fp, indent=2, sort_keys=True)
+    print("\nsaved to %s" % path)
+
+    if baseline is None:
+        print("no earlier run with the same configuration to compare with")
+        return 0
+    found = regressions(results, baseline["results"], args.threshold)
+    print("compared with %s: %d regression(s)" % (baseline_path, len(found)))
+    for name, metric, before, after in found:
+        print("  %-40s %-12s %10.2f -> %10.2f" % (name, metric, before, after))
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
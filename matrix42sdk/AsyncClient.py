@@ -0,0 +1,157 @@
+"""asyncio counterpart of the Matrix42RestClient
+
+The asynchronous data services send their requests with `aiohttp`, so that they do not block the
+event loop. Access tokens come from the same process-wide token cache as for the synchronous
+clients. `aiohttp` is an optional dependency: ``pip install matrix42sdk[async]``.
+"""
+
+import asyncio
+import ssl
+from matrix42sdk.AuthNClient import Matrix42RestClient
+
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+async def gather_bounded(aws, limit):
+    """Runs the awaitables concurrently, at most `limit` of them at the same time.
+
+    Args:
+        aws (iterable): Coroutines or other awaitables, e.g. `get_fragment` calls.
+        limit (int): Maximum number of awaitables running at once. None means unbounded.
+
+    Returns:
+        list: Their results, in the order of `aws`.
+    """
+    if limit is None:
+        return await asyncio.gather(*aws)
+
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(bounded(aw) for aw in aws))
+
+
+class AsyncMatrix42RestClient(Matrix42RestClient):
+    """Main Authentication Class for the asyncio data services
+
+    Takes the same arguments as :class:`Matrix42RestClient <matrix42sdk.AuthNClient.Matrix42RestClient>`.
+    The `aiohttp` session is opened on the first request; close it with :meth:`close` or use the
+    client as ``async with`` context manager.
+    """
+
+    def __init__(self, **kwargs):
+        if aiohttp is None:
+            raise ImportError(
+                "The asyncio data services require aiohttp: pip install matrix42sdk[async]"
+            )
+        super().__init__(**kwargs)
+        self._aio_session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._aio_session is not None:
+            await self._aio_session.close()
+            self._aio_session = None
+
+    def _ssl_context(self):
+        # same semantics as Requests' `verify`: a bool or the path of a CA bundle
+        if isinstance(self._ssl_verify, str):
+            return ssl.create_default_context(cafile=self._ssl_verify)
+        return None if self._ssl_verify else False
+
+    def _get_aio_session(self):
+        if self._aio_session is None:
+            connector = aiohttp.TCPConnector(
+                limit_per_host=self._pool_size, ssl=self._ssl_context()
+            )
+            self._aio_session = aiohttp.ClientSession(connector=connector)
+        return self._aio_session
+
+    async def _async_access_token(self):
+        raw_token = self._token_cache.peek(self._token_key(), self._fetch_access_token)
+        if raw_token is None:
+            # minting a token is a blocking call, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            raw_token = await loop.run_in_executor(None, self._access_token)
+        return raw_token
+
+    async def _async_throttle_delay(self, method):
+        if self._rate_limiter is None:
+            return 0.0
+        # a FileTokenBucket waits for a file lock held by other processes, keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._rate_limiter.reserve, method)
+
+    async def _request(self, method, url, **kwargs):
+        """Sends a request without blocking the event loop, see
+        :meth:`Matrix42RestClient._request <matrix42sdk.AuthNClient.Matrix42RestClient._request>`.
+
+        Returns:
+            aiohttp's response object with the body already read.
+        """
+        return await self._policy.send_async(
+            method,
+            self._send_once(self._send_async, method, url, kwargs),
+            (aiohttp.ClientConnectionError, asyncio.TimeoutError),
+        )
+
+    async def _send_async(self, method, url, **kwargs):
+        session = self._get_aio_session()
+        raw_token = await self._async_access_token()
+        headers = dict(self._headers, Authorization="Bearer %s" % raw_token)
+        await asyncio.sleep(await self._async_throttle_delay(method))
+        response = await self._aio_request(
+            session, method, url, headers=headers, **kwargs
+        )
+        if response.status == 401:
+            self._token_cache.invalidate(self._token_key(), raw_token)
+            headers.update(Authorization="Bearer %s" % await self._async_access_token())
+            await asyncio.sleep(await self._async_throttle_delay(method))
+            response = await self._aio_request(
+                session, method, url, headers=headers, **kwargs
+            )
+        return response
+
+    async def _aio_request(self, session, method, url, **kwargs):
+        # reading the whole body hands the connection back to the pool, while
+        # the body stays available through `response.read()`
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            response = await session.request(method, url, **kwargs)
+            await response.read()
+            return response
+        event = instrumentation.request_started(method, url, kwargs)
+        try:
+            response = await session.request(method, url, **kwargs)
+            body = await response.read()
+        except Exception as err:
+            instrumentation.request_finished(event, error=err)
+            raise
+        instrumentation.request_finished(event, response, received=len(body))
+        return response
+
+    async def gather(self, *aws, limit=None):
+        """Awaits the given calls concurrently, with at most `limit` requests in flight.
+
+        Example: ``await frg.gather(*(frg.get_fragment(dd, i) for i in ids), limit=20)``
+
+        Args:
+            aws (awaitable): Calls of the asynchronous endpoint methods.
+            limit (int): Maximum number of concurrent calls, defaults to the pool size.
+
+        Returns:
+            list: Their results, in the given order.
+        """
+        return await gather_bounded(aws, limit if limit is not None else self._pool_size)
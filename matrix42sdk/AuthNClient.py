@@ -1,21 +1,87 @@
 import os
 import requests
+import time
+from matrix42sdk.Cache import body_ids, fragment_stamps
 from matrix42sdk.Exceptions import AuthNError
+from matrix42sdk.Resilience import TransportPolicy
+from matrix42sdk.TokenCache import TOKEN_CACHE, AccessToken
+from requests.adapters import HTTPAdapter
 
 
 MATRIX42_GENERATE_ACCESS_TOKEN_ENDPOINT = (
     "/m42Services/api/ApiToken/GenerateAccessTokenFromApiToken/"
 )
 
+# number of keep-alive connections kept open towards the ESM server per client
+DEFAULT_POOL_SIZE = 10
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE):
+    """Creates a Requests' session whose keep-alive connection pool holds `pool_size` connections.
+
+    Reusing the session avoids a new TCP and TLS handshake for every call to the ESM server.
+
+    Args:
+        pool_size (int): Maximum number of connections kept open per host.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def generate_access_token(
+    _headers, _url, _api_token, _ssl_verify, *args, _session=None, **kwargs
+):
+    """Exchanges the API Token for a new access token via `GenerateAccessTokenFromApiToken`.
+
+    Returns:
+        :class:`AccessToken <matrix42sdk.TokenCache.AccessToken>` with the raw token and its expiry.
+    """
+    # fall back to a one-off connection when no pooled session is provided
+    requester = _session if _session is not None else requests
+    site_endpoint = _url + MATRIX42_GENERATE_ACCESS_TOKEN_ENDPOINT
+
+    # dont use .update() on dict because it is updated in place, hence returning None type
+    tkn_dict = dict({"Authorization": "Bearer %s" % _api_token})
+    access_headers = dict(_headers, **tkn_dict)
+    postReq = requester.post(
+        site_endpoint, headers=access_headers, verify=_ssl_verify, *args, **kwargs
+    )
+    postReq.raise_for_status()
+    return AccessToken.from_response(postReq.json())
+
 
 class Matrix42RestClient(object):
     """Main Authentication Class
 
+    Creating a client sends no request; the access token is fetched with the first request.
+
     Args:
         hostname (str): Full URL of ESM server, e.g. "https://matrix.firm.com"
         api_token (str): Generated API Token in the ESM GUI. Used for getting Access Token
         ssl_verify (bool): Requests' parameter for wherther TLS is being checked. Use it if hostname is using
                             Self-Signed Certificates
+        pool_size (int): Number of keep-alive connections the client keeps open to the ESM server.
+        session (requests.Session): Optional. Already existing session (connection pool) to share with
+                            other clients. If omitted, a new one with `pool_size` connections is created.
+        cache (ResponseCache): Optional. Read-through cache for fragments and objects, disabled if None.
+                            Share one instance between services so that their writes invalidate it.
+        token_cache (AccessTokenCache): Optional. Cache the access tokens are taken from. Defaults to
+                            the process-wide cache, so all clients with the same url and API Token share one.
+        policy (TransportPolicy): Optional. Retries, adaptive concurrency limit and circuit breaker of all
+                            requests. Defaults to a new policy per client; share one between clients of the
+                            same server so that they adapt together.
+        rate_limiter (RateLimiter): Optional. Request budgets every call is held to, e.g. separate ones
+                            for reads and writes. Share it, or use file backed buckets, to hold several
+                            clients or processes to one budget.
+        instrumentation (Instrumentation): Optional. Hooks, metrics and spans of every request, including
+                            the ones to the token endpoint. Disabled if None.
+        single_flight (SingleFlight): Optional. Lets identical concurrent reads share one request and its
+                            decoded result. Disabled if None.
+        schema_registry (SchemaRegistry): Optional. Schemas of the Data Definitions, fetched once. Defaults
+                            to one in memory per client; share one with a file to keep them across runs.
     """
 
     def __init__(
@@ -24,6 +90,15 @@ class Matrix42RestClient(object):
         _api_token=None,
         _ssl_verify=False,
         _configKeyType=None,
+        _pool_size=DEFAULT_POOL_SIZE,
+        _session=None,
+        _token_cache=None,
+        _cache=None,
+        _policy=None,
+        _rate_limiter=None,
+        _instrumentation=None,
+        _single_flight=None,
+        _schema_registry=None,
     ):
 
         self._headers = dict({"Content-Type": "application/json"})
@@ -32,6 +107,15 @@ class Matrix42RestClient(object):
         self._configKeyType = _configKeyType
         self.__uses_shell = True
         self.__uses_app_token = True
+        self._pool_size = _pool_size
+        self._session = _session if _session is not None else create_session(_pool_size)
+        self._token_cache = _token_cache if _token_cache is not None else TOKEN_CACHE
+        self._cache = _cache
+        self._policy = _policy if _policy is not None else TransportPolicy.default()
+        self._rate_limiter = _rate_limiter
+        self._instrumentation = _instrumentation
+        self._single_flight = _single_flight
+        self._schema_registry = _schema_registry
 
         MATRIX42SDK_API_TOKEN = os.environ.get("MATRIX42SDK_API_TOKEN", None)
         MATRIX42_URL = os.environ.get("MATRIX42_URL", None)
@@ -65,6 +149,34 @@ class Matrix42RestClient(object):
     def ssl_verify(self, value):
         self._ssl_verify = value
 
+    @property
+    def session(self):
+        return self._session
+
+    @property
+    def cache(self):
+        return self._cache
+
+    @property
+    def policy(self):
+        return self._policy
+
+    @property
+    def rate_limiter(self):
+        return self._rate_limiter
+
+    @property
+    def instrumentation(self):
+        return self._instrumentation
+
+    @property
+    def single_flight(self):
+        return self._single_flight
+
+    @property
+    def schema_registry(self):
+        return self._schema_registry
+
     @property
     def api_token(self):
         return self._api_token
@@ -83,28 +195,185 @@ class Matrix42RestClient(object):
 
     @classmethod
     def set_access_token_header(
-        cls, _headers, _url, _api_token, _ssl_verify, *args, **kwargs
+        cls, _headers, _url, _api_token, _ssl_verify, *args, _session=None, **kwargs
     ):
 
-        site_endpoint = _url + MATRIX42_GENERATE_ACCESS_TOKEN_ENDPOINT
-
-        # dont use .update() on dict because it is updated in place, hence returning None type
-        tkn_dict = dict({"Authorization": "Bearer %s" % _api_token})
-        access_headers = dict(_headers, **tkn_dict)
-        postReq = requests.post(
-            site_endpoint, headers=access_headers, verify=_ssl_verify, *args, **kwargs
+        access_token = generate_access_token(
+            _headers, _url, _api_token, _ssl_verify, *args, _session=_session, **kwargs
         )
-        raw_acc_token = postReq.json()["RawToken"]
 
         # here we want to update in-place
-        acc_tkn = dict({"Authorization": "Bearer %s" % raw_acc_token})
+        acc_tkn = dict({"Authorization": "Bearer %s" % access_token.raw})
         _headers.update(**acc_tkn)
-        return cls(_headers)
+        return _headers
+
+    def _shared_kwargs(self):
+        """Returns the arguments of another client sharing this one's server, session and policies."""
+        return dict(
+            _url=self._url,
+            _api_token=self._api_token,
+            _ssl_verify=self._ssl_verify,
+            _pool_size=self._pool_size,
+            _session=self._session,
+            _token_cache=self._token_cache,
+            _cache=self._cache,
+            _policy=self._policy,
+            _rate_limiter=self._rate_limiter,
+            _instrumentation=self._instrumentation,
+            _single_flight=self._single_flight,
+            _schema_registry=self._schema_registry,
+        )
+
+    def _token_key(self):
+        return (self._url, self._api_token)
+
+    def _fetch_access_token(self):
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return generate_access_token(
+                self._headers,
+                self._url,
+                self._api_token,
+                self._ssl_verify,
+                _session=self._session,
+            )
+        event = instrumentation.request_started(
+            "POST", self._url + MATRIX42_GENERATE_ACCESS_TOKEN_ENDPOINT, {}
+        )
+        # Requests' response hook hands over the response, also when it is an error
+        answers = list()
+        try:
+            access_token = generate_access_token(
+                self._headers,
+                self._url,
+                self._api_token,
+                self._ssl_verify,
+                _session=self._session,
+                hooks={"response": lambda r, *args, **kwargs: answers.append(r)},
+            )
+        except Exception as err:
+            instrumentation.request_finished(event, answers[-1] if answers else None, err)
+            instrumentation.token_refreshed(False)
+            raise
+        instrumentation.request_finished(event, answers[-1] if answers else None)
+        instrumentation.token_refreshed(True)
+        return access_token
+
+    def _access_token(self):
+        """Returns the raw access token, served from the process-wide token cache when still valid."""
+        return self._token_cache.get(self._token_key(), self._fetch_access_token)
 
     def get_matrix42_access_header(self):
         if self.__uses_app_token is True:
             if self.__uses_shell is True:
-                Matrix42RestClient.set_access_token_header(
-                    self._headers, self._url, self._api_token, self._ssl_verify
-                )
+                self._headers.update(Authorization="Bearer %s" % self._access_token())
         return self._headers
+
+    def _request(self, method, url, **kwargs):
+        """Sends a request to the ESM server over the pooled session with a valid access token.
+
+        If the server rejects the token with 401, the token is refreshed once and the request
+        is retried transparently. Overload answers and connection errors are handled by the
+        client's :class:`TransportPolicy <matrix42sdk.Resilience.TransportPolicy>`.
+
+        Returns:
+            Requests' response object. Checking the status is left to the caller.
+        """
+        return self._policy.send(method, self._send_once(self._send, method, url, kwargs))
+
+    def _send_once(self, send, method, url, kwargs):
+        if self._instrumentation is None:
+            return lambda: send(method, url, **kwargs)
+        # every call of the returned function after the first one is a retry of the policy
+        attempts = [0]
+
+        def send_once():
+            if attempts[0]:
+                self._instrumentation.retried(method, url)
+            attempts[0] += 1
+            return send(method, url, **kwargs)
+
+        return send_once
+
+    def _throttle_delay(self, method):
+        if self._rate_limiter is None:
+            return 0.0
+        return self._rate_limiter.reserve(method)
+
+    def _send(self, method, url, **kwargs):
+        raw_token = self._access_token()
+        headers = dict(self._headers, Authorization="Bearer %s" % raw_token)
+        time.sleep(self._throttle_delay(method))
+        response = self._session_request(
+            method, url, verify=self._ssl_verify, headers=headers, **kwargs
+        )
+        if response.status_code == 401:
+            # hands a streamed response's connection back before retrying
+            response.close()
+            self._token_cache.invalidate(self._token_key(), raw_token)
+            headers.update(Authorization="Bearer %s" % self._access_token())
+            time.sleep(self._throttle_delay(method))
+            response = self._session_request(
+                method, url, verify=self._ssl_verify, headers=headers, **kwargs
+            )
+        return response
+
+    def _session_request(self, method, url, **kwargs):
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return self._session.request(method, url, **kwargs)
+        event = instrumentation.request_started(method, url, kwargs)
+        try:
+            response = self._session.request(method, url, **kwargs)
+        except Exception as err:
+            instrumentation.request_finished(event, error=err)
+            raise
+        instrumentation.request_finished(event, response)
+        return response
+
+    def _coalesced(self, key, load):
+        """Returns `load()`, shared with identical reads in flight when coalescing is enabled."""
+        if self._single_flight is None:
+            return load()
+        # callers with another API Token may be allowed to see other data
+        return self._single_flight.do((self._token_key(),) + key, load)
+
+    def _cache_lookup(self, key):
+        if self._cache is None:
+            return None
+        body = self._cache.get(key)
+        if self._instrumentation is not None:
+            self._instrumentation.cache_lookup(key[0], body is not None)
+        return body
+
+    def _cache_store(self, key, body, document):
+        if self._cache is not None:
+            stamps = fragment_stamps(document)
+            stamps.setdefault(key[2], None)
+            self._cache.put(key, body, stamps)
+
+    def _observe_row(self, row):
+        # rows carrying a newer TimeStamp than a cached fragment make it outdated
+        if self._cache is not None:
+            if isinstance(row, dict) and "TimeStamp" in row and "ID" in row:
+                self._cache.observe_timestamp(row["ID"], row["TimeStamp"])
+
+    def _forget_in_flight(self):
+        # reads issued after a write must not be answered by a request sent before it
+        if self._single_flight is not None:
+            self._single_flight.forget()
+
+    def _cache_invalidate(self, ids):
+        self._forget_in_flight()
+        if self._cache is not None:
+            self._cache.invalidate_ids(ids)
+
+    def _cache_invalidate_body(self, body):
+        """Drops the cached entries of all fragments written with `body`, all entries if unreadable."""
+        self._forget_in_flight()
+        if self._cache is not None:
+            ids = body_ids(body)
+            if ids is None:
+                self._cache.clear()
+            else:
+                self._cache.invalidate_ids(ids)
@@ -0,0 +1,110 @@
+"""Reports of bulk operations
+
+Bulk methods run many service calls and never print or stop at the first error. Instead they
+return a :class:`BulkReport` with one :class:`BulkItemResult` per item.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+# item states of a bulk report
+ADDED = "added"
+DELETED = "deleted"
+UPDATED = "updated"
+SKIPPED = "skipped"
+CONFLICT = "conflict"
+FAILED = "failed"
+UNCHANGED = "unchanged"
+REFRESHED = "refreshed"
+INVALIDATED = "invalidated"
+
+
+class BulkItemResult(object):
+    """Outcome of a single item of a bulk operation.
+
+    Args:
+        id (str): Id of the fragment the item is about.
+        status (str): One of "added", "deleted", "updated", "skipped", "conflict", "failed",
+            or for cache revalidation "unchanged", "refreshed" and "invalidated".
+        error (Exception): The error for failed or conflicting items, otherwise None.
+        response (requests.Response): Response of the last service call of the item, if any.
+    """
+
+    def __init__(self, id, status, error=None, response=None):
+        self.id = id
+        self.status = status
+        self.error = error
+        self.response = response
+
+    def __repr__(self):
+        return "BulkItemResult(id=%r, status=%r)" % (self.id, self.status)
+
+
+class BulkReport(object):
+    """Per-item results of a bulk operation, in the order of the input items."""
+
+    def __init__(self, items=None):
+        self.items = list(items or [])
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        counts = dict()
+        for item in self.items:
+            counts[item.status] = counts.get(item.status, 0) + 1
+        return "BulkReport(%s)" % ", ".join("%s=%s" % kv for kv in sorted(counts.items()))
+
+    def with_status(self, status):
+        """Returns the ids of all items with the given status."""
+        return [item.id for item in self.items if item.status == status]
+
+    @property
+    def failed(self):
+        return self.with_status(FAILED)
+
+    @property
+    def ok(self):
+        """True if no item failed or ran into a conflict."""
+        return all(item.status not in (FAILED, CONFLICT) for item in self.items)
+
+
+def _status(response):
+    # Requests' and aiohttp's responses name the status differently
+    status = getattr(response, "status_code", None)
+    return status if status is not None else response.status
+
+
+def is_concurrency_conflict(response, text=None):
+    """Tells whether the ESM server rejected a write because the TimeStamp sent was outdated.
+
+    The Generic Data Service answers such writes with 409, 412 or a 500 naming the concurrency
+    violation (see :meth:`update_object <matrix42sdk.ObjectsDataService.update_object>`).
+
+    Args:
+        response: Requests' or aiohttp's response.
+        text (str): Body of the response, required for aiohttp's responses, whose `text()` is a
+            coroutine. Defaults to Requests' `response.text`.
+    """
+    status = _status(response)
+    if status in (409, 412):
+        return True
+    if status == 500:
+        text = (response.text if text is None else text).lower()
+        return "concurrency" in text or "timestamp" in text
+    return False
+
+
+def run_bulk(func, items, max_workers):
+    """Calls `func(item)` for all items with at most `max_workers` calls at the same time.
+
+    Returns:
+        :class:`BulkReport` of the :class:`BulkItemResult` objects returned by `func`, in input order.
+    """
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="matrix42sdk-bulk"
+    ) as executor:
+        return BulkReport(executor.map(func, items))
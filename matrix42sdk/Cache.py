@@ -0,0 +1,233 @@
+"""In-process read-through cache for fragments and objects
+
+The cache keeps the raw response bodies of :meth:`get_fragment <matrix42sdk.FragmentsDataService.get_fragment>`
+and :meth:`get_object <matrix42sdk.ObjectsDataService.get_object>`. Entries are evicted in least
+recently used order once the entry count or the memory bound is exceeded, and expire after a TTL.
+
+Every entry remembers the Ids and TimeStamps of the fragments it contains, Ids compared regardless of
+case. Writes through the same client drop all entries containing the written Id, and a TimeStamp seen in any later response
+that differs from the cached one drops the outdated entries as well.
+"""
+
+import collections
+import threading
+import time
+from matrix42sdk import Codec
+
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 300
+
+# attributes holding Ids which an entry depends on
+_ID_ATTRIBUTES = ("ID", "[Expression-ObjectID]", "Expression-ObjectID")
+
+
+def normalize_id(fragmentId):
+    """Returns the spelling of an Id the cache is keyed on."""
+    # Ids are GUIDs, which the server and the callers may spell in different case
+    return str(fragmentId).lower()
+
+
+def _normalize_key(key):
+    # the third item of ("fragment", ddname, fragmentId) and ("object", ciName, objectId, full)
+    if isinstance(key, tuple) and len(key) > 2 and isinstance(key[2], str):
+        return key[:2] + (normalize_id(key[2]),) + key[3:]
+    return key
+
+
+def fragment_stamps(document):
+    """Collects the Ids and TimeStamps of all fragments inside a decoded fragment or object.
+
+    Returns:
+        dict: TimeStamp (or None if the fragment carries none) keyed by the normalized Id, see
+        :func:`normalize_id`.
+    """
+    stamps = dict()
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            for attribute in _ID_ATTRIBUTES:
+                value = node.get(attribute)
+                if isinstance(value, str):
+                    stamps.setdefault(normalize_id(value), None)
+            if isinstance(node.get("ID"), str) and "TimeStamp" in node:
+                stamps[normalize_id(node["ID"])] = node["TimeStamp"]
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(v for v in node if isinstance(v, (dict, list)))
+    return stamps
+
+
+def body_ids(body):
+    """Returns the normalized Ids of the fragments in a request body (dict or JSON text), None if
+    unreadable."""
+    if isinstance(body, (str, bytes, bytearray)):
+        try:
+            body = Codec.loads(body)
+        except ValueError:
+            return None
+    return set(fragment_stamps(body))
+
+
+class _CacheEntry(object):
+    __slots__ = ("body", "stamps", "expires_at")
+
+    def __init__(self, body, stamps, expires_at):
+        self.body = body
+        self.stamps = stamps
+        self.expires_at = expires_at
+
+
+class ResponseCache(object):
+    """Thread-safe LRU cache of response bodies with TTL and memory bound.
+
+    Pass it to a client with ``_cache=ResponseCache()``; the same instance can be shared by a
+    :class:`FragmentsDataService <matrix42sdk.api_endpoints.fragments.FragmentsDataService>` and an
+    :class:`ObjectsDataService <matrix42sdk.api_endpoints.objects.ObjectsDataService>` so that writes
+    through either one invalidate the entries of both.
+
+    Args:
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of the cached response bodies.
+        ttl (float): Seconds after which an entry expires. None keeps entries until evicted.
+    """
+
+    def __init__(
+        self,
+        max_entries=DEFAULT_MAX_ENTRIES,
+        max_bytes=DEFAULT_MAX_BYTES,
+        ttl=DEFAULT_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._lock = threading.RLock()
+        self._entries = collections.OrderedDict()
+        self._by_id = collections.defaultdict(set)
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return _normalize_key(key) in self._entries
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def get(self, key):
+        """Returns the cached body of `key`, None on a miss. Counts hits and misses."""
+        key = _normalize_key(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None:
+                if time.monotonic() >= entry.expires_at:
+                    self._remove(key)
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.body
+
+    def put(self, key, body, stamps=None):
+        """Caches the response `body` of `key`.
+
+        Args:
+            key (tuple): E.g. ("fragment", ddname, fragmentId).
+            body (bytes): Raw response body.
+            stamps (dict): TimeStamps keyed by the Ids the body contains, see :func:`fragment_stamps`.
+        """
+        if len(body) > self.max_bytes:
+            return
+        key = _normalize_key(key)
+        stamps = dict((normalize_id(i), stamp) for i, stamp in (stamps or {}).items())
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = _CacheEntry(body, stamps, expires_at)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            for fragmentId in entry.stamps:
+                self._by_id[fragmentId].add(key)
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+        for fragmentId in entry.stamps:
+            keys = self._by_id.get(fragmentId)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_id[fragmentId]
+
+    def invalidate(self, key):
+        key = _normalize_key(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_ids(self, ids):
+        """Drops every entry which contains one of the given fragment or object Ids."""
+        with self._lock:
+            for fragmentId in ids:
+                for key in list(self._by_id.get(normalize_id(fragmentId), ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def observe_timestamp(self, fragmentId, timeStamp):
+        """Drops the entries holding fragment `fragmentId` with another TimeStamp than `timeStamp`."""
+        fragmentId = normalize_id(fragmentId)
+        with self._lock:
+            for key in list(self._by_id.get(fragmentId, ())):
+                cached = self._entries[key].stamps.get(fragmentId)
+                if cached is not None and cached != timeStamp:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def timestamps(self, kind, name):
+        """Returns the cached TimeStamps of all entries of `kind` for the Data Definition or CI `name`.
+
+        Returns:
+            dict: TimeStamp (None if unknown) keyed by the normalized fragment or object Id of the
+            entry.
+        """
+        with self._lock:
+            return dict(
+                (key[2], entry.stamps.get(key[2]))
+                for key, entry in self._entries.items()
+                if key[0] == kind and key[1] == name
+            )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_id.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Returns the hit/miss counters and the current size of the cache."""
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
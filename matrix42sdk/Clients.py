@@ -0,0 +1,66 @@
+"""Cheap construction of data service clients sharing one connection pool and token
+
+Creating a client sends no request: the access token is fetched with its first request and then
+taken from the token cache. A :class:`ClientFactory` creates the session, transport policy and caches
+once, so that every further client costs a few attribute assignments, e.g. one per invocation of a
+serverless handler or per task of a process pool worker, and all of them use one authentication and
+one pool of keep-alive connections.
+"""
+
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.AuthNClient import Matrix42RestClient
+from matrix42sdk.Schema import SchemaRegistry
+
+
+class ClientFactory(object):
+    """Creates data service clients which share the server, API Token, session and policies.
+
+    Takes the same arguments as :class:`Matrix42RestClient <matrix42sdk.AuthNClient.Matrix42RestClient>`,
+    which are given to every client it creates. Create the factory once per process, e.g. at module
+    level of a handler, and a client wherever one is needed.
+    """
+
+    def __init__(self, **kwargs):
+        self._client = Matrix42RestClient(**kwargs)
+        self._kwargs = self._client._shared_kwargs()
+        if self._kwargs["_schema_registry"] is None:
+            self._kwargs["_schema_registry"] = SchemaRegistry()
+
+    @property
+    def url(self):
+        return self._client.url
+
+    @property
+    def session(self):
+        return self._client.session
+
+    def create(self, cls, **kwargs):
+        """Returns a new client of `cls`, e.g. :class:`AsyncFragmentsDataService
+        <matrix42sdk.api_endpoints.async_fragments.AsyncFragmentsDataService>`.
+
+        Args:
+            cls (type): Client class taking the arguments of Matrix42RestClient.
+            kwargs: Arguments overriding the shared ones for this client only.
+        """
+        return cls(**dict(self._kwargs, **kwargs))
+
+    def fragments(self, **kwargs):
+        """Returns a new :class:`FragmentsDataService <matrix42sdk.FragmentsDataService>`."""
+        return self.create(FragmentsDataService, **kwargs)
+
+    def objects(self, **kwargs):
+        """Returns a new :class:`ObjectsDataService <matrix42sdk.ObjectsDataService>`."""
+        return self.create(ObjectsDataService, **kwargs)
+
+    def authenticate(self):
+        """Fetches the access token now instead of with the first request, e.g. to fail early.
+
+        Raises the HTTP error of the token endpoint if the API Token is rejected.
+        """
+        self._client._access_token()
+        return self
+
+    def close(self):
+        """Closes the shared connection pool."""
+        self._client.session.close()
@@ -0,0 +1,74 @@
+"""Coalescing of identical concurrent reads
+
+When many threads ask for the same fragment, object or list page at the same moment, a
+:class:`SingleFlight` lets only the first of them send the request. The others wait for it and
+receive the same decoded result, or the same exception. Pass it to a client with
+``_single_flight=...``; share one instance between the clients of a worker so that all their
+reads are coalesced.
+
+Waiting callers get the very object the first caller got, so treat the results as read-only, or
+copy them before changing them. Writes through a client let all following reads start a new request,
+so that no read issued after a write is answered by one sent before it.
+"""
+
+import threading
+
+
+class _Call(object):
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """Runs at most one call per key at a time and shares its outcome with concurrent callers.
+
+    Attributes:
+        coalesced (int): Number of calls which were answered by another caller's request.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls = dict()
+
+    def do(self, key, load):
+        """Returns `load()`, or the result of the call with the same `key` already in flight.
+
+        Args:
+            key (tuple): Identifies the request, e.g. its method, URL and query.
+            load (callable): Sends the request and returns the decoded result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = load()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def forget(self):
+        """Lets later callers start new calls instead of joining the ones in flight."""
+        with self._lock:
+            self._calls = dict()
@@ -0,0 +1,86 @@
+"""JSON codec used for request and response bodies
+
+All endpoints decode responses and encode request bodies through :func:`loads` and :func:`dumps`.
+Responses are parsed from the raw bytes, without decoding them into text first. When `orjson` is
+installed (``pip install matrix42sdk[fast]``) it is used, otherwise the standard library's `json`.
+Another codec can be plugged in with :func:`set_codec`.
+"""
+
+import json
+
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class StdlibCodec(object):
+    """Codec on top of the standard library's `json` module."""
+
+    name = "json"
+
+    @staticmethod
+    def loads(data):
+        # json detects the encoding of bytes itself
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(document):
+        return json.dumps(document).encode()
+
+
+class OrjsonCodec(object):
+    """Codec on top of `orjson`, several times faster than the standard library."""
+
+    name = "orjson"
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(document):
+        return orjson.dumps(document)
+
+
+def default_codec():
+    """Returns the fastest installed codec."""
+    return OrjsonCodec if orjson is not None else StdlibCodec
+
+
+_codec = default_codec()
+
+
+def get_codec():
+    return _codec
+
+
+def set_codec(codec):
+    """Replaces the codec of all clients.
+
+    Args:
+        codec: Object with `loads(bytes or str)` and `dumps(document) -> bytes`, e.g.
+            :class:`StdlibCodec`. None restores the default.
+    """
+    global _codec
+    _codec = default_codec() if codec is None else codec
+
+
+def loads(data):
+    """Decodes a JSON body, given as bytes or str."""
+    return _codec.loads(data)
+
+
+def dumps(document):
+    """Encodes a document as UTF-8 JSON bytes."""
+    return _codec.dumps(document)
+
+
+def encode_body(body):
+    """Returns a request body as bytes: dicts and lists are encoded, JSON text is sent as is."""
+    if isinstance(body, str):
+        return body.encode()
+    if isinstance(body, (bytes, bytearray)):
+        return body
+    return _codec.dumps(body)
@@ -0,0 +1,245 @@
+"""Columnar result sets of list queries
+
+A list query answers with one JSON object per row, repeating every column name in every row.
+:class:`ColumnarResult` keeps the values per column instead: numbers and booleans in compact typed
+arrays with a validity mask for nulls, all other values in lists in which equal strings share one
+object. Pages are appended one after another, so that a large export never exists as row dicts at once.
+
+The numeric columns convert to NumPy arrays without copying. NumPy, pandas and pyarrow are optional.
+"""
+
+import array
+
+
+# typecodes of the compact arrays, in promotion order
+_BOOL, _INT, _FLOAT = "b", "q", "d"
+_NUMPY_DTYPES = {_BOOL: "bool", _INT: "int64", _FLOAT: "float64"}
+
+
+def _numpy():
+    # imported when first converting, importing NumPy would double the import time of the SDK
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        raise ImportError("ColumnarResult.to_numpy requires numpy: pip install numpy")
+    return numpy
+
+
+def projection_names(columns):
+    """Returns the result names of an A-SQL Column expression, e.g. "Name, Parent.Name as ParentName".
+
+    Commas inside parentheses, e.g. of function calls, do not separate columns.
+    """
+    if not columns:
+        return ["ID"]
+    names, depth, start = list(), 0, 0
+    for i, character in enumerate(columns + ","):
+        if character == "(":
+            depth += 1
+        elif character == ")":
+            depth -= 1
+        elif character == "," and depth == 0:
+            expression = columns[start:i].strip()
+            start = i + 1
+            if expression:
+                parts = expression.rsplit(" ", 2)
+                if len(parts) == 3 and parts[1].lower() == "as":
+                    expression = parts[2]
+                names.append(expression.strip("[]"))
+    return names
+
+
+def _typecode(value):
+    if isinstance(value, bool):
+        return _BOOL
+    if isinstance(value, int) and -(2**63) <= value < 2**63:
+        return _INT
+    if isinstance(value, float):
+        return _FLOAT
+    return None
+
+
+def _promote(a, b):
+    # wider of two number types, None if either is no number
+    if a is None or b is None:
+        return None
+    order = (_BOOL, _INT, _FLOAT)
+    return max(a, b, key=order.index)
+
+
+class Column(object):
+    """Values of one column: a typed array while all values are numbers, a list otherwise.
+
+    Args:
+        name (str): Name of the column.
+        length (int): Number of leading null values, for columns first seen on a later row.
+    """
+
+    def __init__(self, name, length=0):
+        self.name = name
+        self.typecode = None
+        self.values = [None] * length
+        self.valid = None
+        self._objects = False
+        self._strings = dict()
+
+    def __len__(self):
+        return len(self.values)
+
+    def _to_list(self):
+        values = list(iter(self))
+        self.values, self.valid, self.typecode = values, None, None
+        self._objects = True
+
+    def _to_array(self, typecode):
+        if self.typecode is None:
+            # so far a column of nulls only
+            self.valid = bytearray(len(self.values))
+            self.values = array.array(typecode, [0] * len(self.values))
+        else:
+            self.values = array.array(typecode, self.values)
+        self.typecode = typecode
+
+    def append(self, value):
+        if value is not None:
+            typecode = _typecode(value)
+            if self.typecode is not None and typecode != self.typecode:
+                promoted = _promote(self.typecode, typecode)
+                if promoted is None:
+                    self._to_list()
+                elif promoted != self.typecode:
+                    self._to_array(promoted)
+            elif self.typecode is None and typecode is not None and not self._objects:
+                self._to_array(typecode)
+
+        if self.typecode is None:
+            if isinstance(value, str):
+                value = self._strings.setdefault(value, value)
+            self._objects = self._objects or value is not None
+            self.values.append(value)
+        elif value is None:
+            if self.valid is None:
+                self.valid = bytearray(b"\x01") * len(self.values)
+            self.valid.append(0)
+            self.values.append(0)
+        else:
+            self.values.append(value)
+            if self.valid is not None:
+                self.valid.append(1)
+
+    def to_numpy(self):
+        """Returns the values as NumPy array.
+
+        Numeric columns are views of the compact array, without copying. Columns with nulls
+        become masked arrays. All other columns are object arrays.
+        """
+        numpy = _numpy()
+        if self.typecode is None:
+            values = numpy.empty(len(self.values), dtype=object)
+            values[:] = self.values
+            return values
+        values = numpy.frombuffer(self.values, dtype=_NUMPY_DTYPES[self.typecode])
+        if self.valid is None:
+            return values
+        mask = numpy.frombuffer(self.valid, dtype=numpy.uint8) == 0
+        return numpy.ma.MaskedArray(values, mask=mask, copy=False)
+
+    def __iter__(self):
+        if self.typecode is None:
+            return iter(self.values)
+        convert = bool if self.typecode == _BOOL else (lambda v: v)
+        if self.valid is None:
+            return (convert(v) for v in self.values)
+        return (convert(v) if ok else None for v, ok in zip(self.values, self.valid))
+
+
+class ColumnarResult(object):
+    """Rows of a list query stored per column.
+
+    Args:
+        columns (str): Optional. A-SQL Column expression of the query, which gives the column order.
+            Columns found in the rows but not in the expression are added as they appear.
+    """
+
+    def __init__(self, columns=None):
+        self._length = 0
+        self._columns = dict()
+        for name in projection_names(columns):
+            self._columns[name] = Column(name)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    def __repr__(self):
+        return "ColumnarResult(rows=%d, columns=%r)" % (self._length, self.names)
+
+    @property
+    def names(self):
+        return list(self._columns)
+
+    def append_rows(self, rows):
+        """Appends a page of rows, as returned by the list operations."""
+        for row in rows:
+            for name, value in row.items():
+                column = self._columns.get(name)
+                if column is None:
+                    column = self._columns[name] = Column(name, self._length)
+                column.append(value)
+            self._length += 1
+            for column in self._columns.values():
+                if len(column) < self._length:
+                    column.append(None)
+
+    def iter_rows(self):
+        """Yields the rows as dicts again, one at a time."""
+        names = self.names
+        for values in zip(*(self._columns[name] for name in names)):
+            yield dict(zip(names, values))
+
+    def to_numpy(self):
+        """Returns a dict of NumPy arrays keyed by column name, see :meth:`Column.to_numpy`.
+
+        The numeric arrays share memory with the result; appending more rows afterwards raises
+        BufferError while they are alive.
+        """
+        return dict((name, column.to_numpy()) for name, column in self._columns.items())
+
+    def to_pandas(self):
+        """Returns a pandas DataFrame.
+
+        Numeric columns with nulls become pandas' nullable arrays, built on the same memory.
+        """
+        import pandas
+
+        numpy = _numpy()
+        masked = {
+            _BOOL: pandas.arrays.BooleanArray,
+            _INT: pandas.arrays.IntegerArray,
+            _FLOAT: pandas.arrays.FloatingArray,
+        }
+        data = dict()
+        for name, column in self._columns.items():
+            values = column.to_numpy()
+            if isinstance(values, numpy.ma.MaskedArray):
+                values = masked[column.typecode](values.data, values.mask)
+            data[name] = values
+        return pandas.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """Returns a pyarrow Table. Numeric columns without nulls are handed over without copying."""
+        import pyarrow
+
+        numpy = _numpy()
+        arrays = list()
+        for column in self._columns.values():
+            values = column.to_numpy()
+            if isinstance(values, numpy.ma.MaskedArray):
+                arrays.append(pyarrow.array(values.data, mask=values.mask))
+            elif column.typecode is None:
+                arrays.append(pyarrow.array(column.values))
+            else:
+                arrays.append(pyarrow.array(values))
+        return pyarrow.Table.from_arrays(arrays, names=self.names)
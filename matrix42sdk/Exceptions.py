@@ -6,3 +6,21 @@ class AuthNError(Exception):
     """
 
     pass
+
+
+class CircuitOpenError(Exception):
+    """The ESM server failed repeatedly, requests are suspended for a while.
+
+    Raised by the circuit breaker of :class:`TransportPolicy <matrix42sdk.Resilience.TransportPolicy>`.
+    """
+
+    pass
+
+
+class SchemaError(Exception):
+    """A column expression references attributes or relations the Data Definition does not have.
+
+    Raised by :class:`DataDefinitionSchema <matrix42sdk.Schema.DataDefinitionSchema>`.
+    """
+
+    pass
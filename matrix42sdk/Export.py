@@ -0,0 +1,259 @@
+"""Exporting a Data Definition to NDJSON or CSV files
+
+:func:`export_fragments` pages through a list query like :meth:`get_fragments_list
+<matrix42sdk.FragmentsDataService.get_fragments_list>`, several pages at a time, and writes every
+page as soon as all pages before it are written, so the file keeps the order of the query while at
+most twice `max_workers` pages are held in memory, however large the Data Definition is.
+
+Files ending with ".gz", ".bz2" or ".xz" are compressed. With a checkpoint file, the progress is
+saved every few pages and an interrupted export resumes from the last checkpoint: the file is cut
+back to the size it had then, and compressed files are continued with a new compressed stream, which
+the usual tools read as part of the same file.
+
+Run it with ``python -m matrix42sdk export``, see ``--help``.
+"""
+
+import bz2
+import csv
+import io
+import json
+import lzma
+import os
+import time
+import zlib
+from matrix42sdk import Codec
+from matrix42sdk.Columnar import projection_names
+from matrix42sdk.Pagination import DEFAULT_MAX_WORKERS, iter_pages_parallel
+from matrix42sdk.State import JsonStateStore
+
+
+# rows per page of an export, fixed so that a checkpoint names the next page to load
+DEFAULT_EXPORT_PAGE_SIZE = 1000
+
+# pages written between two checkpoints
+DEFAULT_CHECKPOINT_PAGES = 10
+
+FORMATS = ("ndjson", "csv")
+
+_COMPRESSORS = {
+    "gzip": lambda: zlib.compressobj(6, zlib.DEFLATED, 31),
+    "bz2": bz2.BZ2Compressor,
+    "xz": lzma.LZMACompressor,
+}
+_SUFFIXES = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz"}
+
+
+def output_options(path, format=None, compression=None):
+    """Returns the format and compression of an output file, derived from its name unless given.
+
+    "export.csv.gz" is written as gzip compressed CSV, names not ending with ".csv" as NDJSON.
+    """
+    base, suffix = os.path.splitext(path)
+    if compression is None:
+        compression = _SUFFIXES.get(suffix.lower())
+        if compression is None:
+            base = path
+    if format is None:
+        format = "csv" if base.lower().endswith(".csv") else "ndjson"
+    if format not in FORMATS:
+        raise ValueError(
+            "Unknown format %r, use one of %s" % (format, ", ".join(FORMATS))
+        )
+    if compression is not None and compression not in _COMPRESSORS:
+        raise ValueError("Unknown compression %r" % compression)
+    return format, compression
+
+
+class ExportStats(object):
+    """Progress of an export.
+
+    Attributes:
+        rows (int): Rows in the file, including the ones written before a resume.
+        pages (int): Pages in the file.
+        new_rows (int): Rows written by this run.
+        bytes (int): Uncompressed bytes written by this run.
+        seconds (float): Duration of this run so far.
+        done (bool): True once the last page is written.
+    """
+
+    def __init__(self, rows=0, pages=0):
+        self.rows = rows
+        self.pages = pages
+        self.new_rows = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.done = False
+
+    @property
+    def rows_per_second(self):
+        return self.new_rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return "%d rows, %.0f rows/s, %.2f MB/s" % (
+            self.rows,
+            self.rows_per_second,
+            self.megabytes_per_second,
+        )
+
+
+class _OutputFile(object):
+    """Appends to a file, optionally compressed, and commits it at points a resume can start from."""
+
+    def __init__(self, path, compression, offset):
+        if offset:
+            self._file = open(path, "r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        else:
+            self._file = open(path, "wb")
+        self._new_compressor = _COMPRESSORS.get(compression)
+        self._compressor = None
+
+    def write(self, data):
+        if self._new_compressor is None:
+            self._file.write(data)
+            return
+        if self._compressor is None:
+            self._compressor = self._new_compressor()
+        self._file.write(self._compressor.compress(data))
+
+    def commit(self):
+        """Ends the current compressed stream and returns the size of the file."""
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+            self._compressor = None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _csv_lines(lines):
+    text = io.StringIO()
+    csv.writer(text, lineterminator="\n").writerows(lines)
+    return text.getvalue().encode("utf-8")
+
+
+def _encode_page(rows, format, names):
+    if format == "ndjson":
+        return b"".join(Codec.dumps(row) + b"\n" for row in rows)
+    return _csv_lines([_csv_value(row.get(name)) for name in names] for row in rows)
+
+
+def export_fragments(
+    service,
+    ddname,
+    path,
+    *,
+    where=None,
+    columns=None,
+    sort="ID ASC",
+    format=None,
+    compression=None,
+    page_size=DEFAULT_EXPORT_PAGE_SIZE,
+    max_workers=DEFAULT_MAX_WORKERS,
+    checkpoint=None,
+    checkpoint_pages=DEFAULT_CHECKPOINT_PAGES,
+    progress=None,
+):
+    """Writes all fragments which match the search criteria to an NDJSON or CSV file.
+
+    HTTP errors are raised; with a `checkpoint`, calling the function again with the same arguments
+    continues the export from the last checkpoint.
+
+    Args:
+        service (FragmentsDataService): Client the pages are loaded with.
+        ddname (str): Technical name of the Data Definition (e.g. SPSActivityClassBase).
+        path (str): Output file, replaced unless the export resumes.
+        where (str): Optional. A-SQL Where Expression.
+        columns (str): Optional. A-SQL Column expression, gives the columns of CSV files.
+        sort (str): Sorting of the rows. Keep it unique, e.g. "ID ASC", so that the pages do not
+            overlap.
+        format (str): "ndjson" or "csv", derived from `path` if omitted.
+        compression (str): "gzip", "bz2" or "xz", derived from `path` if omitted.
+        page_size (int): Rows per page.
+        max_workers (int): Maximum number of pages requested at the same time.
+        checkpoint (str): Optional. JSON file the progress is saved in.
+        checkpoint_pages (int): Pages written between two checkpoints.
+        progress (callable): Optional. Called with the :class:`ExportStats` after every page.
+
+    Returns:
+        ExportStats
+    """
+    format, compression = output_options(path, format, compression)
+    query = dict(
+        ddname=ddname,
+        where=where,
+        columns=columns,
+        sort=sort,
+        page_size=page_size,
+        format=format,
+        compression=compression,
+    )
+    store = JsonStateStore(checkpoint) if checkpoint is not None else None
+    state = store.load(os.path.abspath(path)) if store is not None else None
+    if state is not None and state["query"] != query:
+        raise ValueError(
+            "The checkpoint %s belongs to another export of %s" % (checkpoint, path)
+        )
+    if state is None or not os.path.exists(path):
+        state = dict(query=query, next_page=0, rows=0, offset=0, done=False)
+
+    stats = ExportStats(state["rows"], state["next_page"])
+    stats.done = state["done"]
+    if stats.done:
+        return stats
+
+    def save(offset, done=False):
+        state.update(next_page=stats.pages, rows=stats.rows, offset=offset, done=done)
+        if store is not None:
+            store.save(os.path.abspath(path), state)
+
+    names = projection_names(columns)
+    start = time.perf_counter()
+    output = _OutputFile(path, compression, state["offset"])
+    try:
+        if format == "csv" and state["offset"] == 0:
+            header = _csv_lines([names])
+            output.write(header)
+            stats.bytes += len(header)
+        fetch_page = service._page_fetcher(
+            service.url + service.path + "/%s" % ddname,
+            where=where,
+            columns=columns,
+            sort=sort,
+        )
+        for rows in iter_pages_parallel(
+            fetch_page, page_size, max_workers, first_page=state["next_page"]
+        ):
+            data = _encode_page(rows, format, names)
+            output.write(data)
+            stats.rows += len(rows)
+            stats.new_rows += len(rows)
+            stats.pages += 1
+            stats.bytes += len(data)
+            stats.seconds = time.perf_counter() - start
+            if store is not None and stats.pages % checkpoint_pages == 0:
+                save(output.commit())
+            if progress is not None:
+                progress(stats)
+        save(output.commit(), done=True)
+    finally:
+        output.close()
+    stats.done = True
+    stats.seconds = time.perf_counter() - start
+    return stats
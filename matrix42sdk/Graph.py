@@ -0,0 +1,213 @@
+"""Loading fragments along relation paths into an in-memory graph
+
+Walking relations with :meth:`get_fragment_relations_list
+<matrix42sdk.FragmentsDataService.get_fragment_relations_list>` and then :meth:`get_fragment
+<matrix42sdk.FragmentsDataService.get_fragment>` for every related fragment costs one request per
+parent and one per child. :class:`GraphLoader` resolves a relation path such as
+"AttachedUsers.Department" level by level instead. The related Ids of all parents of a level are read
+with a few batched "ID IN (...)" list queries over the parents' Data Definition, whose columns name the
+relation ("ID, AttachedUsers.ID as RelatedID"), and the attributes of all new fragments of the level
+with batched list queries over the related Data Definition. Every fragment is loaded once, however
+many parents it has.
+
+The result is a :class:`FragmentGraph`, indexed by Id, in which every step is a dictionary lookup.
+"""
+
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from matrix42sdk.api_endpoints.fragments import where_ids_in
+from matrix42sdk.Pagination import DEFAULT_MAX_WORKERS
+
+
+# alias of the related fragment's Id in the rows of a relation level
+RELATED_ID_COLUMN = "RelatedID"
+
+
+class Node(object):
+    """A fragment in a :class:`FragmentGraph`.
+
+    Attributes:
+        id (str): Id of the fragment.
+        ddname (str): Its Data Definition, None if it was not given for the level.
+        data (dict): Its attributes as loaded, only the ID if no columns were requested.
+    """
+
+    __slots__ = ("id", "ddname", "data")
+
+    def __init__(self, fragmentId, ddname, data=None):
+        self.id = fragmentId
+        self.ddname = ddname
+        self.data = data if data is not None else {"ID": fragmentId}
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def get(self, name, default=None):
+        return self.data.get(name, default)
+
+    def __repr__(self):
+        return "Node(%r, %r)" % (self.ddname, self.id)
+
+
+class FragmentGraph(object):
+    """Fragments and the relations between them, indexed by Id.
+
+    Attributes:
+        roots (list): Ids of the root fragments, in the order they were given.
+        nodes (dict): :class:`Node` keyed by fragment Id.
+    """
+
+    def __init__(self):
+        self.roots = list()
+        self.nodes = dict()
+        self._children = collections.defaultdict(list)
+        self._parents = collections.defaultdict(list)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, fragmentId):
+        return fragmentId in self.nodes
+
+    def __getitem__(self, fragmentId):
+        return self.nodes[fragmentId]
+
+    def add_node(self, fragmentId, ddname, data=None):
+        node = self.nodes.get(fragmentId)
+        if node is None:
+            node = self.nodes[fragmentId] = Node(fragmentId, ddname, data)
+        elif data is not None:
+            node.data = data
+        return node
+
+    def add_edge(self, fragmentId, relationName, relatedId):
+        self._children[(fragmentId, relationName)].append(relatedId)
+        self._parents[(relatedId, relationName)].append(fragmentId)
+
+    def related(self, fragmentId, relationName):
+        """Returns the nodes related to a fragment via `relationName`."""
+        return [self.nodes[i] for i in self._children.get((fragmentId, relationName), ())]
+
+    def referrers(self, fragmentId, relationName):
+        """Returns the nodes which relate to a fragment via `relationName`, the reverse of :meth:`related`."""
+        return [self.nodes[i] for i in self._parents.get((fragmentId, relationName), ())]
+
+    def walk(self, fragmentId, path):
+        """Returns the distinct nodes reached from a fragment along a relation path, e.g. "AttachedUsers.Department"."""
+        level = [fragmentId]
+        for relationName in path.split("."):
+            reached = dict()
+            for parentId in level:
+                for node in self.related(parentId, relationName):
+                    reached.setdefault(node.id, node)
+            level = list(reached)
+        return [self.nodes[i] for i in level]
+
+
+class GraphLoader(object):
+    """Loads fragments along a relation path with concurrent, batched requests.
+
+    Args:
+        service (FragmentsDataService): Client reading the fragments and relations.
+        max_workers (int): Maximum number of requests running at the same time.
+    """
+
+    def __init__(self, service, max_workers=DEFAULT_MAX_WORKERS):
+        self.service = service
+        self.max_workers = max_workers
+
+    def _related_ids(self, ddname, relationName, parentIds):
+        # A-SQL joins a relation named in the columns, so a list query over the parents' Data
+        # Definition answers one row per pair of parent and related fragment
+        columns = "ID, %s.ID as %s" % (relationName, RELATED_ID_COLUMN)
+        list_url = self.service.url + self.service.path + "/%s" % ddname
+        chunks = self.service._id_chunks(list_url, parentIds, columns)
+
+        def load(chunk):
+            # Ids are GUIDs, the server may spell them in another case than the caller
+            requested = dict((str(parentId).lower(), parentId) for parentId in chunk)
+            pairs = list()
+            rows = self.service.iter_fragments(
+                ddname,
+                where=where_ids_in(chunk),
+                columns=columns,
+                sort="ID ASC, %s.ID ASC" % relationName,
+            )
+            for row in rows:
+                parentId = requested.get(str(row.get("ID")).lower())
+                if parentId is not None and row.get(RELATED_ID_COLUMN) is not None:
+                    pairs.append((parentId, row[RELATED_ID_COLUMN]))
+            return pairs
+
+        related = dict((parentId, list()) for parentId in parentIds)
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="matrix42sdk-graph"
+        ) as executor:
+            for pairs in executor.map(load, chunks):
+                for parentId, relatedId in pairs:
+                    if relatedId not in related[parentId]:
+                        related[parentId].append(relatedId)
+        return [related[parentId] for parentId in parentIds]
+
+    def _load_data(self, graph, ddname, ids, columns):
+        if columns is None or not ids:
+            return
+        found = self.service.get_fragments_by_ids(
+            ddname, ids, columns=columns, max_workers=self.max_workers
+        ).found
+        for fragmentId, row in found.items():
+            graph.add_node(fragmentId, ddname, row)
+
+    def load(self, ddname, ids, path, *, targets, columns=None):
+        """Loads root fragments and everything reachable from them along `path`.
+
+        Args:
+            ddname (str): Data Definition of the root fragments (e.g. SPSActivityClassBase).
+            ids (iterable): Ids of the root fragments.
+            path (str): Relation names separated by dots, e.g. "AttachedUsers.Department".
+            targets (dict): Data Definition of the related fragments, keyed by relation name, e.g.
+                ``{"AttachedUsers": "SPSUserClassBase"}``. Required for every relation but the
+                last one, whose fragments are loaded with their Ids only if it is missing.
+            columns (dict): Optional. A-SQL Column expression keyed by Data Definition name. The
+                fragments of Data Definitions without columns are loaded with their Ids only.
+
+        Returns:
+            FragmentGraph
+        """
+        columns = columns or {}
+        relations = path.split(".")
+        for relationName in relations[:-1]:
+            if targets.get(relationName) is None:
+                raise ValueError(
+                    "The Data Definition of %r is missing in targets" % relationName
+                )
+
+        graph = FragmentGraph()
+        graph.roots = list(dict.fromkeys(ids))
+        for fragmentId in graph.roots:
+            graph.add_node(fragmentId, ddname)
+        self._load_data(graph, ddname, graph.roots, columns.get(ddname))
+
+        level, level_ddname = graph.roots, ddname
+        visited = set()
+        for relationName in relations:
+            target = targets.get(relationName)
+            parents = [i for i in level if (i, relationName) not in visited]
+            visited.update((i, relationName) for i in parents)
+            new = dict()
+            for parentId, relatedIds in zip(
+                parents, self._related_ids(level_ddname, relationName, parents)
+            ):
+                for relatedId in relatedIds:
+                    graph.add_edge(parentId, relationName, relatedId)
+                    if relatedId not in graph.nodes:
+                        new.setdefault(relatedId, None)
+                        graph.add_node(relatedId, target)
+            self._load_data(graph, target, list(new), columns.get(target))
+            # parents already visited on an earlier level keep their relations
+            reached = dict()
+            for parentId in level:
+                for node in graph.related(parentId, relationName):
+                    reached.setdefault(node.id, None)
+            level, level_ddname = list(reached), target
+        return graph
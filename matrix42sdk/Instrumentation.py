@@ -0,0 +1,300 @@
+"""Instrumentation of the requests to the ESM server
+
+Pass an :class:`Instrumentation` to a client with ``_instrumentation=...`` to observe every request
+of the data services and of the token endpoint. It offers
+
+* request and response hooks, called with a :class:`RequestEvent`,
+* a :class:`MetricsRegistry` with per-endpoint latency histograms, bytes sent and received, retries,
+  token refreshes and cache hits, exported in the Prometheus text format,
+* a span hook, e.g. the `start_span` method of an OpenTelemetry tracer.
+
+Clients without instrumentation skip all of it, so it costs nothing unless used.
+"""
+
+import re
+import threading
+import time
+
+
+# upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# endpoint templates: Ids and names in the URL path are replaced by placeholders
+_API_PATH = re.compile(r"/api/data/(fragments|objects)((?:/[^/?]+)*)", re.IGNORECASE)
+_PLACEHOLDERS = {
+    "fragments": ("{ddname}", "{id}", "{relation}", "{relationId}"),
+    "objects": ("{ciName}", "{id}"),
+}
+
+
+def endpoint_name(url):
+    """Returns the endpoint template of a URL, e.g. "fragments/{ddname}/{id}"."""
+    if "/ApiToken/" in url:
+        return "token"
+    match = _API_PATH.search(url)
+    if match is None:
+        return "other"
+    service = match.group(1).lower()
+    segments = [s for s in match.group(2).split("/") if s]
+    return "/".join((service,) + _PLACEHOLDERS[service][: len(segments)])
+
+
+def _body_size(kwargs):
+    body = kwargs.get("data")
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0
+
+
+def _response_size(response):
+    length = response.headers.get("Content-Length")
+    if length is not None:
+        return int(length)
+    if getattr(response, "_content_consumed", True) is False:
+        # the body of a streamed response is read later by the caller
+        return 0
+    return len(response.content)
+
+
+class RequestEvent(object):
+    """One HTTP request, handed to the request hooks when sent and to the response hooks when done.
+
+    Attributes:
+        method (str), url (str), endpoint (str): What was requested, see :func:`endpoint_name`.
+        bytes_sent (int): Size of the request body.
+        status (int): Status of the response, None if it failed.
+        seconds (float): Time until the response arrived.
+        bytes_received (int): Size of the response body.
+        error (Exception): Error of a failed request.
+        span: The span started for the request, if a span hook is set.
+    """
+
+    __slots__ = (
+        "method",
+        "url",
+        "endpoint",
+        "bytes_sent",
+        "status",
+        "seconds",
+        "bytes_received",
+        "error",
+        "span",
+        "_start",
+    )
+
+    def __init__(self, method, url, bytes_sent):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint_name(url)
+        self.bytes_sent = bytes_sent
+        self.status = None
+        self.seconds = None
+        self.bytes_received = 0
+        self.error = None
+        self.span = None
+        self._start = time.perf_counter()
+
+
+class _Histogram(object):
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+def _labels(**labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{%s}" % ",".join('%s="%s"' % kv for kv in escaped)
+
+
+class MetricsRegistry(object):
+    """Counters and latency histograms of the observed requests.
+
+    Args:
+        buckets (tuple): Upper bounds of the latency histogram buckets, in seconds.
+    """
+
+    _HELP = {
+        "matrix42sdk_requests_total": ("counter", "Requests sent to the ESM server."),
+        "matrix42sdk_sent_bytes_total": ("counter", "Bytes of request bodies."),
+        "matrix42sdk_received_bytes_total": ("counter", "Bytes of response bodies."),
+        "matrix42sdk_retries_total": (
+            "counter",
+            "Requests sent again by the retry policy.",
+        ),
+        "matrix42sdk_token_refreshes_total": ("counter", "Access tokens requested."),
+        "matrix42sdk_cache_requests_total": ("counter", "Lookups of the response cache."),
+    }
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = dict()
+        self._histograms = dict()
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            series = self._counters.setdefault(name, dict())
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, event):
+        """Records a finished :class:`RequestEvent`."""
+        endpoint = _labels(endpoint=event.endpoint, method=event.method)
+        status = "error" if event.status is None else str(event.status)
+        with self._lock:
+            histogram = self._histograms.get(endpoint)
+            if histogram is None:
+                histogram = self._histograms[endpoint] = _Histogram(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if event.seconds <= bound:
+                    histogram.counts[i] += 1
+                    break
+            histogram.sum += event.seconds
+            histogram.count += 1
+        self.inc(
+            "matrix42sdk_requests_total",
+            _labels(endpoint=event.endpoint, method=event.method, status=status),
+        )
+        self.inc("matrix42sdk_sent_bytes_total", endpoint, event.bytes_sent)
+        self.inc("matrix42sdk_received_bytes_total", endpoint, event.bytes_received)
+
+    def value(self, name, **labels):
+        """Returns the current value of a counter series, 0 if it was never incremented."""
+        with self._lock:
+            return self._counters.get(name, {}).get(_labels(**labels), 0)
+
+    def latency(self, endpoint, method):
+        """Returns (count, sum of seconds) of the latency histogram of an endpoint."""
+        with self._lock:
+            histogram = self._histograms.get(_labels(endpoint=endpoint, method=method))
+            return (0, 0.0) if histogram is None else (histogram.count, histogram.sum)
+
+    def to_prometheus(self):
+        """Returns all metrics in the Prometheus text exposition format."""
+        lines = list()
+        with self._lock:
+            name = "matrix42sdk_request_duration_seconds"
+            lines.append("# HELP %s Latency of the requests to the ESM server." % name)
+            lines.append("# TYPE %s histogram" % name)
+            for labels, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        "%s_bucket%s %d"
+                        % (
+                            name,
+                            _format_labels(labels, [("le", repr(bound))]),
+                            cumulative,
+                        )
+                    )
+                lines.append(
+                    "%s_bucket%s %d"
+                    % (name, _format_labels(labels, [("le", "+Inf")]), histogram.count)
+                )
+                lines.append(
+                    "%s_sum%s %r" % (name, _format_labels(labels), histogram.sum)
+                )
+                lines.append(
+                    "%s_count%s %d" % (name, _format_labels(labels), histogram.count)
+                )
+            for name, (kind, text) in self._HELP.items():
+                series = self._counters.get(name)
+                if not series:
+                    continue
+                lines.append("# HELP %s %s" % (name, text))
+                lines.append("# TYPE %s %s" % (name, kind))
+                for labels, value in sorted(series.items()):
+                    lines.append("%s%s %s" % (name, _format_labels(labels), value))
+        return "\n".join(lines) + "\n"
+
+
+class Instrumentation(object):
+    """Hooks, metrics and spans for the requests of one or more clients.
+
+    Args:
+        metrics (MetricsRegistry): Optional. Registry the requests are recorded in.
+        start_span (callable): Optional. Called as ``start_span(name, attributes=dict)`` for every
+            request, e.g. ``tracer.start_span`` of OpenTelemetry. The returned span gets the
+            attributes of the response via `set_attribute` and is ended with `end()`.
+    """
+
+    def __init__(self, metrics=None, start_span=None):
+        self.metrics = metrics
+        self.start_span = start_span
+        self.request_hooks = list()
+        self.response_hooks = list()
+
+    def add_request_hook(self, hook):
+        """Calls `hook(event)` before every request is sent."""
+        self.request_hooks.append(hook)
+
+    def add_response_hook(self, hook):
+        """Calls `hook(event)` after every request, also failed ones."""
+        self.response_hooks.append(hook)
+
+    def request_started(self, method, url, kwargs):
+        event = RequestEvent(method, url, _body_size(kwargs))
+        if self.start_span is not None:
+            event.span = self.start_span(
+                "matrix42sdk %s %s" % (method, event.endpoint),
+                attributes={"http.method": method, "http.url": url},
+            )
+        for hook in self.request_hooks:
+            hook(event)
+        return event
+
+    def request_finished(self, event, response=None, error=None, received=None):
+        # `received` is the size of the body read by the asyncio client, aiohttp's responses
+        # keep no readable copy of it
+        event.seconds = time.perf_counter() - event._start
+        event.error = error
+        if response is not None:
+            status = getattr(response, "status_code", None)
+            event.status = status if status is not None else response.status
+            event.bytes_received = (
+                received if received is not None else _response_size(response)
+            )
+        if event.span is not None:
+            if event.status is not None:
+                event.span.set_attribute("http.status_code", event.status)
+            event.span.end()
+        if self.metrics is not None:
+            self.metrics.observe(event)
+        for hook in self.response_hooks:
+            hook(event)
+
+    def retried(self, method, url):
+        if self.metrics is not None:
+            self.metrics.inc(
+                "matrix42sdk_retries_total",
+                _labels(endpoint=endpoint_name(url), method=method),
+            )
+
+    def token_refreshed(self, ok):
+        if self.metrics is not None:
+            outcome = "ok" if ok else "error"
+            self.metrics.inc(
+                "matrix42sdk_token_refreshes_total", _labels(outcome=outcome)
+            )
+
+    def cache_lookup(self, kind, hit):
+        if self.metrics is not None:
+            result = "hit" if hit else "miss"
+            self.metrics.inc(
+                "matrix42sdk_cache_requests_total", _labels(kind=kind, result=result)
+            )
@@ -0,0 +1,256 @@
+"""Lazy objects loading their multi-fragments and relations on demand
+
+:meth:`get_lazy_object <matrix42sdk.ObjectsDataService.get_lazy_object>` loads an Object with
+``full=false``, i.e. its single fragments only. A :class:`LazyObject` fetches every other fragment
+and every relation the first time it is accessed, so that narrow reads never download the
+multi-fragments they do not use.
+
+Prefetch hints name the multi-fragments and relations which will be needed. The first access to a
+hinted one loads it for all objects of the same :meth:`get_lazy_objects
+<matrix42sdk.ObjectsDataService.get_lazy_objects>` call at once: multi-fragments with
+"[Expression-ObjectID] IN (...)" list queries, relations with concurrent relation list queries.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from matrix42sdk.api_endpoints.fragments import (
+    _sent_length,
+    chunk_ids,
+    list_params,
+    where_ids_in,
+)
+from matrix42sdk.Pagination import DEFAULT_MAX_WORKERS, DEFAULT_PAGE_SIZE, iter_pages
+
+
+# attribute of a multi-fragment holding the Id of the object it belongs to
+OBJECT_ID_COLUMN = "[Expression-ObjectID]"
+_OBJECT_ID_KEYS = ("[Expression-ObjectID]", "Expression-ObjectID")
+
+_MISSING = object()
+
+
+def load_object_fragments(
+    fragments, ddname, objectIds, columns, max_workers=DEFAULT_MAX_WORKERS
+):
+    """Loads the multi-fragments of a Data Definition belonging to the given objects.
+
+    Args:
+        fragments (FragmentsDataService): Service the list queries are sent with.
+        ddname (str): Technical name of the Data Definition of the multi-fragments.
+        objectIds (list): Ids of the objects.
+        columns (str): A-SQL Column expression of the attributes to load.
+        max_workers (int): Maximum number of list queries running at the same time.
+
+    Returns:
+        dict: The rows of every object, keyed by the object Id as given in `objectIds`.
+    """
+    if OBJECT_ID_COLUMN.lower() not in columns.lower():
+        columns = "%s, %s" % (columns, OBJECT_ID_COLUMN)
+    req_url = fragments.url + fragments.path + "/%s" % ddname
+    fixed = list_params(
+        where=where_ids_in([], OBJECT_ID_COLUMN),
+        columns=columns,
+        pageSize=DEFAULT_PAGE_SIZE,
+        pageNumber=0,
+        sort="ID ASC",
+    )
+    # leaves room for page numbers with more digits
+    chunks = chunk_ids(objectIds, len(req_url) + 1 + _sent_length(fixed) + 8)
+
+    def load(chunk):
+        fetch_page = fragments._page_fetcher(
+            req_url,
+            where=where_ids_in(chunk, OBJECT_ID_COLUMN),
+            columns=columns,
+            sort="ID ASC",
+        )
+        return [row for page in iter_pages(fetch_page) for row in page]
+
+    # Ids are GUIDs, the server may spell them in another case than the caller
+    requested = dict((str(objectId).lower(), objectId) for objectId in objectIds)
+    result = dict((objectId, list()) for objectId in objectIds)
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="matrix42sdk-lazy"
+    ) as executor:
+        for rows in executor.map(load, chunks):
+            for row in rows:
+                owner = next((row[k] for k in _OBJECT_ID_KEYS if k in row), None)
+                objectId = requested.get(str(owner).lower())
+                if objectId is not None:
+                    result[objectId].append(row)
+    return result
+
+
+class LazyBatch(object):
+    """Objects loaded together, which share their prefetch hints.
+
+    Args:
+        objects (ObjectsDataService): Service the objects are loaded with.
+        ciName (str): Technical name of the Configuration Item.
+        fragments (dict): Hinted multi-fragments, A-SQL Column expression keyed by Data
+            Definition. None instead of columns loads the whole objects for them.
+        relations (dict): Hinted relations, A-SQL Column expression (or None for the Ids only)
+            keyed by (Data Definition, relation name).
+        max_workers (int): Maximum number of requests running at the same time.
+    """
+
+    def __init__(self, objects, ciName, fragments=None, relations=None, max_workers=None):
+        self.service = objects
+        self.ci_name = ciName
+        self.fragments = dict(fragments or {})
+        self.relations = dict(relations or {})
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+        self.objects = dict()
+        self._lock = threading.Lock()
+        self._loaded = set()
+
+    def _map(self, func, items):
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="matrix42sdk-lazy"
+        ) as executor:
+            return list(executor.map(func, items))
+
+    def load(self, objectIds):
+        """Loads the single fragments of the objects and returns them as :class:`LazyObject`."""
+        cores = self._map(
+            lambda objectId: self.service._read_object(self.ci_name, objectId, "false"),
+            objectIds,
+        )
+        result = list()
+        for objectId, core in zip(objectIds, cores):
+            lazy = self.objects[objectId] = LazyObject(self, objectId, core)
+            result.append(lazy)
+        return result
+
+    def _prefetch(self, hint, load):
+        # loads a hinted item for all objects of the batch, once
+        with self._lock:
+            if hint not in self._loaded:
+                load()
+                self._loaded.add(hint)
+
+    def fragment(self, lazy, ddname):
+        if ddname not in self.fragments:
+            lazy._load_full()
+            return
+        columns = self.fragments[ddname]
+        if columns is None:
+            self._prefetch(
+                ("fragment", ddname),
+                lambda: self._map(LazyObject._load_full, self.objects.values()),
+            )
+            return
+
+        def load():
+            rows = load_object_fragments(
+                self.service._fragments_service(),
+                ddname,
+                list(self.objects),
+                columns,
+                self.max_workers,
+            )
+            for objectId, other in self.objects.items():
+                other._fragments.setdefault(ddname, rows[objectId])
+
+        self._prefetch(("fragment", ddname), load)
+
+    def related(self, lazy, ddname, relationName, columns):
+        key = (ddname, relationName)
+        fragments = self.service._fragments_service()
+
+        def load_one(item):
+            other, fragmentId = item
+            rows = list(
+                fragments.iter_fragment_relations(
+                    ddname, fragmentId, relationName, columns=columns
+                )
+            )
+            other._relations.setdefault(key, rows)
+
+        if key not in self.relations:
+            load_one((lazy, lazy._fragment_id(ddname)))
+            return
+        # the Ids are read before taking the lock, reading them may load hinted fragments
+        others = list(self.objects.values())
+        items = list(zip(others, self._map(lambda o: o._fragment_id(ddname), others)))
+        self._prefetch(("relation",) + key, lambda: self._map(load_one, items))
+
+
+class LazyObject(object):
+    """Object whose multi-fragments and relations are loaded when first accessed.
+
+    Index it by Data Definition name like the dict returned by :meth:`get_object
+    <matrix42sdk.ObjectsDataService.get_object>`: single fragments are dicts, multi-fragments
+    lists of rows. Names which are not part of the object raise KeyError, after the whole object
+    has been loaded once to make sure.
+
+    Attributes:
+        id (str): Id of the object.
+        ci_name (str): Technical name of its Configuration Item.
+    """
+
+    def __init__(self, batch, objectId, core):
+        self.id = objectId
+        self.ci_name = batch.ci_name
+        self._batch = batch
+        self._fragments = dict(core)
+        self._relations = dict()
+        self._full = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "LazyObject(%r, %r, loaded=%r)" % (self.ci_name, self.id, self.loaded)
+
+    @property
+    def loaded(self):
+        """Names of the Data Definitions loaded so far."""
+        return [name for name in self._fragments if name != "ID"]
+
+    def _load_full(self):
+        with self._lock:
+            if self._full:
+                return
+            full = self._batch.service._read_object(self.ci_name, self.id, "true")
+            for name, value in full.items():
+                # rows loaded by a hint before stay, so that all objects look alike
+                self._fragments.setdefault(name, value)
+            self._full = True
+
+    def __getitem__(self, ddname):
+        value = self._fragments.get(ddname, _MISSING)
+        if value is _MISSING and not self._full:
+            self._batch.fragment(self, ddname)
+            value = self._fragments.get(ddname, _MISSING)
+        if value is _MISSING:
+            raise KeyError(ddname)
+        return value
+
+    def get(self, ddname, default=None):
+        try:
+            return self[ddname]
+        except KeyError:
+            return default
+
+    def _fragment_id(self, ddname):
+        # relations belong to the fragment, whose Id differs from the object's
+        return self[ddname]["ID"]
+
+    def related(self, ddname, relationName, columns=None):
+        """Returns the fragments related to the object's fragment of `ddname` via `relationName`.
+
+        Args:
+            ddname (str): Data Definition of the fragment the relation belongs to.
+            relationName (str): Technical name of the relation (e.g. AttachedUsers).
+            columns (str): Optional. A-SQL Column expression of the related fragments, used unless
+                the relation was hinted with other columns. Without columns, only Ids are returned.
+        """
+        key = (ddname, relationName)
+        if key not in self._relations:
+            columns = self._batch.relations.get(key, columns)
+            self._batch.related(self, ddname, relationName, columns)
+        return self._relations[key]
+
+    def to_dict(self):
+        """Returns the whole object, loading everything not loaded yet."""
+        self._load_full()
+        return dict(self._fragments)
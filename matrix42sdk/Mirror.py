@@ -0,0 +1,371 @@
+"""Local SQLite mirror of Data Definitions
+
+A :class:`SqliteMirror` copies the fragments of selected Data Definitions, and the relations between
+them, into an indexed SQLite file. Reports which run the same filters all day long can then be answered
+locally instead of by the ESM server.
+
+Every Data Definition becomes a table named like it, with one column per attribute of the loaded rows
+and the fragment Id as primary key. Relations are kept in one table `__relations` with the columns
+`ddname`, `fragment_id`, `relation` and `related_id`.
+"""
+
+import itertools
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from matrix42sdk import Codec
+from matrix42sdk.api_endpoints.fragments import _with_id_column
+from matrix42sdk.Pagination import DEFAULT_MAX_WORKERS, DEFAULT_PAGE_SIZE
+
+
+RELATIONS_TABLE = "__relations"
+
+# a Data Definition is loaded into a table named like it with this prefix, which replaces the
+# mirrored fragments once the last page is written
+LOADING_PREFIX = "__loading_"
+
+
+def _quote(identifier):
+    return '"%s"' % str(identifier).replace('"', '""')
+
+
+def _value(value):
+    # nested objects and lists of the Generic Data Service are stored as JSON text
+    if isinstance(value, (dict, list)):
+        return Codec.dumps(value).decode("utf-8")
+    return value
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class _MirrorSink(object):
+    # DeltaSync sink writing into one table of the mirror
+    def __init__(self, mirror, ddname):
+        self.mirror = mirror
+        self.ddname = ddname
+
+    def upsert(self, rows):
+        self.mirror.upsert(self.ddname, rows)
+
+    def delete(self, ids):
+        self.mirror.delete(self.ddname, ids)
+
+
+class SqliteMirror(object):
+    """Indexed SQLite copy of Data Definitions and their relations.
+
+    Args:
+        path (str): Path of the SQLite file, ":memory:" for a mirror in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            # the mirror shares one connection between its threads, WAL keeps other processes
+            # reading the file from being blocked while a loader writes
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS %s (ddname TEXT NOT NULL, fragment_id TEXT NOT NULL, "
+            "relation TEXT NOT NULL, related_id TEXT NOT NULL, "
+            "PRIMARY KEY (ddname, fragment_id, relation, related_id))"
+            % _quote(RELATIONS_TABLE)
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS __relations_related ON %s (relation, related_id)"
+            % _quote(RELATIONS_TABLE)
+        )
+        self._conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def _columns(self, table):
+        return [
+            row[1] for row in self._conn.execute("PRAGMA table_info(%s)" % _quote(table))
+        ]
+
+    def _ensure_table(self, ddname, names):
+        existing = self._columns(ddname)
+        if not existing:
+            self._conn.execute("CREATE TABLE %s (ID TEXT PRIMARY KEY)" % _quote(ddname))
+            existing = ["ID"]
+        for name in names:
+            if name not in existing:
+                self._conn.execute(
+                    "ALTER TABLE %s ADD COLUMN %s" % (_quote(ddname), _quote(name))
+                )
+                existing.append(name)
+
+    def _insert(self, ddname, rows):
+        # rows carrying the same attributes are written together, so that an update only sets the
+        # columns a row carries and keeps the others
+        groups = dict()
+        for row in rows:
+            groups.setdefault(tuple(row), list()).append(row)
+        self._ensure_table(
+            ddname, list(dict.fromkeys(name for names in groups for name in names))
+        )
+        for names, group in groups.items():
+            updates = ", ".join(
+                "%s = excluded.%s" % (_quote(name), _quote(name))
+                for name in names
+                if name != "ID"
+            )
+            statement = "INSERT INTO %s (%s) VALUES (%s) ON CONFLICT(ID) DO %s" % (
+                _quote(ddname),
+                ", ".join(_quote(name) for name in names),
+                ", ".join("?" for _ in names),
+                "UPDATE SET " + updates if updates else "NOTHING",
+            )
+            self._conn.executemany(
+                statement, ([_value(row[name]) for name in names] for row in group)
+            )
+
+    def tables(self):
+        """Returns the names of the mirrored Data Definitions."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            ).fetchall()
+        return [
+            row[0]
+            for row in rows
+            if row[0] != RELATIONS_TABLE and not row[0].startswith(LOADING_PREFIX)
+        ]
+
+    def create_index(self, ddname, *columns):
+        """Creates an index over the given columns of a mirrored Data Definition, if missing."""
+        name = "ix_%s_%s" % (ddname, "_".join(columns))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS %s ON %s (%s)"
+                % (_quote(name), _quote(ddname), ", ".join(_quote(c) for c in columns))
+            )
+
+    def load_fragments(
+        self,
+        service,
+        ddname,
+        *,
+        where=None,
+        columns=None,
+        page_size=DEFAULT_PAGE_SIZE,
+        indexes=(),
+    ):
+        """Replaces the mirrored fragments of a Data Definition with the current ones.
+
+        The fragments are streamed page by page with :meth:`iter_fragments
+        <matrix42sdk.FragmentsDataService.iter_fragments>` and inserted in bulk into a loading
+        table, so memory stays bounded by two pages and other threads can use the mirror between
+        two pages. The mirrored fragments are replaced in a single transaction once the last page is
+        written: readers see either the old or the new fragments, and a failed load keeps the old
+        ones.
+
+        Args:
+            service (FragmentsDataService): Client reading the fragments.
+            ddname (str): The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            where (str): Optional. A-SQL Where Expression selecting the mirrored fragments.
+            columns (str): Optional. A-SQL Column expression, e.g. "Name, Parent.Name as ParentName".
+                The ID column is added if missing.
+            page_size (int): Number of fragments requested and inserted at once.
+            indexes (list): Columns, or tuples of columns, to create indexes on after the load.
+
+        Returns:
+            int: Number of mirrored fragments.
+        """
+        rows = service.iter_fragments(
+            ddname,
+            where=where,
+            columns=_with_id_column(columns),
+            sort="ID ASC",
+            page_size=page_size,
+        )
+        loading = LOADING_PREFIX + ddname
+        with self._lock, self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS %s" % _quote(loading))
+        count = 0
+        try:
+            # the pages are loaded without holding the lock, which is only taken to write one
+            for batch in _batches(rows, page_size):
+                with self._lock, self._conn:
+                    self._insert(loading, batch)
+                count += len(batch)
+            with self._lock, self._conn:
+                names = self._columns(loading)
+                self._ensure_table(ddname, names)
+                self._conn.execute("DELETE FROM %s" % _quote(ddname))
+                if names:
+                    self._conn.execute(
+                        "INSERT INTO %s (%s) SELECT %s FROM %s"
+                        % (
+                            _quote(ddname),
+                            ", ".join(_quote(name) for name in names),
+                            ", ".join(_quote(name) for name in names),
+                            _quote(loading),
+                        )
+                    )
+        finally:
+            with self._lock, self._conn:
+                self._conn.execute("DROP TABLE IF EXISTS %s" % _quote(loading))
+        for index in indexes:
+            self.create_index(ddname, *([index] if isinstance(index, str) else index))
+        return count
+
+    def load_relations(
+        self,
+        service,
+        ddname,
+        relationName,
+        *,
+        fragment_ids=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """Replaces the mirrored relations `relationName` of fragments of a Data Definition.
+
+        The related Ids of every fragment are read concurrently with :meth:`iter_fragment_relations
+        <matrix42sdk.FragmentsDataService.iter_fragment_relations>`.
+
+        Args:
+            service (FragmentsDataService): Client reading the relations.
+            ddname (str): The technical name of the Data Definition (e.g. SPSAssetClassBase)
+            relationName (str): Name of the relation (e.g. AttachedUsers)
+            fragment_ids (list): Optional. Fragments whose relations are loaded, defaults to all
+                mirrored fragments of `ddname`.
+            max_workers (int): Maximum number of fragments whose relations are read at once.
+
+        Returns:
+            int: Number of mirrored relations.
+        """
+        if fragment_ids is None:
+            with self._lock:
+                fragment_ids = [
+                    row["ID"]
+                    for row in self._conn.execute("SELECT ID FROM %s" % _quote(ddname))
+                ]
+
+        def related(fragmentId):
+            rows = service.iter_fragment_relations(
+                ddname, fragmentId, relationName, columns="ID"
+            )
+            return fragmentId, [row["ID"] for row in rows]
+
+        count = 0
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="matrix42sdk-mirror"
+        ) as executor:
+            # the relations of every fragment are written in a transaction of their own, the lock
+            # is not held while the next ones are loaded
+            for fragmentId, related_ids in executor.map(related, fragment_ids):
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "DELETE FROM %s WHERE ddname = ? AND fragment_id = ? AND relation = ?"
+                        % _quote(RELATIONS_TABLE),
+                        (ddname, fragmentId, relationName),
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO %s VALUES (?, ?, ?, ?)"
+                        % _quote(RELATIONS_TABLE),
+                        ((ddname, fragmentId, relationName, i) for i in related_ids),
+                    )
+                count += len(related_ids)
+        return count
+
+    def upsert(self, ddname, rows):
+        """Inserts or updates fragments of a Data Definition, keyed by their ID.
+
+        Only the columns a row carries are updated, the other mirrored columns keep their values.
+        """
+        with self._lock, self._conn:
+            if rows:
+                self._insert(ddname, rows)
+
+    def delete(self, ddname, ids):
+        """Removes fragments, and their relations, from the mirror."""
+        ids = [(i,) for i in ids]
+        with self._lock, self._conn:
+            if self._columns(ddname):
+                self._conn.executemany(
+                    "DELETE FROM %s WHERE ID = ?" % _quote(ddname), ids
+                )
+            self._conn.executemany(
+                "DELETE FROM %s WHERE fragment_id = ? OR related_id = ?"
+                % _quote(RELATIONS_TABLE),
+                ((i, i) for (i,) in ids),
+            )
+
+    def sink(self, ddname):
+        """Returns a :class:`DeltaSync <matrix42sdk.Sync.DeltaSync>` sink keeping `ddname` up to date."""
+        return _MirrorSink(self, ddname)
+
+    def execute(self, sql, params=()):
+        """Runs any SQLite statement against the mirror, e.g. a join of several Data Definitions.
+
+        Returns:
+            list: One dict per result row.
+        """
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def query(self, ddname, *, where=None, params=(), columns="*", sort=None, limit=None):
+        """Reads mirrored fragments of a Data Definition.
+
+        Args:
+            ddname (str): The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            where (str): Optional. SQLite where expression, e.g. "Name LIKE ?".
+            params (tuple): Values of the ? placeholders of `where`.
+            columns (str): SQLite column expression, defaults to all columns.
+            sort (str): Optional. SQLite order expression, e.g. "Name ASC".
+            limit (int): Optional. Maximum number of returned rows.
+
+        Returns:
+            list: One dict per fragment.
+        """
+        sql = "SELECT %s FROM %s" % (columns, _quote(ddname))
+        if where:
+            sql += " WHERE %s" % where
+        if sort:
+            sql += " ORDER BY %s" % sort
+        if limit is not None:
+            sql += " LIMIT %d" % limit
+        return self.execute(sql, params)
+
+    def related(
+        self, ddname, fragmentId, relationName, target, *, columns="t.*", sort=None
+    ):
+        """Joins a fragment's mirrored relations with the mirrored fragments they point to.
+
+        Args:
+            ddname (str): Data Definition of the fragment (e.g. SPSAssetClassBase)
+            fragmentId (str): Id of the fragment.
+            relationName (str): Name of the relation (e.g. AttachedUsers)
+            target (str): Mirrored Data Definition of the related fragments (e.g. SPSUserClassBase)
+            columns (str): SQLite column expression over the target table `t`, defaults to all columns.
+            sort (str): Optional. SQLite order expression.
+
+        Returns:
+            list: One dict per related fragment found in the mirror.
+        """
+        sql = (
+            "SELECT %s FROM %s AS t JOIN %s AS r ON r.related_id = t.ID "
+            "WHERE r.ddname = ? AND r.fragment_id = ? AND r.relation = ?"
+        ) % (columns, _quote(target), _quote(RELATIONS_TABLE))
+        if sort:
+            sql += " ORDER BY %s" % sort
+        return self.execute(sql, (ddname, fragmentId, relationName))
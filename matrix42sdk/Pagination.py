@@ -0,0 +1,170 @@
+"""Paging through the list operations of the Generic Data Service
+
+The list operations return one page per request, addressed by `pageSize` and `pageNumber`.
+The helpers here walk all pages of a query while only a bounded number of pages is held in memory.
+"""
+
+import collections
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from matrix42sdk import Codec
+
+
+# number of the first page, as counted by the Generic Data Service
+FIRST_PAGE_NUMBER = 0
+
+# rows requested per page when the caller does not choose a page size
+DEFAULT_PAGE_SIZE = 500
+
+# pages requested at the same time by the parallel page fetcher
+DEFAULT_MAX_WORKERS = 4
+
+# bounds and targets of the automatic page size tuning
+MIN_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 10000
+TARGET_PAGE_SECONDS = 1.0
+TARGET_PAGE_BYTES = 4 * 1024 * 1024
+
+
+def iter_pages(fetch_page, page_size=DEFAULT_PAGE_SIZE, first_page=FIRST_PAGE_NUMBER):
+    """Yields the pages of a list query one after another, prefetching the next page.
+
+    While the caller processes page N, page N+1 is already requested in a background thread,
+    so at most two pages are held in memory at any time. The iteration stops after the first
+    page which holds fewer than `page_size` rows.
+
+    Args:
+        fetch_page (callable): `fetch_page(pageSize, pageNumber)` returns the rows of one page
+            and raises on errors.
+        page_size (int): Number of rows requested per page.
+        first_page (int): Page number the iteration starts with.
+
+    Yields:
+        list: Rows of every non-empty page, in page order.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="matrix42sdk-prefetch"
+    )
+    future = executor.submit(fetch_page, page_size, first_page)
+    page_number = first_page
+    try:
+        while future is not None:
+            rows = future.result()
+            future = None
+            if rows and len(rows) >= page_size:
+                page_number += 1
+                future = executor.submit(fetch_page, page_size, page_number)
+            if rows:
+                yield rows
+    finally:
+        # the caller may stop early, the prefetched page is then thrown away
+        if future is not None:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def tune_page_size(probe_size, seconds, nbytes):
+    """Derives the page size for the remaining pages from the measurements of a probe page.
+
+    The page size is scaled so that one page takes about :data:`TARGET_PAGE_SECONDS` to load and
+    stays below :data:`TARGET_PAGE_BYTES`, within :data:`MIN_PAGE_SIZE` and :data:`MAX_PAGE_SIZE`.
+    It is always the probe size multiplied or divided by a power of two, so that the page numbers
+    of both sizes line up (see :func:`page_plan`).
+
+    Args:
+        probe_size (int): Page size of the probe page, which came back full.
+        seconds (float): Time it took to load the probe page.
+        nbytes (int): Size of the probe page's payload.
+    """
+    scale = min(
+        TARGET_PAGE_SECONDS / max(seconds, 1e-6),
+        TARGET_PAGE_BYTES / max(nbytes, 1),
+    )
+    target = probe_size * scale
+    size = probe_size
+    while size * 2 <= min(target, MAX_PAGE_SIZE):
+        size *= 2
+    while size > target and size // 2 >= MIN_PAGE_SIZE and probe_size % (size // 2) == 0:
+        size //= 2
+    return size
+
+
+def page_plan(probe_size, page_size, first_page=FIRST_PAGE_NUMBER):
+    """Yields the (pageSize, pageNumber) requests covering all rows after a probe page.
+
+    The probe page is page `first_page` of `probe_size` rows. When `page_size` is larger, the gap up to
+    the next multiple of `page_size` is filled with further pages of `probe_size` rows first.
+    """
+    offset = (first_page + 1) * probe_size
+    while offset % page_size:
+        yield probe_size, offset // probe_size
+        offset += probe_size
+    for page_number in itertools.count(offset // page_size):
+        yield page_size, page_number
+
+
+def iter_pages_parallel(
+    fetch_page,
+    page_size=None,
+    max_workers=DEFAULT_MAX_WORKERS,
+    first_page=FIRST_PAGE_NUMBER,
+):
+    """Yields the pages of a list query in page order while fetching several pages concurrently.
+
+    Pages are independent of each other given `pageSize` and `pageNumber`, so up to `max_workers`
+    of them are requested at the same time. The iteration stops after the first short or empty
+    page; requests already sent for later pages are discarded. At most twice `max_workers` pages
+    are held in memory.
+
+    Without a `page_size`, a probe page of :data:`DEFAULT_PAGE_SIZE` rows is loaded first and the
+    size of all further pages is tuned from its latency and payload size with :func:`tune_page_size`.
+
+    Args:
+        fetch_page (callable): `fetch_page(pageSize, pageNumber)` returns the rows of one page
+            and raises on errors. It is called from worker threads.
+        page_size (int): Number of rows requested per page. Tuned automatically if None.
+        max_workers (int): Maximum number of pages requested at the same time.
+        first_page (int): Page number the iteration starts with.
+
+    Yields:
+        list: Rows of every non-empty page, in page order.
+    """
+    if page_size is None:
+        start = time.perf_counter()
+        rows = fetch_page(DEFAULT_PAGE_SIZE, first_page)
+        seconds = time.perf_counter() - start
+        if rows:
+            yield rows
+        if not rows or len(rows) < DEFAULT_PAGE_SIZE:
+            return
+        nbytes = len(Codec.dumps(rows))
+        page_size = tune_page_size(DEFAULT_PAGE_SIZE, seconds, nbytes)
+        jobs = page_plan(DEFAULT_PAGE_SIZE, page_size, first_page)
+    else:
+        jobs = ((page_size, number) for number in itertools.count(first_page))
+
+    executor = ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="matrix42sdk-pages"
+    )
+    pending = collections.deque()
+
+    def submit():
+        size, number = next(jobs)
+        pending.append((size, executor.submit(fetch_page, size, number)))
+
+    try:
+        for _ in range(2 * max_workers):
+            submit()
+        while pending:
+            size, future = pending.popleft()
+            rows = future.result()
+            if rows:
+                yield rows
+            if not rows or len(rows) < size:
+                break
+            submit()
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
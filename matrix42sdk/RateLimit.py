@@ -0,0 +1,138 @@
+"""Client-side rate limiting with token buckets
+
+A :class:`RateLimiter` keeps the requests of a client within a fixed budget, e.g. the one the ESM
+administrators granted an integration. It holds one token bucket for reads and one for writes, and
+optionally one for all requests together. Pass it to a client with ``_rate_limiter=...``.
+
+:class:`TokenBucket` coordinates the threads of one process. :class:`FileTokenBucket` keeps its state
+in a small file guarded by a file lock, so that several worker processes sharing an API Token also
+share the budget.
+"""
+
+import os
+import struct
+import threading
+import time
+
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+    import msvcrt
+
+
+# methods which only read data
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# state of a FileTokenBucket: available tokens and time of the last update
+_STATE = struct.Struct("<dd")
+
+
+class TokenBucket(object):
+    """Token bucket for the threads of one process.
+
+    Args:
+        rate (float): Requests allowed per second on average.
+        capacity (float): Largest burst, defaults to one second worth of requests.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, available, updated, now):
+        # refills the bucket for the elapsed time and takes the tokens, possibly on credit
+        elapsed = max(0.0, now - updated)
+        available = min(self.capacity, available + elapsed * self.rate) - tokens
+        wait = 0.0 if available >= 0 else -available / self.rate
+        return available, wait
+
+    def reserve(self, tokens=1):
+        """Takes `tokens` from the bucket and returns the seconds to wait before using them.
+
+        Tokens taken while the bucket is empty are owed, so callers are served in order.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens, wait = self._take(tokens, self._tokens, self._updated, now)
+            self._updated = now
+            return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket whose state is shared by all processes using the same file.
+
+    Args:
+        path (str): Path of the state file, created if missing. Use one file per budget.
+        rate (float): Requests allowed per second on average, summed over all processes.
+        capacity (float): Largest burst, defaults to one second worth of requests.
+    """
+
+    def __init__(self, path, rate, capacity=None):
+        super().__init__(rate, capacity)
+        self.path = path
+
+    def _lock_file(self, fd):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:  # pragma: no cover
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_LOCK, _STATE.size)
+
+    def _unlock_file(self, fd):
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        else:  # pragma: no cover
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, _STATE.size)
+
+    def reserve(self, tokens=1):
+        # the wall clock is shared by all processes, unlike the monotonic clock on some systems
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                self._lock_file(fd)
+                try:
+                    now = time.time()
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    data = os.read(fd, _STATE.size)
+                    if len(data) == _STATE.size:
+                        available, updated = _STATE.unpack(data)
+                    else:
+                        available, updated = self.capacity, now
+                    available, wait = self._take(tokens, available, updated, now)
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    os.write(fd, _STATE.pack(available, now))
+                    return wait
+                finally:
+                    self._unlock_file(fd)
+            finally:
+                os.close(fd)
+
+
+class RateLimiter(object):
+    """Budgets for the reads and writes of one or more clients.
+
+    Args:
+        read (TokenBucket): Optional. Budget of GET, HEAD and OPTIONS requests.
+        write (TokenBucket): Optional. Budget of all other requests.
+        total (TokenBucket): Optional. Budget of all requests together.
+    """
+
+    def __init__(self, read=None, write=None, total=None):
+        self.read = read
+        self.write = write
+        self.total = total
+
+    def reserve(self, method):
+        """Takes a token for a request with `method`, returns the seconds to wait before sending it."""
+        bucket = self.read if method.upper() in READ_METHODS else self.write
+        wait = 0.0
+        for limit in (bucket, self.total):
+            if limit is not None:
+                wait = max(wait, limit.reserve())
+        return wait
@@ -0,0 +1,356 @@
+"""Retries, adaptive concurrency and circuit breaking for requests to the ESM server
+
+Every request of a client passes its :class:`TransportPolicy`, which combines three parts:
+
+* :class:`RetryPolicy` retries idempotent requests answered with 429, 502, 503 or 504, or failed on the
+  connection, after a jittered exponential backoff or the delay the server asks for in `Retry-After`.
+* :class:`AIMDLimiter` limits the number of requests in flight. The limit grows by one per window of
+  successful requests and is halved whenever the server signals overload, so it settles close to the
+  highest parallelism the server sustains.
+* :class:`CircuitBreaker` fails fast with :class:`CircuitOpenError
+  <matrix42sdk.Exceptions.CircuitOpenError>` after repeated server errors, until a trial request
+  succeeds again.
+
+500 answers are not retried, as the Generic Data Service also uses them for rejected writes, e.g.
+concurrency violations. They count as failures of the circuit breaker unless they are such a rejection.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from matrix42sdk.Bulk import _status, is_concurrency_conflict
+from matrix42sdk.Exceptions import CircuitOpenError
+from requests.exceptions import ConnectionError, Timeout
+
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+
+# longest Retry-After honored, requests asked to wait longer are not retried
+DEFAULT_MAX_RETRY_AFTER = 120.0
+
+# statuses after which a request is retried, and which signal an overloaded server
+RETRY_STATUSES = (429, 502, 503, 504)
+OVERLOAD_STATUSES = (429, 503)
+
+# methods which may be sent twice without changing the result
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "DELETE")
+
+# updates carry a TimeStamp: one which reached the server before a gateway error would be rejected
+# as concurrency violation when sent again, so they are retried only after 429 and 503, which the
+# server answers without processing the request
+UPDATE_METHODS = ("PUT",)
+
+DEFAULT_INITIAL_LIMIT = 8
+DEFAULT_MAX_LIMIT = 64
+
+# minimum seconds between two decreases of the concurrency limit
+DECREASE_COOLDOWN = 1.0
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+
+def retry_after(response):
+    """Returns the seconds to wait according to the `Retry-After` header, None if there is none."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+class RetryPolicy(object):
+    """Decides which requests are retried and how long to wait before.
+
+    Args:
+        max_retries (int): Maximum number of retries per request.
+        backoff_base (float): Seconds of the first backoff, doubled with every retry.
+        backoff_max (float): Upper bound of a single backoff.
+        statuses (tuple): Statuses after which a request is retried.
+        methods (tuple): Methods which are retried. Other methods are retried only after 429, as
+            the server did not process the request.
+        max_retry_after (float): Longest `Retry-After` honored, longer ones are not retried.
+        update_methods (tuple): Methods which are also retried after 503, see :data:`UPDATE_METHODS`.
+    """
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_base=DEFAULT_BACKOFF_BASE,
+        backoff_max=DEFAULT_BACKOFF_MAX,
+        statuses=RETRY_STATUSES,
+        methods=IDEMPOTENT_METHODS,
+        max_retry_after=DEFAULT_MAX_RETRY_AFTER,
+        update_methods=UPDATE_METHODS,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.statuses = statuses
+        self.methods = methods
+        self.max_retry_after = max_retry_after
+        self.update_methods = update_methods
+
+    def delay(self, method, attempt, response=None, error=None):
+        """Returns the seconds to wait before retry number `attempt + 1`, None for no retry."""
+        if attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if method.upper() not in self.methods:
+                return None
+        else:
+            status = _status(response)
+            if status not in self.statuses:
+                return None
+            if method.upper() not in self.methods and status != 429:
+                if method.upper() not in self.update_methods or status != 503:
+                    return None
+            wait = retry_after(response)
+            if wait is not None:
+                return wait if wait <= self.max_retry_after else None
+        # "full jitter" keeps many clients from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+
+class AIMDLimiter(object):
+    """Concurrency limit with additive increase and multiplicative decrease.
+
+    Args:
+        initial (int): Limit to start with.
+        minimum (int): The limit never drops below.
+        maximum (int): The limit never grows beyond.
+        decrease (float): Factor applied to the limit on overload.
+    """
+
+    def __init__(
+        self,
+        initial=DEFAULT_INITIAL_LIMIT,
+        minimum=1,
+        maximum=DEFAULT_MAX_LIMIT,
+        decrease=0.5,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def _has_room(self):
+        return self.in_flight < max(self.minimum, int(self.limit))
+
+    def try_acquire(self):
+        """Takes a slot without waiting, returns False if the limit is reached."""
+        with self._condition:
+            if not self._has_room():
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire(self):
+        """Waits for a free slot."""
+        with self._condition:
+            self._condition.wait_for(self._has_room)
+            self.in_flight += 1
+
+    def release(self, overloaded=False):
+        """Frees a slot and adapts the limit to the outcome of the request."""
+        with self._condition:
+            self.in_flight -= 1
+            if overloaded:
+                # concurrent requests see the same overload, count it once
+                now = time.monotonic()
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self._last_decrease = now
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+
+class CircuitBreaker(object):
+    """Stops sending requests to a server which keeps failing.
+
+    After `failure_threshold` failures in a row the circuit opens and requests fail immediately.
+    After `reset_timeout` seconds a single trial request is let through; its success closes the
+    circuit, its failure opens it again.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(
+        self,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        reset_timeout=DEFAULT_RESET_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raises :class:`CircuitOpenError` if the request must not be sent."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError(
+                "The ESM server keeps failing, requests are suspended for %.1f s"
+                % max(0.0, remaining)
+            )
+
+    def cancel(self):
+        """Lets the next request be the trial again, if the trial request ended without answer."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic() - self.reset_timeout
+
+    def record(self, failed):
+        with self._lock:
+            if not failed:
+                self.failures = 0
+                self.state = self.CLOSED
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class TransportPolicy(object):
+    """Retry, concurrency limit and circuit breaker applied to every request of a client.
+
+    Share one instance between clients of the same ESM server, so that they adapt together.
+    Each part may be None to switch it off.
+
+    Args:
+        retry (RetryPolicy): Which requests to retry and when.
+        limiter (AIMDLimiter): Adaptive limit of the requests in flight.
+        breaker (CircuitBreaker): Fails fast while the server is unhealthy.
+        slow_seconds (float): Optional. Responses slower than this count as overload signal.
+    """
+
+    def __init__(self, retry=None, limiter=None, breaker=None, slow_seconds=None):
+        self.retry = retry
+        self.limiter = limiter
+        self.breaker = breaker
+        self.slow_seconds = slow_seconds
+
+    @classmethod
+    def default(cls):
+        return cls(RetryPolicy(), AIMDLimiter(), CircuitBreaker())
+
+    def _before(self):
+        if self.breaker is not None:
+            self.breaker.before_request()
+
+    def _abort(self):
+        if self.limiter is not None:
+            self.limiter.release()
+        if self.breaker is not None:
+            self.breaker.cancel()
+
+    def _after(self, method, attempt, response, error, elapsed, text=None):
+        """Records the outcome of one attempt, returns the delay before a retry or None.
+
+        `text` is the body of an aiohttp response answered with 500, see :func:`is_concurrency_conflict
+        <matrix42sdk.Bulk.is_concurrency_conflict>`.
+        """
+        status = None if response is None else _status(response)
+        overloaded = error is not None or status in OVERLOAD_STATUSES
+        if self.slow_seconds is not None and elapsed > self.slow_seconds:
+            overloaded = True
+        if self.limiter is not None:
+            self.limiter.release(overloaded)
+        if self.breaker is not None:
+            failed = error is not None or (
+                status >= 500 and not is_concurrency_conflict(response, text)
+            )
+            self.breaker.record(failed)
+        if self.retry is None:
+            return None
+        return self.retry.delay(method, attempt, response, error)
+
+    def send(self, method, send_once):
+        """Sends a request with `send_once()` under the policy.
+
+        Returns:
+            The last response. Connection errors are raised once the retries are used up.
+        """
+        attempt = 0
+        while True:
+            self._before()
+            if self.limiter is not None:
+                self.limiter.acquire()
+            start = time.monotonic()
+            response = error = None
+            try:
+                response = send_once()
+            except (ConnectionError, Timeout) as err:
+                error = err
+            except BaseException:
+                self._abort()
+                raise
+            delay = self._after(
+                method, attempt, response, error, time.monotonic() - start
+            )
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    async def send_async(self, method, send_once, errors):
+        """Coroutine counterpart of :meth:`send`, `errors` are the exception types to retry."""
+        # imported here, so that only the asyncio client pays for it
+        import asyncio
+
+        attempt = 0
+        while True:
+            self._before()
+            if self.limiter is not None:
+                # the limiter is shared with threads, poll it instead of blocking the loop
+                while not self.limiter.try_acquire():
+                    await asyncio.sleep(0.005)
+            start = time.monotonic()
+            response = error = None
+            try:
+                response = await send_once()
+            except errors as err:
+                error = err
+            except BaseException:
+                self._abort()
+                raise
+            text = None
+            if response is not None and response.status == 500:
+                # the body is read already, decoding it does not wait for the server
+                text = await response.text(errors="replace")
+            delay = self._after(
+                method, attempt, response, error, time.monotonic() - start, text
+            )
+            if delay is None:
+                if error is not None:
+                    raise error
+                return response
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,272 @@
+"""Schema metadata of the Data Definitions, fetched once and kept on disk
+
+The column types and relation names of a Data Definition rarely change, yet asking the list
+operations for them with the "schema-info" directive sends them again with every page.
+:meth:`get_schema <matrix42sdk.FragmentsDataService.get_schema>` fetches them once per Data
+Definition instead and keeps them in a :class:`SchemaRegistry`, optionally persisted in a JSON file so
+that the next process starts with them. List queries stay plain and carry data only.
+
+A :class:`DataDefinitionSchema` checks column expressions before they are sent, converts the JSON
+values of rows to Python types, and builds the column expression of all attributes.
+"""
+
+import collections
+import datetime
+import threading
+import time
+from matrix42sdk.Exceptions import SchemaError
+from matrix42sdk.State import JsonStateStore
+
+
+# layout of the schemas saved by SchemaRegistry, files of another version are not read
+SCHEMA_FORMAT_VERSION = 1
+
+# seconds a schema is used before it is fetched again, so that changes of the Data Definition show up
+DEFAULT_MAX_AGE = 24 * 60 * 60
+
+Column = collections.namedtuple("Column", ["name", "type"])
+
+
+def _named_items(body, key, ddname):
+    items = body.get(key, [])
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) and isinstance(item.get("Name"), str) for item in items
+    ):
+        raise SchemaError("The schema-info of %s has no list of named %s" % (ddname, key))
+    return items
+
+
+def parse_schema_info(ddname, body):
+    """Builds a :class:`DataDefinitionSchema` from the answer of the "schema-info" request.
+
+    The answer is an object listing the attributes under "Columns", each with its "Name" and "Type",
+    and the relations under "Relations", each with its "Name". Any other layout raises
+    :class:`SchemaError <matrix42sdk.Exceptions.SchemaError>`.
+    """
+    if not isinstance(body, dict) or "Columns" not in body:
+        raise SchemaError("The schema-info of %s lists no Columns" % ddname)
+    columns = list()
+    for item in _named_items(body, "Columns", ddname):
+        if not isinstance(item.get("Type"), str):
+            raise SchemaError(
+                "The schema-info of %s has no Type for %s" % (ddname, item["Name"])
+            )
+        columns.append(Column(item["Name"], item["Type"]))
+    relations = [item["Name"] for item in _named_items(body, "Relations", ddname)]
+    return DataDefinitionSchema(ddname, columns, relations)
+
+
+def split_columns(columns):
+    """Splits an A-SQL Column expression at the commas which are not inside parentheses or quotes."""
+    items, depth, quoted, start = list(), 0, False, 0
+    for i, char in enumerate(columns):
+        if char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(columns[start:i].strip())
+            start = i + 1
+    items.append(columns[start:].strip())
+    return [item for item in items if item]
+
+
+def _referenced_name(item):
+    # "Parent.Name as ParentName" references Parent, expressions and functions are not checked
+    expression = item.split()[0] if item.split() else ""
+    if not expression or any(c in expression for c in "()[]'@+-*/"):
+        return None
+    return expression.split(".")[0]
+
+
+def _parse_datetime(value):
+    # the ESM server sends up to 7 fractional digits and a "Z", older Pythons accept neither
+    text = value[:-1] + "+00:00" if value.endswith("Z") else value
+    if "." in text:
+        head, _, tail = text.partition(".")
+        digits = len(tail) - len(tail.lstrip("0123456789"))
+        text = head + "." + tail[:digits][:6].ljust(6, "0") + tail[digits:]
+    return datetime.datetime.fromisoformat(text)
+
+
+# converters of the JSON values of the ESM attribute types, values of other types are kept
+_CONVERTERS = {
+    "Byte": int,
+    "SByte": int,
+    "Int16": int,
+    "Int32": int,
+    "Int64": int,
+    "UInt16": int,
+    "UInt32": int,
+    "UInt64": int,
+    "Decimal": float,
+    "Double": float,
+    "Single": float,
+    "Date": _parse_datetime,
+    "DateTime": _parse_datetime,
+    "DateTimeOffset": _parse_datetime,
+    "Timestamp": _parse_datetime,
+}
+
+
+class DataDefinitionSchema(object):
+    """Attributes and relations of a Data Definition.
+
+    Attributes:
+        name (str): Technical name of the Data Definition.
+        columns (list): :class:`Column` tuples of name and type, in the order of the server.
+        relations (list): Names of the relations.
+    """
+
+    def __init__(self, name, columns, relations=()):
+        self.name = name
+        self.columns = [Column(*column) for column in columns]
+        self.relations = list(relations)
+        self._names = dict((c.name.lower(), c) for c in self.columns)
+        self._relations = set(r.lower() for r in self.relations)
+        self._converters = dict()
+        for column in self.columns:
+            convert = _CONVERTERS.get(column.type)
+            if convert is not None:
+                self._converters[column.name] = convert
+
+    def __repr__(self):
+        return "DataDefinitionSchema(%r, %d columns)" % (self.name, len(self.columns))
+
+    def __contains__(self, name):
+        return name.lower() in self._names or name.lower() in self._relations
+
+    def column(self, name):
+        """Returns the :class:`Column` of an attribute, None if the Data Definition has none of that name."""
+        return self._names.get(name.lower())
+
+    def unknown_columns(self, columns):
+        """Returns the names a Column expression references which are neither attributes nor relations."""
+        unknown = list()
+        for item in split_columns(columns):
+            name = _referenced_name(item)
+            if name is not None and name.upper() != "ID" and name not in self:
+                unknown.append(name)
+        return unknown
+
+    def validate(self, columns):
+        """Raises :class:`SchemaError <matrix42sdk.Exceptions.SchemaError>` if `columns` references unknown names."""
+        unknown = self.unknown_columns(columns)
+        if unknown:
+            raise SchemaError(
+                "%s has no attribute or relation %s" % (self.name, ", ".join(unknown))
+            )
+        return columns
+
+    def convert(self, row):
+        """Returns a copy of a row whose dates and numbers are converted to Python types.
+
+        Attributes which are not part of the Data Definition, e.g. aliased related attributes, keep
+        their JSON values, so do values which do not convert.
+        """
+        result = dict(row)
+        for name, convert in self._converters.items():
+            value = result.get(name)
+            if not isinstance(value, str):
+                continue
+            try:
+                result[name] = convert(value)
+            except ValueError:
+                pass
+        return result
+
+    def projection(self, names=None, exclude=()):
+        """Builds the A-SQL Column expression of attributes of the Data Definition.
+
+        Args:
+            names (list): Optional. Attributes to include, all of them if omitted. Unknown names raise
+                :class:`SchemaError <matrix42sdk.Exceptions.SchemaError>`.
+            exclude (list): Optional. Attributes to leave out, e.g. large text or binary ones.
+        """
+        if names is None:
+            names = [c.name for c in self.columns]
+        else:
+            self.validate(", ".join(names))
+        excluded = set(n.lower() for n in exclude)
+        return ", ".join(n for n in names if n.lower() not in excluded)
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            columns=[list(c) for c in self.columns],
+            relations=self.relations,
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], data["columns"], data["relations"])
+
+
+class SchemaRegistry(object):
+    """Keeps the schemas of the Data Definitions fetched by :meth:`get_schema
+    <matrix42sdk.FragmentsDataService.get_schema>`, keyed by server and Data Definition.
+
+    Pass it to the clients with ``_schema_registry=...`` to share it. With a `path`, schemas are saved
+    in a JSON file, replaced atomically, and read back by the next process. Schemas saved in another
+    format version are ignored, those older than `max_age` are fetched again.
+
+    The server offers no request telling the version of a schema without sending the schema itself,
+    so a Data Definition changed on the server is noticed once the saved schema expires, when it is
+    fetched with ``refresh=True``, or when :meth:`validate_columns
+    <matrix42sdk.FragmentsDataService.validate_columns>` meets a name the saved schema lacks. Lower
+    `max_age` where schemas change often.
+
+    Args:
+        path (str): Optional. JSON file the schemas are persisted in, memory only if omitted.
+        max_age (float): Seconds a schema is used before it is fetched again, forever if None.
+    """
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._store = JsonStateStore(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._schemas = dict()
+
+    def _expired(self, fetched):
+        return self.max_age is not None and time.time() - fetched > self.max_age
+
+    def _saved(self, server):
+        state = self._store.load(server) if self._store is not None else None
+        if not state or state.get("version") != SCHEMA_FORMAT_VERSION:
+            return dict()
+        return state.get("schemas") or dict()
+
+    def get(self, server, ddname):
+        """Returns the schema of a Data Definition, None if it is unknown or expired."""
+        key = (server, ddname.lower())
+        with self._lock:
+            entry = self._schemas.get(key)
+            if entry is None:
+                saved = self._saved(server).get(ddname.lower())
+                if saved is not None:
+                    entry = (DataDefinitionSchema.from_dict(saved), saved["fetched"])
+                    self._schemas[key] = entry
+        if entry is None or self._expired(entry[1]):
+            return None
+        return entry[0]
+
+    def put(self, server, schema):
+        fetched = time.time()
+        with self._lock:
+            self._schemas[(server, schema.name.lower())] = (schema, fetched)
+            if self._store is not None:
+                schemas = self._saved(server)
+                schemas[schema.name.lower()] = dict(schema.to_dict(), fetched=fetched)
+                self._store.save(
+                    server, dict(version=SCHEMA_FORMAT_VERSION, schemas=schemas)
+                )
+
+    def clear(self):
+        """Forgets the schemas held in memory, the file is read again when they are needed."""
+        with self._lock:
+            self._schemas = dict()
@@ -0,0 +1,47 @@
+"""State kept in files between runs
+
+:class:`JsonStateStore` holds the state of delta synchronizations, the saved schemas of the Data
+Definitions and the checkpoints of exports.
+"""
+
+import json
+import os
+import tempfile
+
+
+class JsonStateStore(object):
+    """Persists named states in a JSON file, e.g. the watermarks and known Ids of :class:`DeltaSync
+    <matrix42sdk.Sync.DeltaSync>` runs.
+
+    The file is replaced atomically, so an interrupted run keeps the state of the last completed run.
+
+    Args:
+        path (str): Path of the JSON file, created on the first save.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return dict()
+
+    def load(self, name):
+        """Returns the state saved under `name`, None if there is none."""
+        return self._read().get(name)
+
+    def save(self, name, state):
+        states = self._read()
+        states[name] = state
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".matrix42sdk-state-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(states, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
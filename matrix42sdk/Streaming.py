@@ -0,0 +1,129 @@
+"""Incremental decoding of large JSON responses
+
+The list operations answer with one JSON array, the Objects Data Service with one JSON object.
+Instead of decoding the whole body at once, the helpers here read the body chunk by chunk and hand
+out one array element (or object member) at a time. Only the element being decoded and one chunk
+of the body are held in memory.
+"""
+
+import codecs
+import json
+
+
+# bytes read from the socket at a time
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+class _Reader(object):
+    # decoded text of a chunked body, consumed from the front
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def fill(self):
+        """Appends the next chunk to the buffer, returns False at the end of the body."""
+        if self.exhausted:
+            return False
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.buffer += self._utf8.decode(b"", final=True)
+        self.exhausted = True
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it, "" at the end."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, characters):
+        character = self.peek()
+        if character == "" or character not in characters:
+            raise ValueError(
+                "Expected one of %r in the JSON response, got %r"
+                % (characters, character)
+            )
+        self.pos += 1
+        return character
+
+    def value(self):
+        """Decodes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and not self.exhausted:
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_array(chunks):
+    """Yields the elements of a JSON array read from an iterable of byte chunks.
+
+    Args:
+        chunks (iterable): Parts of the UTF-8 encoded body, e.g. `response.iter_content(...)`.
+
+    Yields:
+        The decoded elements, one after another.
+    """
+    reader = _Reader(chunks)
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_members(chunks):
+    """Yields the members of a JSON object read from an iterable of byte chunks.
+
+    Yields:
+        tuple: (name, decoded value) of every member, in the order of the body.
+    """
+    reader = _Reader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        name = reader.value()
+        reader.expect(":")
+        yield name, reader.value()
+        if reader.expect(",}") == "}":
+            return
+
+
+def stream_response(response, parse):
+    """Decodes a streamed Requests response with `parse` and closes it once done.
+
+    Args:
+        response (requests.Response): Response of a request sent with ``stream=True``.
+        parse (callable): :func:`iter_array` or :func:`iter_members`.
+    """
+    try:
+        yield from parse(response.iter_content(STREAM_CHUNK_SIZE))
+    finally:
+        response.close()
@@ -0,0 +1,189 @@
+"""Process-wide cache of Matrix42 access tokens
+
+Access tokens are generated from the API Token via `GenerateAccessTokenFromApiToken` and stay
+valid until their expiry. The cache keeps one token per (url, api_token) pair, so that every
+client and every thread of the process shares it instead of minting its own one.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# start a background refresh this many seconds before the access token runs out
+DEFAULT_REFRESH_MARGIN = 60
+
+# lifetime assumed when the token carries no expiry information at all
+DEFAULT_TOKEN_LIFETIME = 300
+
+
+def _jwt_expiry(raw_token):
+    """Reads the `exp` claim (epoch seconds) from a JWT access token, None if there is none."""
+    try:
+        payload = raw_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _valid_to_expiry(valid_to):
+    """Parses the `ValidTo` timestamp of the token response into epoch seconds."""
+    try:
+        value = valid_to.rstrip("Z")
+        # fromisoformat accepts at most 6 fractional digits, .NET sends 7
+        if "." in value:
+            head, fraction = value.split(".", 1)
+            value = "%s.%s" % (head, fraction[:6])
+        parsed = datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+class AccessToken(object):
+    """Raw access token together with the point in time (epoch seconds) it expires.
+
+    Args:
+        raw (str): Content of the `RawToken` attribute.
+        expires_at (float): Epoch seconds after which the ESM server rejects the token.
+    """
+
+    def __init__(self, raw, expires_at):
+        self.raw = raw
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_response(cls, body):
+        """Builds the token from the JSON body of `GenerateAccessTokenFromApiToken`.
+
+        The expiry is taken from the JWT `exp` claim, then from `ValidTo`, and otherwise
+        assumed to be :data:`DEFAULT_TOKEN_LIFETIME` seconds from now.
+        """
+        raw = body["RawToken"]
+        expires_at = _jwt_expiry(raw) or _valid_to_expiry(body.get("ValidTo"))
+        if expires_at is None:
+            expires_at = time.time() + DEFAULT_TOKEN_LIFETIME
+        return cls(raw, expires_at)
+
+
+class _Entry(object):
+    def __init__(self):
+        self.token = None
+        self.refreshing = False
+        self.condition = threading.Condition()
+
+
+class AccessTokenCache(object):
+    """Thread-safe cache of access tokens with single-flight refresh.
+
+    Tokens are refreshed in the background once they are within `refresh_margin` seconds of their
+    expiry, while callers keep using the still valid one. When the token is missing or expired,
+    exactly one caller requests a new one and all others wait for its result.
+
+    Args:
+        refresh_margin (int): Seconds before expiry at which the background refresh starts.
+    """
+
+    def __init__(self, refresh_margin=DEFAULT_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._entries = dict()
+
+    def _entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            return entry
+
+    def peek(self, key, fetch):
+        """Returns the raw token of `key` without blocking, None if it is missing or expired.
+
+        Like :meth:`get`, a token close to its expiry triggers the background refresh.
+        """
+        entry = self._entry(key)
+        with entry.condition:
+            token = entry.token
+            if token is None or time.time() >= token.expires_at:
+                return None
+            self._refresh_ahead(entry, fetch)
+            return token.raw
+
+    def _refresh_ahead(self, entry, fetch):
+        # called with entry.condition held and a token which is still valid
+        refresh_due = time.time() >= entry.token.expires_at - self.refresh_margin
+        if refresh_due and not entry.refreshing:
+            entry.refreshing = True
+            threading.Thread(
+                target=self._refresh, args=(entry, fetch), daemon=True
+            ).start()
+
+    def get(self, key, fetch):
+        """Returns a valid raw access token for `key`, calling `fetch()` to mint a new one if needed.
+
+        Args:
+            key (tuple): (url, api_token) the token belongs to.
+            fetch (callable): Returns a fresh :class:`AccessToken`. Exceptions are passed on to
+                the callers waiting for the token.
+        """
+        entry = self._entry(key)
+        with entry.condition:
+            while True:
+                token = entry.token
+                if token is not None and time.time() < token.expires_at:
+                    self._refresh_ahead(entry, fetch)
+                    return token.raw
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    break
+                entry.condition.wait()
+        return self._refresh(entry, fetch, raise_errors=True).raw
+
+    def _refresh(self, entry, fetch, raise_errors=False):
+        token = None
+        try:
+            token = fetch()
+        except Exception:
+            if raise_errors:
+                raise
+        finally:
+            with entry.condition:
+                if token is not None:
+                    entry.token = token
+                entry.refreshing = False
+                entry.condition.notify_all()
+        return token
+
+    def invalidate(self, key, raw):
+        """Drops the token of `key` if it is still `raw`, e.g. after the ESM server answered 401.
+
+        Comparing against the rejected token makes sure that many callers seeing the same 401
+        lead to a single refresh only.
+        """
+        entry = self._entry(key)
+        with entry.condition:
+            if entry.token is not None and entry.token.raw == raw:
+                entry.token = None
+
+    def clear(self):
+        with self._lock:
+            self._entries = dict()
+
+    def _after_fork(self):
+        # locks may have been held by threads that do not exist in the child process
+        self._lock = threading.Lock()
+        for entry in self._entries.values():
+            entry.refreshing = False
+            entry.condition = threading.Condition()
+
+
+TOKEN_CACHE = AccessTokenCache()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=TOKEN_CACHE._after_fork)
@@ -0,0 +1,116 @@
+"""Command line of the Matrix42 SDK
+
+``python -m matrix42sdk export SPSSoftwareTypeClassBase software.ndjson.gz --columns "Name, Version"``
+
+The server and API Token are taken from ``--url`` and ``--api-token`` or, like for the clients, from
+the MATRIX42_URL and MATRIX42SDK_API_TOKEN environment variables.
+"""
+
+import argparse
+import os
+import sys
+import time
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Export import (
+    DEFAULT_CHECKPOINT_PAGES,
+    DEFAULT_EXPORT_PAGE_SIZE,
+    FORMATS,
+    export_fragments,
+)
+from matrix42sdk.Pagination import DEFAULT_MAX_WORKERS
+
+
+class _ProgressReport(object):
+    """Prints the throughput to stderr, at most once per `interval` seconds."""
+
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._printed = 0.0
+
+    def __call__(self, stats):
+        now = time.monotonic()
+        if now - self._printed >= self.interval:
+            self._printed = now
+            sys.stderr.write("\r%s" % stats)
+            sys.stderr.flush()
+
+
+def _export(args):
+    client = FragmentsDataService(
+        _url=args.url, _api_token=args.api_token, _ssl_verify=args.ssl_verify
+    )
+    stats = export_fragments(
+        client,
+        args.ddname,
+        args.output,
+        where=args.where,
+        columns=args.columns,
+        sort=args.sort,
+        format=args.format,
+        compression=args.compression,
+        page_size=args.page_size,
+        max_workers=args.workers,
+        checkpoint=args.checkpoint,
+        checkpoint_pages=args.checkpoint_pages,
+        progress=None if args.quiet else _ProgressReport(),
+    )
+    if not stats.new_rows and stats.rows:
+        print("%s was already exported completely" % args.output, file=sys.stderr)
+    elif not args.quiet:
+        print("\r%s in %.1f s" % (stats, stats.seconds), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m matrix42sdk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser(
+        "export",
+        help="writes the fragments of a Data Definition to an NDJSON or CSV file",
+    )
+    export.add_argument("ddname", help="technical name of the Data Definition")
+    export.add_argument(
+        "output", help='file to write, compressed if it ends with ".gz", ".bz2" or ".xz"'
+    )
+    export.add_argument("--columns", help="A-SQL Column expression, only Ids if omitted")
+    export.add_argument("--where", help="A-SQL Where expression")
+    export.add_argument(
+        "--sort", default="ID ASC", help="unique sort order of the rows (default: ID ASC)"
+    )
+    export.add_argument("--format", choices=FORMATS, help="derived from the file name")
+    export.add_argument(
+        "--compression", choices=("gzip", "bz2", "xz"), help="derived from the file name"
+    )
+    export.add_argument("--page-size", type=int, default=DEFAULT_EXPORT_PAGE_SIZE)
+    export.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help="pages requested at the same time",
+    )
+    export.add_argument(
+        "--checkpoint",
+        help="JSON file the progress is saved in; an interrupted export resumes from it",
+    )
+    export.add_argument("--checkpoint-pages", type=int, default=DEFAULT_CHECKPOINT_PAGES)
+    export.add_argument("--url", default=os.environ.get("MATRIX42_URL"))
+    export.add_argument("--api-token", default=os.environ.get("MATRIX42SDK_API_TOKEN"))
+    export.add_argument(
+        "--ssl-verify",
+        action="store_true",
+        help="checks the TLS certificate of the server",
+    )
+    export.add_argument("--quiet", action="store_true", help="prints no progress")
+    export.set_defaults(run=_export)
+
+    args = parser.parse_args(argv)
+    if args.url is None or args.api_token is None:
+        parser.error(
+            "the server URL and API Token are required, see --url and --api-token"
+        )
+    args.run(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+from matrix42sdk import Codec
+from matrix42sdk.api_endpoints.fragments import list_params
+from matrix42sdk.AsyncClient import AsyncMatrix42RestClient, aiohttp
+
+
+class AsyncFragmentsDataService(AsyncMatrix42RestClient):
+    """asyncio counterpart of :class:`FragmentsDataService <matrix42sdk.api_endpoints.fragments.FragmentsDataService>`
+
+    Every endpoint method is a coroutine with the same arguments and results as the synchronous one.
+    A `_cache` is read and invalidated like by the synchronous client; identical reads in flight are
+    not coalesced on the event loop, but writes still drop the ones in flight on a `_single_flight`.
+
+    Args:
+        AsyncMatrix42RestClient ([type]): Inherit AsyncMatrix42RestClient object
+    """
+
+    def __init__(self, _path=None, **kwargs):
+        super().__init__(**kwargs)
+        self._path = "/M42Services/api/data/fragments"
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self._path = value
+
+    async def delete_fragement(self, ddname, fragmentId):
+        """Deletes the fragment, see :meth:`FragmentsDataService.delete_fragement`."""
+        req_url = self.url + self.path + "/%s/%s" % (ddname, fragmentId)
+        try:
+            r_ci_del = await self._request("DELETE", req_url)
+            r_ci_del.raise_for_status()
+            self._cache_invalidate([fragmentId])
+            return r_ci_del
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def get_fragment(self, ddname, fragmentId):
+        """Reads the whole Fragment, see :meth:`FragmentsDataService.get_fragment`."""
+        req_url = self.url + self.path + "/%s/%s?full=true" % (ddname, fragmentId)
+        try:
+            body = self._cache_lookup(("fragment", ddname, fragmentId))
+            if body is not None:
+                return Codec.loads(body)
+
+            r_ci = await self._request("GET", req_url)
+            r_ci.raise_for_status()
+            body = await r_ci.read()
+            fragment = Codec.loads(body)
+            self._cache_store(("fragment", ddname, fragmentId), body, fragment)
+            return fragment
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def get_fragments_list(
+        self,
+        ddname,
+        *,
+        where=None,
+        columns=None,
+        pageSize=None,
+        pageNumber=None,
+        sort=None,
+        includeLocalizations=None,
+    ):
+        """Retrieves a list of fragments, see :meth:`FragmentsDataService.get_fragments_list`."""
+        req_url = self.url + self.path + "/%s" % ddname
+        payload = list_params(
+            where=where,
+            columns=columns,
+            pageSize=pageSize,
+            pageNumber=pageNumber,
+            sort=sort,
+            includeLocalizations=includeLocalizations,
+        )
+        try:
+            r_ci_list = await self._request("GET", req_url + "?" + payload)
+            r_ci_list.raise_for_status()
+            rows = Codec.loads(await r_ci_list.read())
+            for row in rows or ():
+                self._observe_row(row)
+            return rows
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def get_fragment_relations_list(
+        self,
+        ddname,
+        fragmentId,
+        relationName,
+        *,
+        where=None,
+        columns=None,
+        pageSize=None,
+        pageNumber=None,
+        sort=None,
+        includeLocalizations=None,
+    ):
+        """Retrieves a list of fragment's relations, see :meth:`FragmentsDataService.get_fragment_relations_list`."""
+        req_url = self.url + self.path + "/%s/%s/%s" % (ddname, fragmentId, relationName)
+        payload = list_params(
+            where=where,
+            columns=columns,
+            pageSize=pageSize,
+            pageNumber=pageNumber,
+            sort=sort,
+            includeLocalizations=includeLocalizations,
+        )
+        try:
+            r_ci_list = await self._request("GET", req_url + "?" + payload)
+            r_ci_list.raise_for_status()
+            rows = Codec.loads(await r_ci_list.read())
+            for row in rows or ():
+                self._observe_row(row)
+            return rows
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def create_fragment(self, ddname, fragmentData):
+        """Creates a new Data Definition fragment, see :meth:`FragmentsDataService.create_fragment`."""
+        put_url = self.url + self.path + "/%s" % ddname
+        try:
+            r_ci_create = await self._request(
+                "POST", put_url, data=Codec.encode_body(fragmentData)
+            )
+            r_ci_create.raise_for_status()
+            self._forget_in_flight()
+            return r_ci_create
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def update_fragment(self, ddname, jsonBody):
+        """Updates the fragment attributes, see :meth:`FragmentsDataService.update_fragment`."""
+        # true => full update | must be same in the get method
+        put_url = self.url + self.path + "/%s?full=true" % ddname
+        try:
+            r_ci_update = await self._request(
+                "PUT", put_url, data=Codec.encode_body(jsonBody)
+            )
+            r_ci_update.raise_for_status()
+            self._cache_invalidate_body(jsonBody)
+            return r_ci_update
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def delete_fragment_relation(
+        self, ddname, fragmentId, relationName, relationFragmentId
+    ):
+        """Deletes the relation, see :meth:`FragmentsDataService.delete_fragment_relation`."""
+        req_url = (
+            self.url
+            + self.path
+            + "/%s/%s/%s/%s" % (ddname, fragmentId, relationName, relationFragmentId)
+        )
+        try:
+            r_ci_delete_rel = await self._request("DELETE", req_url)
+            r_ci_delete_rel.raise_for_status()
+            self._forget_in_flight()
+            return r_ci_delete_rel
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def add_fragment_relation(
+        self, ddname, fragmentId, relationName, relationFragmentId
+    ):
+        """Adds the relation, see :meth:`FragmentsDataService.add_fragment_relation`."""
+        req_url = (
+            self.url
+            + self.path
+            + "/%s/%s/%s/%s" % (ddname, fragmentId, relationName, relationFragmentId)
+        )
+        try:
+            r_ci_add_rel = await self._request("GET", req_url)
+            r_ci_add_rel.raise_for_status()
+            self._forget_in_flight()
+            return r_ci_add_rel
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
@@ -0,0 +1,99 @@
+from matrix42sdk import Codec
+from matrix42sdk.AsyncClient import AsyncMatrix42RestClient, aiohttp
+
+
+class AsyncObjectsDataService(AsyncMatrix42RestClient):
+    """asyncio counterpart of :class:`ObjectsDataService <matrix42sdk.api_endpoints.objects.ObjectsDataService>`
+
+    Every endpoint method is a coroutine with the same arguments and results as the synchronous one.
+    A `_cache` is read and invalidated like by the synchronous client; identical reads in flight are
+    not coalesced on the event loop, but writes still drop the ones in flight on a `_single_flight`.
+
+    Args:
+        AsyncMatrix42RestClient ([type]): Inherit AsyncMatrix42RestClient object
+    """
+
+    def __init__(self, _path=None, **kwargs):
+        super().__init__(**kwargs)
+        self._path = "/M42Services/api/data/objects"
+
+    @property
+    def path(self):
+        return self._path
+
+    @path.setter
+    def path(self, value):
+        self._path = value
+
+    async def get_object(self, ciName, objectId, full="true"):
+        """Gets the whole Object, see :meth:`ObjectsDataService.get_object`."""
+        # full=true is important for getting complete object, including version
+        req_url = self.url + self.path + "/%s/%s?full=%s" % (ciName, objectId, full)
+        cache_key = ("object", ciName, objectId, full)
+        try:
+            body = self._cache_lookup(cache_key)
+            if body is not None:
+                return Codec.loads(body)
+
+            r_ci_get = await self._request("GET", req_url)
+            r_ci_get.raise_for_status()
+            body = await r_ci_get.read()
+            ci_object = Codec.loads(body)
+            self._cache_store(cache_key, body, ci_object)
+            return ci_object
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def update_object(self, ciName, jsonBody, full="true"):
+        """Updates the object, see :meth:`ObjectsDataService.update_object`."""
+        # true => full update | must be same in the get method
+        put_url = self.url + self.path + "/%s?full=%s" % (ciName, full)
+        try:
+            r_ci_update = await self._request(
+                "PUT", put_url, data=Codec.encode_body(jsonBody)
+            )
+            r_ci_update.raise_for_status()
+            self._cache_invalidate_body(jsonBody)
+            return r_ci_update
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def create_object(self, ciName, jsonBody):
+        """Creates a new Object, see :meth:`ObjectsDataService.create_object`."""
+        put_url = self.url + self.path + "/%s" % ciName
+        try:
+            r_ci_create = await self._request(
+                "POST", put_url, data=Codec.encode_body(jsonBody)
+            )
+            r_ci_create.raise_for_status()
+            self._forget_in_flight()
+            return r_ci_create
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
+
+    async def delete_object(self, ciName, objectId):
+        """Deletes the object, see :meth:`ObjectsDataService.delete_object`."""
+        put_url = self.url + self.path + "/%s/%s" % (ciName, objectId)
+        try:
+            r_ci_delete = await self._request("DELETE", put_url)
+            r_ci_delete.raise_for_status()
+            self._cache_invalidate([objectId])
+            return r_ci_delete
+
+        except aiohttp.ClientResponseError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+
+        except Exception as err:
+            print(f"Other error occurred: {err}")
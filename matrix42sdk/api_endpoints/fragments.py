@@ -1,9 +1,119 @@
-import json
-import requests
-from urllib.parse import urlencode
+import collections
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote, urlencode
+from matrix42sdk import Codec
 from matrix42sdk.AuthNClient import Matrix42RestClient
+from matrix42sdk.Bulk import (
+    ADDED,
+    CONFLICT,
+    DELETED,
+    FAILED,
+    INVALIDATED,
+    REFRESHED,
+    SKIPPED,
+    UNCHANGED,
+    UPDATED,
+    BulkItemResult,
+    BulkReport,
+    is_concurrency_conflict,
+    run_bulk,
+)
+from matrix42sdk.Columnar import ColumnarResult
+from matrix42sdk.Pagination import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_PAGE_SIZE,
+    iter_pages,
+    iter_pages_parallel,
+)
+from matrix42sdk.Schema import SchemaRegistry, parse_schema_info
+from matrix42sdk.Streaming import iter_array, stream_response
 from requests.exceptions import HTTPError
 
+# longest request URL sent by the batch methods, IIS rejects longer query strings by default
+MAX_URL_LENGTH = 2048
+
+# upper bound of Ids in one "ID IN (...)" list query, whatever their length
+MAX_IDS_PER_QUERY = 500
+
+# how often a bulk update refetches the TimeStamp after a concurrency conflict
+DEFAULT_CONFLICT_RETRIES = 3
+
+# result of get_fragments_by_ids: the fragments keyed by Id, and the Ids which were not found
+FragmentsByIds = collections.namedtuple("FragmentsByIds", ["found", "missing"])
+
+
+def list_params(
+    where=None,
+    columns=None,
+    pageSize=None,
+    pageNumber=None,
+    sort=None,
+    includeLocalizations=None,
+):
+    """Builds the query string of the list operations from the parameters which are set."""
+    payload = dict()
+    if where is not None:
+        payload.update({"where": where})
+    if columns is not None:
+        payload.update({"columns": columns})
+    if pageSize is not None:
+        payload.update({"pageSize": pageSize})
+    if pageNumber is not None:
+        payload.update({"pageNumber": pageNumber})
+    if sort is not None:
+        payload.update({"sort": sort})
+    if includeLocalizations is not None:
+        payload.update({"includeLocalizations": includeLocalizations})
+
+    return urlencode(payload, safe=":,[]= ")
+
+
+def where_ids_in(ids, column="ID"):
+    """Builds the A-SQL expression matching the fragments with the given Ids, e.g. "ID IN ('a', 'b')"."""
+    quoted = ", ".join("'%s'" % str(i).replace("'", "''") for i in ids)
+    return "%s IN (%s)" % (column, quoted)
+
+
+def _sent_length(text):
+    # list_params keeps spaces, which Requests sends as %20
+    return len(text) + 2 * text.count(" ")
+
+
+def chunk_ids(ids, fixed_length, max_length=MAX_URL_LENGTH):
+    """Splits Ids into chunks whose :func:`where_ids_in` expression keeps the request URL short enough.
+
+    Args:
+        ids (list): Ids of fragments.
+        fixed_length (int): Length of the request URL with an empty Id list.
+        max_length (int): Maximum length of the request URL.
+
+    Returns:
+        list: Lists of Ids, each with at most :data:`MAX_IDS_PER_QUERY` of them.
+    """
+    chunks = list()
+    chunk, length = list(), fixed_length
+    for fragmentId in ids:
+        item = "'%s', " % str(fragmentId).replace("'", "''")
+        item_length = _sent_length(quote(item, safe=":,[]= "))
+        if chunk and (
+            length + item_length > max_length or len(chunk) >= MAX_IDS_PER_QUERY
+        ):
+            chunks.append(chunk)
+            chunk, length = list(), fixed_length
+        chunk.append(fragmentId)
+        length += item_length
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def _with_id_column(columns):
+    # the rows can only be matched to the requested Ids if the ID column is part of the result
+    if columns is None:
+        return None
+    names = [column.strip().split(" ")[0].upper() for column in columns.split(",")]
+    return columns if "ID" in names else "ID, " + columns
+
 
 class FragmentsDataService(Matrix42RestClient):
     """Fragments (/api/data/fragments), provides the operation for working with the Fragments (Instances of the Data Definitions)
@@ -19,7 +129,8 @@ class FragmentsDataService(Matrix42RestClient):
     def __init__(self, _path=None, _full_header=None, **kwargs):
         super().__init__(**kwargs)
         self._path = "/M42Services/api/data/fragments"
-        self._full_header = self.get_matrix42_access_header()
+        if self._schema_registry is None:
+            self._schema_registry = SchemaRegistry()
 
     @property
     def path(self):
@@ -29,6 +140,53 @@ class FragmentsDataService(Matrix42RestClient):
     def path(self, value):
         self._path = value
 
+    def _get_list(self, req_url, payload):
+        # unlike the public methods, errors are raised so that callers paging through results
+        # never mistake a failed page for the end of the data
+        return self._coalesced(
+            ("GET", req_url, payload), lambda: self._load_list(req_url, payload)
+        )
+
+    def _load_list(self, req_url, payload):
+        r_ci_list = self._request("GET", req_url, params=payload)
+        r_ci_list.raise_for_status()
+        rows = Codec.loads(r_ci_list.content)
+        for row in rows:
+            self._observe_row(row)
+        return rows
+
+    def _stream_list(self, req_url, payload):
+        r_ci_list = self._request("GET", req_url, params=payload, stream=True)
+        try:
+            r_ci_list.raise_for_status()
+        except HTTPError:
+            r_ci_list.close()
+            raise
+        return self._observed_rows(stream_response(r_ci_list, iter_array))
+
+    def _observed_rows(self, rows):
+        for row in rows:
+            self._observe_row(row)
+            yield row
+
+    def _page_fetcher(self, req_url, **query):
+        """Returns `fetch_page(pageSize, pageNumber)` loading one page of the list query."""
+
+        def fetch_page(pageSize, pageNumber):
+            payload = list_params(pageSize=pageSize, pageNumber=pageNumber, **query)
+            return self._get_list(req_url, payload)
+
+        return fetch_page
+
+    def _load_fragment(self, ddname, fragmentId):
+        # full=true is important for getting complete object, including version
+        req_url = self.url + self.path + "/%s/%s?full=true" % (ddname, fragmentId)
+        r_ci = self._request("GET", req_url)
+        r_ci.raise_for_status()
+        fragment = Codec.loads(r_ci.content)
+        self._cache_store(("fragment", ddname, fragmentId), r_ci.content, fragment)
+        return fragment
+
     def delete_fragement(self, ddname, fragmentId):
         """Deletes the fragment from Database defined by the Data Definition name and the object ID.
 
@@ -45,10 +203,9 @@ class FragmentsDataService(Matrix42RestClient):
         """
         req_url = self.url + self.path + "/%s/%s" % (ddname, fragmentId)
         try:
-            r_ci_del = requests.delete(
-                req_url, verify=self._ssl_verify, headers=self._full_header
-            )
+            r_ci_del = self._request("DELETE", req_url)
             r_ci_del.raise_for_status()
+            self._cache_invalidate([fragmentId])
             return r_ci_del
 
         except HTTPError as http_err:
@@ -75,14 +232,15 @@ class FragmentsDataService(Matrix42RestClient):
         `URL <https://help.matrix42.com/030_DWP/030_INT/Business_Processes_and_API_Integrations/Public_API_reference_documentation/Fragments_Data_Service%3A_Get_Fragment_data>`_
 
         """
-        # full=true is important for getting complete object, including version
-        req_url = self.url + self.path + "/%s/%s?full=true" % (ddname, fragmentId)
         try:
-            r_ci = requests.get(
-                req_url, verify=self._ssl_verify, headers=self._full_header
+            body = self._cache_lookup(("fragment", ddname, fragmentId))
+            if body is not None:
+                return Codec.loads(body)
+
+            return self._coalesced(
+                ("fragment", ddname, fragmentId),
+                lambda: self._load_fragment(ddname, fragmentId),
             )
-            r_ci.raise_for_status()
-            return json.loads(r_ci.text)
 
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err}")
@@ -102,6 +260,7 @@ class FragmentsDataService(Matrix42RestClient):
         pageNumber=None,
         sort=None,
         includeLocalizations=None,
+        stream=False,
     ):
         """Retrieves a list of fragments with a defined list of columns, which match the specified search criteria.
 
@@ -135,36 +294,30 @@ class FragmentsDataService(Matrix42RestClient):
                 in Data Definition (e.g. SPSActivityClassBase: Category.Name) keep only values of the request culture.
                 If you need all localizations for these attributes as well, please run a dedicated request to Data
                 Definition which keeps this attribute (e.g. SPSScCategoryClassBase)
+            stream (bool):
+                Optional. Returns an iterator which decodes the response incrementally and yields one
+                fragment at a time, so that only a single row is held in memory. Errors while reading
+                the rows are raised by the iterator.
+
+        Column types and relation names are better taken from :meth:`get_schema
+        <matrix42sdk.FragmentsDataService.get_schema>`, which fetches them once per Data Definition.
 
         `URL <https://help.matrix42.com/030_DWP/030_INT/Business_Processes_and_API_Integrations/Public_API_reference_documentation/Fragments_Data_Service%3A_Get_a_list_of_Fragments>`_
 
         """
         req_url = self.url + self.path + "/%s" % ddname
-
-        payload = dict()
-        if where is not None:
-            payload.update({"where": where})
-        if columns is not None:
-            payload.update({"columns": columns})
-        if pageSize is not None:
-            payload.update({"pageSize": pageSize})
-        if pageNumber is not None:
-            payload.update({"pageNumber": pageNumber})
-        if sort is not None:
-            payload.update({"sort": sort})
-        if includeLocalizations is not None:
-            payload.update({"includeLocalizations": includeLocalizations})
-
-        payload = urlencode(payload, safe=":,[]= ")
+        payload = list_params(
+            where=where,
+            columns=columns,
+            pageSize=pageSize,
+            pageNumber=pageNumber,
+            sort=sort,
+            includeLocalizations=includeLocalizations,
+        )
         try:
-            r_ci_list = requests.get(
-                req_url,
-                params=payload,
-                verify=self._ssl_verify,
-                headers=self._full_header,
-            )
-            r_ci_list.raise_for_status()
-            return json.loads(r_ci_list.text)
+            if stream:
+                return self._stream_list(req_url, payload)
+            return self._get_list(req_url, payload)
 
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err}")
@@ -184,6 +337,7 @@ class FragmentsDataService(Matrix42RestClient):
         pageNumber=None,
         sort=None,
         includeLocalizations=None,
+        stream=False,
     ):
         """Retrieves a list of fragment's relations with a defined list of columns which match the specified search
         criteria and are sorted in the defined order.
@@ -222,37 +376,28 @@ class FragmentsDataService(Matrix42RestClient):
                 in Data Definition (e.g. SPSActivityClassBase: Category.Name) keep only values of the request culture.
                 If you need all localizations for these attributes as well, please run a dedicated request to Data
                 Definition which keeps this attribute (e.g. SPSScCategoryClassBase)
+            stream (bool):
+                Optional. Returns an iterator which decodes the response incrementally and yields one
+                fragment at a time, so that only a single row is held in memory. Errors while reading
+                the rows are raised by the iterator.
 
         `URL <https://help.matrix42.com/030_DWP/030_INT/Business_Processes_and_API_Integrations/Public_API_reference_documentation/Fragments_Data_Service%3A_Get_a_list_of_Fragment_Relations>`_
 
         """
         req_url = self.url + self.path + "/%s/%s/%s" % (ddname, fragmentId, relationName)
-
-        payload = dict()
-        if where is not None:
-            payload.update({"where": where})
-        if columns is not None:
-            payload.update({"columns": columns})
-        if pageSize is not None:
-            payload.update({"pageSize": pageSize})
-        if pageNumber is not None:
-            payload.update({"pageNumber": pageNumber})
-        if sort is not None:
-            payload.update({"sort": sort})
-        if includeLocalizations is not None:
-            payload.update({"includeLocalizations": includeLocalizations})
-
-        payload = urlencode(payload, safe=":,[]= ")
+        payload = list_params(
+            where=where,
+            columns=columns,
+            pageSize=pageSize,
+            pageNumber=pageNumber,
+            sort=sort,
+            includeLocalizations=includeLocalizations,
+        )
 
         try:
-            r_ci_list = requests.get(
-                req_url,
-                params=payload,
-                verify=self._ssl_verify,
-                headers=self._full_header,
-            )
-            r_ci_list.raise_for_status()
-            return json.loads(r_ci_list.text)
+            if stream:
+                return self._stream_list(req_url, payload)
+            return self._get_list(req_url, payload)
 
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err}")
@@ -260,6 +405,216 @@ class FragmentsDataService(Matrix42RestClient):
         except Exception as err:
             print(f"Other error occurred: {err}")
 
+    def _load_schema(self, ddname):
+        # the directive answers like a list query, one row keeps the rows out of the answer
+        req_url = self.url + self.path + "/%s/schema-info" % ddname
+        payload = list_params(pageSize=1, pageNumber=0)
+        r_schema = self._request("GET", req_url, params=payload)
+        r_schema.raise_for_status()
+        return parse_schema_info(ddname, Codec.loads(r_schema.content))
+
+    def get_schema(self, ddname, *, refresh=False):
+        """Returns the attributes, their types and the relations of a Data Definition.
+
+        The schema is fetched with the "schema-info" directive the first time it is needed and then
+        served from the client's :class:`SchemaRegistry <matrix42sdk.Schema.SchemaRegistry>`, so that
+        list queries do not have to ask for it with every page. Errors are raised.
+
+        Args:
+            ddname (str):
+                Required. The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            refresh (bool):
+                Optional. Fetches the schema again, e.g. after the Data Definition was changed.
+
+        Returns:
+            :class:`DataDefinitionSchema <matrix42sdk.Schema.DataDefinitionSchema>`
+        """
+        if not refresh:
+            schema = self._schema_registry.get(self.url, ddname)
+            if schema is not None:
+                return schema
+        schema = self._coalesced(("schema", ddname), lambda: self._load_schema(ddname))
+        self._schema_registry.put(self.url, schema)
+        return schema
+
+    def validate_columns(self, ddname, columns):
+        """Checks that a Column expression references attributes and relations of the Data Definition only.
+
+        Names missing from a saved schema let it be fetched again once before they count as
+        unknown, so that new attributes are picked up.
+
+        Returns:
+            The unchanged `columns`. Raises :class:`SchemaError <matrix42sdk.Exceptions.SchemaError>`
+            for unknown names.
+        """
+        schema = self.get_schema(ddname)
+        if schema.unknown_columns(columns):
+            schema = self.get_schema(ddname, refresh=True)
+        return schema.validate(columns)
+
+    def iter_fragments(
+        self, ddname, *, where=None, columns=None, sort=None, page_size=DEFAULT_PAGE_SIZE
+    ):
+        """Iterates lazily over all fragments which match the specified search criteria.
+
+        Pages of `page_size` fragments are requested with :meth:`get_fragments_list
+        <matrix42sdk.FragmentsDataService.get_fragments_list>` semantics, while the next page is
+        prefetched in the background. At most two pages are held in memory, regardless of the
+        number of fragments in the Data Definition.
+
+        Unlike `get_fragments_list`, HTTP errors are raised instead of printed, so that a failed
+        page never ends the iteration silently.
+
+        Args:
+            ddname (str):
+                Required. The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            where (str):
+                Optional. A-SQL Where Expression.
+            columns (str):
+                Optional. A-SQL Column expression, e.g. "Name, Parent.Name as ParentName"
+            sort (str):
+                Optional. Sorting of the result, e.g. "Name ASC". Use a unique sort order
+                (e.g. "ID ASC") to get a stable paging while the data changes.
+            page_size (int):
+                Optional. Number of fragments requested per page.
+
+        Yields:
+            dict: One JSON object per fragment.
+        """
+        req_url = self.url + self.path + "/%s" % ddname
+        fetch_page = self._page_fetcher(req_url, where=where, columns=columns, sort=sort)
+        for page in iter_pages(fetch_page, page_size):
+            yield from page
+
+    def get_fragments_list_parallel(
+        self,
+        ddname,
+        *,
+        where=None,
+        columns=None,
+        sort=None,
+        page_size=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """Retrieves all fragments which match the specified search criteria, loading several pages at once.
+
+        Meant for large exports: pages are requested concurrently by up to `max_workers` threads
+        and put together in page order. Loading stops at the first short or empty page.
+        Without a `page_size` it is tuned from the latency and payload size of a first probe page.
+
+        HTTP errors are raised instead of printed, as a partial result would look complete.
+
+        Args:
+            ddname (str):
+                Required. The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            where (str):
+                Optional. A-SQL Where Expression.
+            columns (str):
+                Optional. A-SQL Column expression, e.g. "Name, Parent.Name as ParentName"
+            sort (str):
+                Optional. Sorting of the result. Use a unique sort order (e.g. "ID ASC"), otherwise
+                the server may return rows on more than one page.
+            page_size (int):
+                Optional. Number of fragments requested per page, tuned automatically if omitted.
+            max_workers (int):
+                Optional. Maximum number of pages requested at the same time.
+
+        Returns:
+            An array of JSON objects, one per fragment, in the order of the pages.
+        """
+        req_url = self.url + self.path + "/%s" % ddname
+        fetch_page = self._page_fetcher(req_url, where=where, columns=columns, sort=sort)
+        result = list()
+        for page in iter_pages_parallel(fetch_page, page_size, max_workers):
+            result.extend(page)
+        return result
+
+    def get_fragments_columnar(
+        self,
+        ddname,
+        *,
+        where=None,
+        columns=None,
+        sort=None,
+        page_size=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """Retrieves all fragments which match the specified search criteria as a columnar result.
+
+        Pages are loaded like by :meth:`get_fragments_list_parallel
+        <matrix42sdk.FragmentsDataService.get_fragments_list_parallel>` and appended to a
+        :class:`ColumnarResult <matrix42sdk.Columnar.ColumnarResult>` one by one, so that no more than
+        a window of pages exists as row dicts. Numbers are kept in compact arrays, which convert to
+        NumPy without copying, and the result converts to pandas or Arrow when those are installed.
+
+        HTTP errors are raised instead of printed, as a partial result would look complete.
+
+        Args:
+            ddname (str):
+                Required. The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            where (str):
+                Optional. A-SQL Where Expression.
+            columns (str):
+                Optional. A-SQL Column expression, e.g. "Name, Parent.Name as ParentName". Gives the
+                column order of the result.
+            sort (str):
+                Optional. Sorting of the result. Use a unique sort order (e.g. "ID ASC").
+            page_size (int):
+                Optional. Number of fragments requested per page, tuned automatically if omitted.
+            max_workers (int):
+                Optional. Maximum number of pages requested at the same time.
+
+        Returns:
+            :class:`ColumnarResult <matrix42sdk.Columnar.ColumnarResult>`
+        """
+        req_url = self.url + self.path + "/%s" % ddname
+        fetch_page = self._page_fetcher(req_url, where=where, columns=columns, sort=sort)
+        result = ColumnarResult(columns)
+        for page in iter_pages_parallel(fetch_page, page_size, max_workers):
+            result.append_rows(page)
+        return result
+
+    def iter_fragment_relations(
+        self,
+        ddname,
+        fragmentId,
+        relationName,
+        *,
+        where=None,
+        columns=None,
+        sort=None,
+        page_size=DEFAULT_PAGE_SIZE,
+    ):
+        """Iterates lazily over all relations of a fragment which match the specified search criteria.
+
+        The paging counterpart of :meth:`get_fragment_relations_list
+        <matrix42sdk.FragmentsDataService.get_fragment_relations_list>`, see :meth:`iter_fragments
+        <matrix42sdk.FragmentsDataService.iter_fragments>` for the behaviour.
+
+        Args:
+            ddname (str):
+                Required. The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            fragmentId (str):
+                Required. Id of the Fragment of specified Data Definition
+            relationName (str):
+                Required. Technical name of the relation (e.g. AttachedUsers).
+            where (str):
+                Optional. A-SQL Where Expression.
+            columns (str):
+                Optional. A-SQL Column expression, e.g. "Name, Parent.Name as ParentName"
+            sort (str):
+                Optional. Sorting of the result, e.g. "Name ASC".
+            page_size (int):
+                Optional. Number of related fragments requested per page.
+
+        Yields:
+            dict: One JSON object per related fragment.
+        """
+        req_url = self.url + self.path + "/%s/%s/%s" % (ddname, fragmentId, relationName)
+        fetch_page = self._page_fetcher(req_url, where=where, columns=columns, sort=sort)
+        for page in iter_pages(fetch_page, page_size):
+            yield from page
+
     def create_fragment(self, ddname, fragmentData):
         """Creates a new Data Definition fragment. The operation is required for cases of multi-fragments or optional fragments.
 
@@ -267,7 +622,8 @@ class FragmentsDataService(Matrix42RestClient):
             ddname (str):
                 Required. The technical name of the Data Definition (e.g. SPSActivityClassBase)
             fragmentData: (json)
-                Request Body with a JSON containing all necessary data for Fragment creation.
+                Request Body with a JSON containing all necessary data for Fragment creation,
+                either as dict or as JSON text.
                 For JSON  structure examples see  Fragments Data Service: Get Fragment page.
 
         Returns:
@@ -279,13 +635,11 @@ class FragmentsDataService(Matrix42RestClient):
         """
         put_url = self.url + self.path + "/%s" % ddname
         try:
-            r_ci_create = requests.post(
-                put_url,
-                verify=self._ssl_verify,
-                headers=self._full_header,
-                data=fragmentData,
+            r_ci_create = self._request(
+                "POST", put_url, data=Codec.encode_body(fragmentData)
             )
             r_ci_create.raise_for_status()
+            self._forget_in_flight()
             return r_ci_create
 
         except HTTPError as http_err:
@@ -300,7 +654,8 @@ class FragmentsDataService(Matrix42RestClient):
         The Service modifies only attributes which are explicitly specified in the Request Body.
         The attributes which are not mentioned in the request are not affected by the Update operation.
 
-        Needs jsonBody which has "JSON Object with fragment attributes with new values".
+        Needs jsonBody which has "JSON Object with fragment attributes with new values", either as dict
+        or as JSON text.
 
         Use :meth:`get_fragment <matrix42sdk.FragmentsDataService.get_fragment>` JSON object to update fields.
 
@@ -319,10 +674,9 @@ class FragmentsDataService(Matrix42RestClient):
         put_url = self.url + self.path + "/%s?full=true" % ddname
 
         try:
-            r_ci_update = requests.put(
-                put_url, verify=self._ssl_verify, headers=self._full_header, data=jsonBody
-            )
+            r_ci_update = self._request("PUT", put_url, data=Codec.encode_body(jsonBody))
             r_ci_update.raise_for_status()
+            self._cache_invalidate_body(jsonBody)
 
             if r_ci_update.status_code == 204:
                 print("Update of CI fragment has been ok")
@@ -335,6 +689,31 @@ class FragmentsDataService(Matrix42RestClient):
         except Exception as err:
             print(f"Other error occurred: {err}")
 
+    def _relation_url(self, ddname, fragmentId, relationName, relationFragmentId):
+        return (
+            self.url
+            + self.path
+            + "/%s/%s/%s/%s" % (ddname, fragmentId, relationName, relationFragmentId)
+        )
+
+    def _delete_fragment_relation(
+        self, ddname, fragmentId, relationName, relationFragmentId
+    ):
+        req_url = self._relation_url(ddname, fragmentId, relationName, relationFragmentId)
+        r_ci_delete_rel = self._request("DELETE", req_url)
+        r_ci_delete_rel.raise_for_status()
+        self._forget_in_flight()
+        return r_ci_delete_rel
+
+    def _add_fragment_relation(
+        self, ddname, fragmentId, relationName, relationFragmentId
+    ):
+        req_url = self._relation_url(ddname, fragmentId, relationName, relationFragmentId)
+        r_ci_add_rel = self._request("GET", req_url)
+        r_ci_add_rel.raise_for_status()
+        self._forget_in_flight()
+        return r_ci_add_rel
+
     def delete_fragment_relation(
         self, ddname, fragmentId, relationName, relationFragmentId
     ):
@@ -358,17 +737,10 @@ class FragmentsDataService(Matrix42RestClient):
         `Matrix42 URL <https://help.matrix42.com/030_DWP/030_INT/Business_Processes_and_API_Integrations/Public_API_reference_documentation/Fragments_Data_Service%3A_Delete_Fragment_Relation>`_
 
         """
-        req_url = (
-            self.url
-            + self.path
-            + "/%s/%s/%s/%s" % (ddname, fragmentId, relationName, relationFragmentId)
-        )
         try:
-            r_ci_delete_rel = requests.delete(
-                req_url, verify=self._ssl_verify, headers=self._full_header
+            return self._delete_fragment_relation(
+                ddname, fragmentId, relationName, relationFragmentId
             )
-            r_ci_delete_rel.raise_for_status()
-            return r_ci_delete_rel
 
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err}")
@@ -381,7 +753,8 @@ class FragmentsDataService(Matrix42RestClient):
 
         The operation is required for managing many-to-many relations.
         The operation adds a single object to relation. If you need to add multiple relations to the object,
-        you need to make a call of the Service for each of them
+        you need to make a call of the Service for each of them, or use :meth:`add_fragment_relations
+        <matrix42sdk.FragmentsDataService.add_fragment_relations>` which does so concurrently.
 
         Returns:
             The system returns no data, but this method returns Requests' full `post` object.
@@ -399,20 +772,351 @@ class FragmentsDataService(Matrix42RestClient):
         `URL <https://help.matrix42.com/030_DWP/030_INT/Business_Processes_and_API_Integrations/Public_API_reference_documentation/Fragments_Data_Service%3A_Add_Fragment_Relation>`_
 
         """
-        req_url = (
-            self.url
-            + self.path
-            + "/%s/%s/%s/%s" % (ddname, fragmentId, relationName, relationFragmentId)
-        )
         try:
-            r_ci_add_rel = requests.get(
-                req_url, verify=self._ssl_verify, headers=self._full_header
+            return self._add_fragment_relation(
+                ddname, fragmentId, relationName, relationFragmentId
             )
-            r_ci_add_rel.raise_for_status()
-            return r_ci_add_rel
 
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err}")
 
         except Exception as err:
             print(f"Other error occurred: {err}")
+
+    def _related_ids(self, ddname, fragmentId, relationName):
+        # without columns the list operation returns only the Ids of the related fragments
+        return set(
+            row["ID"]
+            for row in self.iter_fragment_relations(ddname, fragmentId, relationName)
+        )
+
+    def add_fragment_relations(
+        self, ddname, fragmentId, relationName, ids, *, max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """Adds many relations to a fragment at once, skipping the ones which already exist.
+
+        The existing relations are read once with :meth:`get_fragment_relations_list
+        <matrix42sdk.FragmentsDataService.get_fragment_relations_list>`; for every missing one,
+        :meth:`add_fragment_relation <matrix42sdk.FragmentsDataService.add_fragment_relation>` is
+        called, with up to `max_workers` calls running at the same time.
+
+        Args:
+            ddname (str):
+                The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            fragmentId (str):
+                Id of the Fragment of specified Data Definition
+            relationName (str):
+                Technical name of the relation (e.g. AttachedUsers).
+            ids (iterable):
+                Ids of the Data Definition's fragments that are added as relations.
+            max_workers (int):
+                Optional. Maximum number of service calls running at the same time.
+
+        Returns:
+            :class:`BulkReport <matrix42sdk.Bulk.BulkReport>` with the status "added", "skipped"
+            or "failed" for every id.
+        """
+        existing = self._related_ids(ddname, fragmentId, relationName)
+        plan = list()
+        for relationFragmentId in ids:
+            plan.append((relationFragmentId, relationFragmentId not in existing))
+            existing.add(relationFragmentId)
+
+        def add(item):
+            relationFragmentId, needed = item
+            if not needed:
+                return BulkItemResult(relationFragmentId, SKIPPED)
+            try:
+                response = self._add_fragment_relation(
+                    ddname, fragmentId, relationName, relationFragmentId
+                )
+                return BulkItemResult(relationFragmentId, ADDED, response=response)
+            except Exception as err:
+                return BulkItemResult(relationFragmentId, FAILED, error=err)
+
+        return run_bulk(add, plan, max_workers)
+
+    def delete_fragment_relations(
+        self, ddname, fragmentId, relationName, ids, *, max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """Deletes many relations of a fragment at once, skipping the ones which do not exist.
+
+        The bulk counterpart of :meth:`delete_fragment_relation
+        <matrix42sdk.FragmentsDataService.delete_fragment_relation>`, see
+        :meth:`add_fragment_relations <matrix42sdk.FragmentsDataService.add_fragment_relations>`.
+
+        Returns:
+            :class:`BulkReport <matrix42sdk.Bulk.BulkReport>` with the status "deleted", "skipped"
+            or "failed" for every id.
+        """
+        existing = self._related_ids(ddname, fragmentId, relationName)
+        plan = list()
+        for relationFragmentId in ids:
+            plan.append((relationFragmentId, relationFragmentId in existing))
+            existing.discard(relationFragmentId)
+
+        def delete(item):
+            relationFragmentId, needed = item
+            if not needed:
+                return BulkItemResult(relationFragmentId, SKIPPED)
+            try:
+                response = self._delete_fragment_relation(
+                    ddname, fragmentId, relationName, relationFragmentId
+                )
+                return BulkItemResult(relationFragmentId, DELETED, response=response)
+            except Exception as err:
+                return BulkItemResult(relationFragmentId, FAILED, error=err)
+
+        return run_bulk(delete, plan, max_workers)
+
+    def _id_chunks(self, req_url, ids, columns=None):
+        payload = list_params(
+            where=where_ids_in([]), columns=columns, pageSize=MAX_IDS_PER_QUERY
+        )
+        return chunk_ids(ids, len(req_url) + 1 + _sent_length(payload))
+
+    def _load_ids_chunk(self, req_url, chunk, columns=None):
+        """Returns the rows of the fragments with the given Ids, keyed by the Id as given by the caller."""
+        payload = list_params(
+            where=where_ids_in(chunk), columns=columns, pageSize=len(chunk)
+        )
+        # Ids are GUIDs, the server may spell them in another case than the caller
+        requested = dict((str(fragmentId).lower(), fragmentId) for fragmentId in chunk)
+        rows = dict()
+        for row in self._get_list(req_url, payload):
+            fragmentId = requested.get(str(row.get("ID")).lower())
+            if fragmentId is not None:
+                rows[fragmentId] = row
+        return rows
+
+    def _read_timestamps(self, ddname, ids):
+        """Returns the current TimeStamp of each of the fragments which exist, keyed by Id."""
+        req_url = self.url + self.path + "/%s" % ddname
+        rows = self._load_ids_chunk(req_url, ids, columns="ID, TimeStamp")
+        return dict((fragmentId, row["TimeStamp"]) for fragmentId, row in rows.items())
+
+    def get_fragments_by_ids(
+        self, ddname, ids, *, columns=None, max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """Reads many fragments of a Data Definition by their Ids with a handful of list queries.
+
+        Instead of one :meth:`get_fragment <matrix42sdk.FragmentsDataService.get_fragment>` call per Id,
+        the Ids are put into "ID IN (...)" where clauses of :meth:`get_fragments_list
+        <matrix42sdk.FragmentsDataService.get_fragments_list>`, chunked so that no request URL exceeds
+        :data:`MAX_URL_LENGTH`. The chunks are loaded concurrently.
+
+        HTTP errors are raised instead of printed, as a partial result would look complete.
+
+        Args:
+            ddname (str):
+                The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            ids (iterable):
+                Ids of the fragments. Duplicates are loaded once.
+            columns (str):
+                Optional. A-SQL Column expression, e.g. "Name, Parent.Name as ParentName". The ID column
+                is added if missing. Without columns, only the Ids are returned.
+            max_workers (int):
+                Optional. Maximum number of list queries running at the same time.
+
+        Returns:
+            FragmentsByIds: named tuple of `found`, a dict of the fragments keyed by Id in the order of
+            `ids`, and `missing`, the list of Ids which do not exist or are not allowed for the caller.
+        """
+        ids = list(dict.fromkeys(ids))
+        columns = _with_id_column(columns)
+        req_url = self.url + self.path + "/%s" % ddname
+        chunks = self._id_chunks(req_url, ids, columns)
+
+        rows = dict()
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="matrix42sdk-ids"
+        ) as executor:
+            for chunk_rows in executor.map(
+                lambda chunk: self._load_ids_chunk(req_url, chunk, columns), chunks
+            ):
+                rows.update(chunk_rows)
+
+        found = collections.OrderedDict((i, rows[i]) for i in ids if i in rows)
+        return FragmentsByIds(found, [i for i in ids if i not in rows])
+
+    def update_fragments(
+        self,
+        ddname,
+        updates,
+        *,
+        max_workers=DEFAULT_MAX_WORKERS,
+        max_retries=DEFAULT_CONFLICT_RETRIES,
+    ):
+        """Updates many fragments of a Data Definition at once, with optimistic concurrency.
+
+        The bulk counterpart of :meth:`update_fragment <matrix42sdk.FragmentsDataService.update_fragment>`.
+        The current TimeStamps are read with one "ID IN (...)" list query per chunk of fragments,
+        and the updates of a chunk are written by the worker pool while the next chunk is read.
+        When the server reports a concurrency conflict, only the TimeStamp of that fragment is read
+        again and the update is retried, up to `max_retries` times.
+
+        Args:
+            ddname (str):
+                The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            updates (iterable):
+                (ID, changes) pairs, or a dict of changes keyed by ID. The changes are a dict of
+                attributes with their new values. If they contain a TimeStamp, it is used for the
+                first attempt instead of reading it.
+            max_workers (int):
+                Optional. Maximum number of service calls running at the same time.
+            max_retries (int):
+                Optional. Number of retries with a refreshed TimeStamp after concurrency conflicts.
+
+        Returns:
+            :class:`BulkReport <matrix42sdk.Bulk.BulkReport>` with the status "updated", "conflict"
+            or "failed" for every fragment, in the order of `updates`.
+        """
+        if isinstance(updates, dict):
+            updates = updates.items()
+        items = list(enumerate(updates))
+        results = [None] * len(items)
+        put_url = self.url + self.path + "/%s?full=true" % ddname
+
+        def write(index, fragmentId, changes, timeStamp):
+            response = None
+            for attempt in range(max_retries + 1):
+                if attempt:
+                    timeStamp = self._read_timestamps(ddname, [fragmentId]).get(
+                        fragmentId
+                    )
+                    if timeStamp is None:
+                        error = LookupError("Fragment %s does not exist" % fragmentId)
+                        results[index] = BulkItemResult(fragmentId, FAILED, error=error)
+                        return
+                body = dict(changes, ID=fragmentId, TimeStamp=timeStamp)
+                response = self._request("PUT", put_url, data=Codec.dumps(body))
+                # a conflict means the server holds a newer version, drop the cached one as well
+                self._cache_invalidate([fragmentId])
+                if not is_concurrency_conflict(response):
+                    response.raise_for_status()
+                    results[index] = BulkItemResult(
+                        fragmentId, UPDATED, response=response
+                    )
+                    return
+            error = HTTPError("Concurrency conflict persisted", response=response)
+            results[index] = BulkItemResult(fragmentId, CONFLICT, error, response)
+
+        def guarded_write(index, fragmentId, changes, timeStamp):
+            try:
+                write(index, fragmentId, changes, timeStamp)
+            except Exception as err:
+                results[index] = BulkItemResult(fragmentId, FAILED, error=err)
+
+        def read(chunk):
+            try:
+                ids = [fragmentId for _, (fragmentId, _) in chunk]
+                return chunk, self._read_timestamps(ddname, ids), None
+            except Exception as err:
+                return chunk, dict(), err
+
+        def dispatch(executor, chunk, timeStamps, error):
+            # queue the writes of a chunk whose TimeStamps have been read
+            for index, (fragmentId, changes) in chunk:
+                if error is not None:
+                    results[index] = BulkItemResult(fragmentId, FAILED, error=error)
+                elif fragmentId not in timeStamps:
+                    missing = LookupError("Fragment %s does not exist" % fragmentId)
+                    results[index] = BulkItemResult(fragmentId, FAILED, error=missing)
+                else:
+                    timeStamp = timeStamps[fragmentId]
+                    executor.submit(guarded_write, index, fragmentId, changes, timeStamp)
+
+        unread = dict(
+            (fragmentId, (index, (fragmentId, changes)))
+            for index, (fragmentId, changes) in items
+            if "TimeStamp" not in changes
+        )
+        list_url = self.url + self.path + "/%s" % ddname
+        chunks = [
+            [unread[fragmentId] for fragmentId in chunk]
+            for chunk in self._id_chunks(list_url, list(unread), "ID, TimeStamp")
+        ]
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="matrix42sdk-bulk"
+        ) as executor:
+            for index, (fragmentId, changes) in items:
+                if "TimeStamp" in changes:
+                    executor.submit(
+                        guarded_write, index, fragmentId, changes, changes["TimeStamp"]
+                    )
+
+            # keep one chunk read ahead, so that its writes queue up behind the current ones
+            reads = set()
+            for _ in range(2):
+                if chunks:
+                    reads.add(executor.submit(read, chunks.pop(0)))
+            while reads:
+                done, reads = wait(reads, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if chunks:
+                        reads.add(executor.submit(read, chunks.pop(0)))
+                    dispatch(executor, *future.result())
+
+        return BulkReport(results)
+
+    def revalidate_cache(self, ddname, *, refetch=True, max_workers=DEFAULT_MAX_WORKERS):
+        """Checks the cached fragments of a Data Definition against the server and renews the outdated ones.
+
+        Instead of loading every cached fragment again, their current TimeStamps are read with one
+        list query (columns "ID, TimeStamp", where "ID IN (...)") per chunk of fragments. Only
+        fragments whose TimeStamp moved are loaded again with
+        :meth:`get_fragment <matrix42sdk.FragmentsDataService.get_fragment>`; fragments deleted on
+        the server are dropped.
+
+        Args:
+            ddname (str):
+                The technical name of the Data Definition (e.g. SPSActivityClassBase)
+            refetch (bool):
+                Optional. Load outdated fragments again. If False, they are only dropped from the cache.
+            max_workers (int):
+                Optional. Maximum number of service calls running at the same time.
+
+        Returns:
+            :class:`BulkReport <matrix42sdk.Bulk.BulkReport>` with the status "unchanged", "refreshed",
+            "invalidated", "deleted" or "failed" for every cached fragment. Empty without a cache.
+        """
+        if self._cache is None:
+            return BulkReport()
+
+        cached = self._cache.timestamps("fragment", ddname)
+        list_url = self.url + self.path + "/%s" % ddname
+        chunks = self._id_chunks(list_url, list(cached), "ID, TimeStamp")
+
+        def check(chunk):
+            try:
+                current = self._read_timestamps(ddname, chunk)
+            except Exception as err:
+                return [BulkItemResult(i, FAILED, error=err) for i in chunk]
+            results = list()
+            for fragmentId in chunk:
+                if fragmentId not in current:
+                    self._cache.invalidate(("fragment", ddname, fragmentId))
+                    results.append(BulkItemResult(fragmentId, DELETED))
+                elif cached[fragmentId] == current[fragmentId]:
+                    results.append(BulkItemResult(fragmentId, UNCHANGED))
+                else:
+                    self._cache.invalidate(("fragment", ddname, fragmentId))
+                    results.append(BulkItemResult(fragmentId, INVALIDATED))
+            return results
+
+        def refresh(item):
+            if item.status != INVALIDATED or not refetch:
+                return item
+            try:
+                self._load_fragment(ddname, item.id)
+                return BulkItemResult(item.id, REFRESHED)
+            except Exception as err:
+                return BulkItemResult(item.id, FAILED, error=err)
+
+        checked = list()
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="matrix42sdk-ids"
+        ) as executor:
+            for results in executor.map(check, chunks):
+                checked.extend(results)
+        return run_bulk(refresh, checked, max_workers)
@@ -1,7 +1,10 @@
-import json
-import requests
 from urllib.parse import urlencode
+from matrix42sdk import Codec
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
 from matrix42sdk.AuthNClient import Matrix42RestClient
+from matrix42sdk.Lazy import LazyBatch
+from matrix42sdk.Pagination import DEFAULT_MAX_WORKERS
+from matrix42sdk.Streaming import iter_members, stream_response
 from requests.exceptions import HTTPError
 
 
@@ -19,7 +22,7 @@ class ObjectsDataService(Matrix42RestClient):
     def __init__(self, _path=None, _full_header=None, **kwargs):
         super().__init__(**kwargs)
         self._path = "/M42Services/api/data/objects"
-        self._full_header = self.get_matrix42_access_header()
+        self._fragments_client = None
 
     @property
     def path(self):
@@ -29,7 +32,35 @@ class ObjectsDataService(Matrix42RestClient):
     def path(self, value):
         self._path = value
 
-    def get_object(self, ciName, objectId, full="true"):
+    def _read_object(self, ciName, objectId, full):
+        # served from the cache or shared with identical reads in flight; raises HTTP errors
+        cache_key = ("object", ciName, objectId, full)
+        body = self._cache_lookup(cache_key)
+        if body is not None:
+            return Codec.loads(body)
+        req_url = self.url + self.path + "/%s/%s?full=%s" % (ciName, objectId, full)
+        return self._coalesced(cache_key, lambda: self._load_object(req_url, cache_key))
+
+    def _fragments_service(self):
+        # the lazy objects read multi-fragments and relations through the Fragments Data Service
+        if self._fragments_client is None:
+            self._fragments_client = FragmentsDataService(**self._shared_kwargs())
+        return self._fragments_client
+
+    def _load_object(self, req_url, cache_key):
+        r_ci_get = self._request("GET", req_url)
+        r_ci_get.raise_for_status()
+
+        if r_ci_get.status_code == 404:
+            return Exception(
+                "The object with the specified Configuration Item and Object ID is not present, or not allowed for the caller."
+            )
+
+        ci_object = Codec.loads(r_ci_get.content)
+        self._cache_store(cache_key, r_ci_get.content, ci_object)
+        return ci_object
+
+    def get_object(self, ciName, objectId, full="true", stream=False):
         """Gets the whole Object with the specified Configuration Item name and object ID.
 
         The Service returns exclusively the data belonged to object (e.g. attributes, N:1 relations).
@@ -47,6 +78,10 @@ class ObjectsDataService(Matrix42RestClient):
             full (str):
                 Optional. Signals to load the whole Object with all related multi-fragments data, otherwise, all multi-fragments are omitted.
                 While Rest API defaults to 'false', this SDK does 'true'.
+            stream (bool):
+                Optional. Returns an iterator which decodes the response incrementally and yields
+                the (name, value) pairs of the Object, e.g. one Data Definition fragment at a time.
+                Streamed reads bypass the cache.
 
         Returns:
             The whole Object with all defined Data Definitions and attributes. The
@@ -57,18 +92,16 @@ class ObjectsDataService(Matrix42RestClient):
         # full=true is important for getting complete object, including version
         req_url = self.url + self.path + "/%s/%s?full=%s" % (ciName, objectId, full)
         try:
+            if stream:
+                r_ci_get = self._request("GET", req_url, stream=True)
+                try:
+                    r_ci_get.raise_for_status()
+                except HTTPError:
+                    r_ci_get.close()
+                    raise
+                return stream_response(r_ci_get, iter_members)
 
-            r_ci_get = requests.get(
-                req_url, verify=self._ssl_verify, headers=self._full_header
-            )
-            r_ci_get.raise_for_status()
-
-            if r_ci_get.status_code == 404:
-                return Exception(
-                    "The object with the specified Configuration Item and Object ID is not present, or not allowed for the caller."
-                )
-
-            return json.loads(r_ci_get.text)
+            return self._read_object(ciName, objectId, full)
 
         except HTTPError as http_err:
             print(f"HTTP error occurred: {http_err}")
@@ -76,6 +109,67 @@ class ObjectsDataService(Matrix42RestClient):
         except Exception as err:
             print(f"Other error occurred: {err}")
 
+    def get_lazy_object(self, ciName, objectId, *, fragments=None, relations=None):
+        """Gets the Object with its single fragments only, loading everything else when accessed.
+
+        The Object is read with ``full=false``. Multi-fragments are loaded the first time they are
+        accessed, and relations with :meth:`LazyObject.related <matrix42sdk.Lazy.LazyObject.related>`.
+
+        Unlike `get_object`, HTTP errors are raised instead of printed.
+
+        Args:
+            ciName (str):
+                Required. Technical name of the Configuration Item (e.g. for Incident is "SPSActivityTypeIncident")
+            objectId (str):
+                Required. Id of the Object of specified Configuration Item
+            fragments (dict):
+                Optional. Multi-fragments which will be accessed: A-SQL Column expression keyed by
+                Data Definition name, e.g. ``{"SPSCommonClassBase": "Name, Value"}``. They are loaded
+                with narrow list queries instead of the whole object.
+            relations (dict):
+                Optional. Relations which will be accessed: A-SQL Column expression keyed by
+                (Data Definition name, relation name).
+
+        Returns:
+            :class:`LazyObject <matrix42sdk.Lazy.LazyObject>`
+        """
+        return self.get_lazy_objects(
+            ciName, [objectId], fragments=fragments, relations=relations
+        )[0]
+
+    def get_lazy_objects(
+        self,
+        ciName,
+        ids,
+        *,
+        fragments=None,
+        relations=None,
+        max_workers=DEFAULT_MAX_WORKERS,
+    ):
+        """Gets many Objects lazily, see :meth:`get_lazy_object <matrix42sdk.ObjectsDataService.get_lazy_object>`.
+
+        The Objects are read concurrently. The first access to a hinted multi-fragment or relation
+        of any of them loads it for all of them at once, with "[Expression-ObjectID] IN (...)" list
+        queries for multi-fragments and concurrent relation list queries.
+
+        Args:
+            ciName (str):
+                Required. Technical name of the Configuration Item
+            ids (iterable):
+                Required. Ids of the Objects. Duplicates are loaded once.
+            fragments (dict):
+                Optional. Hinted multi-fragments, see `get_lazy_object`.
+            relations (dict):
+                Optional. Hinted relations, see `get_lazy_object`.
+            max_workers (int):
+                Optional. Maximum number of requests running at the same time.
+
+        Returns:
+            list: :class:`LazyObject <matrix42sdk.Lazy.LazyObject>` in the order of `ids`.
+        """
+        batch = LazyBatch(self, ciName, fragments, relations, max_workers)
+        return batch.load(list(dict.fromkeys(ids)))
+
     def update_object(self, ciName, jsonBody, full="true"):
         """Updates the object of the specified Configuration Item name and object ID.
 
@@ -102,10 +196,9 @@ class ObjectsDataService(Matrix42RestClient):
         put_url = self.url + self.path + "/%s?full=%s" % (ciName, full)
 
         try:
-            r_ci_update = requests.put(
-                put_url, verify=self._ssl_verify, headers=self._full_header, json=jsonBody
-            )
+            r_ci_update = self._request("PUT", put_url, data=Codec.encode_body(jsonBody))
             r_ci_update.raise_for_status()
+            self._cache_invalidate_body(jsonBody)
 
             if r_ci_update.status_code == 500:
                 return Exception(
@@ -138,10 +231,9 @@ class ObjectsDataService(Matrix42RestClient):
         put_url = self.url + self.path + "/%s" % ciName
         try:
 
-            r_ci_create = requests.post(
-                put_url, verify=self._ssl_verify, headers=self._full_header, json=jsonBody
-            )
+            r_ci_create = self._request("POST", put_url, data=Codec.encode_body(jsonBody))
             r_ci_create.raise_for_status()
+            self._forget_in_flight()
 
             if r_ci_create.status_code == 401:
                 return Exception("Unauthorized")
@@ -177,10 +269,9 @@ class ObjectsDataService(Matrix42RestClient):
         put_url = self.url + self.path + "/%s/%s" % (ciName, objectId)
         try:
 
-            r_ci_delete = requests.delete(
-                put_url, verify=self._ssl_verify, headers=self._full_header
-            )
+            r_ci_delete = self._request("DELETE", put_url)
             r_ci_delete.raise_for_status()
+            self._cache_invalidate([objectId])
 
             return r_ci_delete
 
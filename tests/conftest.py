@@ -1,3 +1,4 @@
+import json
 import os
 import pytest
 import requests
@@ -19,3 +20,67 @@ def get_url() -> str:
 @pytest.fixture
 def get_api_token() -> Optional[str]:
     return os.environ.get("MATRIX42SDK_API_TOKEN", None)
+
+
+class FakeResponse(object):
+    """Stands in for `requests.Response` for tests that must not reach an ESM portal."""
+
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.content = b"" if body is None else json.dumps(body).encode()
+        self.text = self.content.decode()
+        self.headers = headers or {}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=1):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(
+                "%s Error" % self.status_code, response=self
+            )
+
+
+class FakeSession(object):
+    """Records every call and answers with `handler(method, url, **kwargs)`."""
+
+    def __init__(self, handler=None):
+        self.calls = []
+        self.handler = handler or (lambda method, url, **kwargs: FakeResponse())
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if "ApiToken" in url:
+            response = FakeResponse(body={"RawToken": "access-token"})
+        else:
+            response = self.handler(method, url, **kwargs)
+        hooks = kwargs.get("hooks") or {}
+        if "response" in hooks:
+            hooks["response"](response)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+@pytest.fixture
+def fake_session(monkeypatch) -> FakeSession:
+    monkeypatch.delenv("MATRIX42_URL", raising=False)
+    monkeypatch.delenv("MATRIX42SDK_API_TOKEN", raising=False)
+    return FakeSession()
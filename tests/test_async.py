@@ -0,0 +1,220 @@
+import asyncio
+import pytest
+import threading
+from matrix42sdk.Cache import ResponseCache
+from matrix42sdk.Instrumentation import Instrumentation
+from matrix42sdk.Resilience import CircuitBreaker, TransportPolicy
+from matrix42sdk.TokenCache import AccessTokenCache
+
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from matrix42sdk.api_endpoints.async_fragments import (  # noqa: E402
+    AsyncFragmentsDataService,
+)
+from matrix42sdk.api_endpoints.async_objects import AsyncObjectsDataService  # noqa: E402
+
+
+async def _serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, "http://127.0.0.1:%s" % port
+
+
+def _routes(seen):
+    async def token(request):
+        return web.json_response({"RawToken": "access-token"})
+
+    async def fragment(request):
+        seen.append(request.headers["Authorization"])
+        return web.json_response({"ID": request.match_info["id"]})
+
+    async def fragments(request):
+        return web.json_response([{"where": request.query["where"]}])
+
+    async def create(request):
+        return web.json_response(await request.json())
+
+    return [
+        web.post("/m42Services/api/ApiToken/GenerateAccessTokenFromApiToken/", token),
+        web.get("/M42Services/api/data/fragments/{dd}/{id}", fragment),
+        web.get("/M42Services/api/data/fragments/{dd}", fragments),
+        web.post("/M42Services/api/data/objects/{ci}", create),
+    ]
+
+
+class TestAsyncServices:
+    def test_endpoints_do_not_block(self, fake_session):
+        seen = []
+
+        async def scenario():
+            runner, url = await _serve(_routes(seen))
+            cache = AccessTokenCache()
+            try:
+                async with AsyncFragmentsDataService(
+                    _url=url, _api_token="api-token", _token_cache=cache
+                ) as frg, AsyncObjectsDataService(
+                    _url=url, _api_token="api-token", _token_cache=cache
+                ) as obj:
+                    fragments = await frg.gather(
+                        *(frg.get_fragment("DD", str(i)) for i in range(10)), limit=3
+                    )
+                    listed = await frg.get_fragments_list("DD", where="Name = 'x'")
+                    created = await obj.create_object("CI", {"Name": "x"})
+                    return fragments, listed, await created.json()
+            finally:
+                await runner.cleanup()
+
+        fragments, listed, created = asyncio.run(scenario())
+        assert [f["ID"] for f in fragments] == [str(i) for i in range(10)]
+        assert listed == [{"where": "Name = 'x'"}]
+        assert created == {"Name": "x"}
+        assert set(seen) == {"Bearer access-token"}
+
+    def test_server_errors_count_for_the_circuit_breaker(self, fake_session):
+        async def token(request):
+            return web.json_response({"RawToken": "access-token"})
+
+        async def failing(request):
+            if request.match_info["id"] == "conflict":
+                return web.Response(status=500, text="Concurrency violation")
+            return web.Response(status=500, text="Internal error")
+
+        routes = [
+            web.post("/m42Services/api/ApiToken/GenerateAccessTokenFromApiToken/", token),
+            web.get("/M42Services/api/data/fragments/{dd}/{id}", failing),
+        ]
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+        async def scenario():
+            runner, url = await _serve(routes)
+            try:
+                async with AsyncFragmentsDataService(
+                    _url=url,
+                    _api_token="api-token",
+                    _token_cache=AccessTokenCache(),
+                    _policy=TransportPolicy(breaker=breaker),
+                ) as frg:
+                    response = await frg._request("GET", url + frg.path + "/DD/conflict")
+                    conflicts = breaker.failures
+                    await frg._request("GET", url + frg.path + "/DD/1")
+                    return response.status, conflicts
+            finally:
+                await runner.cleanup()
+
+        status, conflicts = asyncio.run(scenario())
+        assert status == 500
+        # a rejected write is no sign of an unhealthy server, other 500 answers are
+        assert conflicts == 0
+        assert breaker.failures == 1
+
+    def test_shares_the_response_cache_and_invalidates_it_on_writes(self, fake_session):
+        reads = []
+
+        async def token(request):
+            return web.json_response({"RawToken": "access-token"})
+
+        async def fragment(request):
+            reads.append(request.match_info["id"])
+            return web.json_response({"ID": request.match_info["id"], "TimeStamp": "1"})
+
+        async def update(request):
+            return web.Response(status=204)
+
+        routes = [
+            web.post("/m42Services/api/ApiToken/GenerateAccessTokenFromApiToken/", token),
+            web.get("/M42Services/api/data/fragments/{dd}/{id}", fragment),
+            web.put("/M42Services/api/data/fragments/{dd}", update),
+        ]
+        cache = ResponseCache()
+
+        async def scenario():
+            runner, url = await _serve(routes)
+            try:
+                async with AsyncFragmentsDataService(
+                    _url=url,
+                    _api_token="api-token",
+                    _token_cache=AccessTokenCache(),
+                    _cache=cache,
+                ) as frg:
+                    await frg.get_fragment("DD", "f1")
+                    await frg.get_fragment("DD", "f1")
+                    cached = len(reads)
+                    await frg.update_fragment("DD", {"ID": "f1", "Name": "x"})
+                    await frg.get_fragment("DD", "f1")
+                    return cached
+            finally:
+                await runner.cleanup()
+
+        cached = asyncio.run(scenario())
+        assert cached == 1
+        # the update dropped the cached fragment, so it is read again
+        assert reads == ["f1", "f1"]
+
+    def test_instrumentation_counts_the_bytes_read(self, fake_session):
+        body = b'{"ID": "f1", "Name": "chunked"}'
+
+        async def token(request):
+            return web.json_response({"RawToken": "access-token"})
+
+        async def fragment(request):
+            # a chunked answer carries no Content-Length
+            response = web.StreamResponse()
+            response.enable_chunked_encoding()
+            await response.prepare(request)
+            await response.write(body)
+            await response.write_eof()
+            return response
+
+        routes = [
+            web.post("/m42Services/api/ApiToken/GenerateAccessTokenFromApiToken/", token),
+            web.get("/M42Services/api/data/fragments/{dd}/{id}", fragment),
+        ]
+        events = []
+        instrumentation = Instrumentation()
+        instrumentation.add_response_hook(events.append)
+
+        async def scenario():
+            runner, url = await _serve(routes)
+            try:
+                async with AsyncFragmentsDataService(
+                    _url=url,
+                    _api_token="api-token",
+                    _token_cache=AccessTokenCache(),
+                    _instrumentation=instrumentation,
+                ) as frg:
+                    return await frg.get_fragment("DD", "f1")
+            finally:
+                await runner.cleanup()
+
+        assert asyncio.run(scenario())["Name"] == "chunked"
+        assert events[-1].bytes_received == len(body)
+
+    def test_rate_limiter_is_not_called_on_the_event_loop(self, fake_session):
+        threads = []
+
+        class RecordingLimiter(object):
+            def reserve(self, method):
+                threads.append(threading.current_thread())
+                return 0.0
+
+        async def scenario():
+            runner, url = await _serve(_routes([]))
+            try:
+                async with AsyncFragmentsDataService(
+                    _url=url,
+                    _api_token="api-token",
+                    _token_cache=AccessTokenCache(),
+                    _rate_limiter=RecordingLimiter(),
+                ) as frg:
+                    return await frg.get_fragment("DD", "f1")
+            finally:
+                await runner.cleanup()
+
+        assert asyncio.run(scenario())["ID"] == "f1"
+        assert threads and threading.main_thread() not in threads
@@ -0,0 +1,160 @@
+import json
+import re
+from matrix42sdk.api_endpoints.fragments import (
+    MAX_URL_LENGTH,
+    FragmentsDataService,
+    chunk_ids,
+    list_params,
+    where_ids_in,
+)
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+
+
+def _sent(params):
+    # Requests quotes the spaces list_params keeps
+    return params.replace(" ", "%20")
+
+
+REL_URL = URL + "/M42Services/api/data/fragments/DD/42/AttachedUsers"
+
+
+def _relations_handler(existing, failing=()):
+    def handler(method, url, params=None, **kwargs):
+        if url == REL_URL:
+            return FakeResponse(body=[{"ID": i} for i in existing])
+        if url.rsplit("/", 1)[1] in failing:
+            return FakeResponse(500)
+        return FakeResponse(204)
+
+    return handler
+
+
+class TestBulkRelations:
+    def test_add_skips_existing_and_reports(self, fake_session):
+        fake_session.handler = _relations_handler(["a"], failing=["c"])
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        report = frg.add_fragment_relations(
+            "DD", "42", "AttachedUsers", ["a", "b", "c", "b"]
+        )
+        assert [(item.id, item.status) for item in report] == [
+            ("a", "skipped"),
+            ("b", "added"),
+            ("c", "failed"),
+            ("b", "skipped"),
+        ]
+        assert report.failed == ["c"]
+        assert not report.ok
+        added = [url for method, url, _ in fake_session.calls if url.endswith("/b")]
+        assert added == [REL_URL + "/b"]
+
+    def test_delete_only_existing(self, fake_session):
+        fake_session.handler = _relations_handler(["a", "b"])
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        report = frg.delete_fragment_relations("DD", "42", "AttachedUsers", ["a", "x"])
+        assert report.with_status("deleted") == ["a"]
+        assert report.with_status("skipped") == ["x"]
+        deletes = [url for method, url, _ in fake_session.calls if method == "DELETE"]
+        assert deletes == [REL_URL + "/a"]
+
+
+class _FragmentStore(object):
+    """Server side of the TimeStamp based optimistic concurrency."""
+
+    def __init__(self, stamps, bump_once=()):
+        self.stamps = dict(stamps)
+        self.bump_once = set(bump_once)
+        self.written = dict()
+
+    def __call__(self, method, url, params=None, data=None, **kwargs):
+        if method == "GET":
+            where = parse_qs(params)["where"][0]
+            ids = re.findall(r"'([^']*)'", where)
+            rows = [
+                {"ID": i, "TimeStamp": self.stamps[i]} for i in ids if i in self.stamps
+            ]
+            return FakeResponse(body=rows)
+        body = json.loads(data)
+        fragment_id = body["ID"]
+        if fragment_id in self.bump_once:
+            # somebody else updated the fragment in the meantime
+            self.bump_once.discard(fragment_id)
+            self.stamps[fragment_id] += "'"
+        if body["TimeStamp"] != self.stamps[fragment_id]:
+            return FakeResponse(500, body="Concurrency violation, TimeStamp outdated")
+        self.stamps[fragment_id] += "+"
+        self.written[fragment_id] = body
+        return FakeResponse(204)
+
+
+class TestBulkUpdate:
+    def test_updates_with_conflict_retry(self, fake_session):
+        store = _FragmentStore({"a": "1", "b": "2", "c": "3"}, bump_once=["b"])
+        fake_session.handler = store
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        updates = [(i, {"Version": "2.0"}) for i in ["a", "b", "missing", "c"]]
+        report = frg.update_fragments("DD", updates, max_workers=2)
+
+        assert [(item.id, item.status) for item in report] == [
+            ("a", "updated"),
+            ("b", "updated"),
+            ("missing", "failed"),
+            ("c", "updated"),
+        ]
+        assert store.written["b"]["TimeStamp"] == "2'"
+        assert store.written["a"]["Version"] == "2.0"
+
+    def test_persistent_conflict_is_reported(self, fake_session):
+        store = _FragmentStore({"a": "1"})
+        fake_session.handler = store
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        report = frg.update_fragments("DD", {"a": {"TimeStamp": "0"}}, max_retries=0)
+        assert report.with_status("conflict") == ["a"]
+        assert not report.ok
+
+
+class TestFragmentsByIds:
+    def test_chunks_by_url_length(self):
+        ids = ["%036d" % i for i in range(100)]
+        chunks = chunk_ids(ids, fixed_length=200, max_length=1000)
+        assert [i for chunk in chunks for i in chunk] == ids
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert 200 + len(_sent(list_params(where=where_ids_in(chunk)))) <= 1000
+
+    def test_found_and_missing(self, fake_session):
+        store = _FragmentStore(dict(("%036d" % i, str(i)) for i in range(0, 200, 2)))
+        fake_session.handler = store
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        ids = ["%036d" % i for i in range(200)]
+        result = frg.get_fragments_by_ids("DD", ids + ids[:3], columns="TimeStamp")
+        assert list(result.found) == ids[::2]
+        assert result.missing == ids[1::2]
+        assert result.found[ids[4]] == {"ID": ids[4], "TimeStamp": "4"}
+
+        queries = [
+            kw["params"] for method, url, kw in fake_session.calls if method == "GET"
+        ]
+        assert len(queries) > 1
+        for params in queries:
+            assert parse_qs(params)["columns"] == ["ID, TimeStamp"]
+            url = URL + "/M42Services/api/data/fragments/DD?" + _sent(params)
+            assert len(url) <= MAX_URL_LENGTH
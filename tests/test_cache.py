@@ -0,0 +1,152 @@
+import json
+import re
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.Cache import ResponseCache
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+
+
+def _object_handler(method, url, **kwargs):
+    if "/objects/" in url:
+        return FakeResponse(
+            body={"ID": "o1", "SPSSoftwareTypeClassBase": {"ID": "o1", "TimeStamp": "t1"}}
+        )
+    if "?" in url:
+        return FakeResponse(
+            body={"ID": url.split("/")[-1].split("?")[0], "TimeStamp": "t1"}
+        )
+    if method == "GET":
+        return FakeResponse(body=[{"ID": "f1", "TimeStamp": "t2"}])
+    return FakeResponse(204)
+
+
+def _services(fake_session, cache):
+    kwargs = dict(_url=URL, _api_token="api-token", _session=fake_session, _cache=cache)
+    return FragmentsDataService(**kwargs), ObjectsDataService(**kwargs)
+
+
+def _reads(fake_session):
+    return [c for c in fake_session.calls if c[0] == "GET" and "ApiToken" not in c[1]]
+
+
+class TestResponseCache:
+    def test_hits_and_write_invalidation(self, fake_session):
+        fake_session.handler = _object_handler
+        cache = ResponseCache()
+        frg, obj = _services(fake_session, cache)
+
+        assert frg.get_fragment("DD", "f1") == frg.get_fragment("DD", "f1")
+        obj.get_object("CI", "o1")
+        obj.get_object("CI", "o1")
+        assert len(_reads(fake_session)) == 2
+        assert (cache.hits, cache.misses) == (2, 2)
+
+        # a fragment write through one service drops the object cached by the other one
+        frg.update_fragment("DD", json.dumps({"ID": "o1", "TimeStamp": "t1"}))
+        obj.get_object("CI", "o1")
+        frg.get_fragment("DD", "f1")
+        assert len(_reads(fake_session)) == 3
+
+        frg.delete_fragement("DD", "f1")
+        frg.get_fragment("DD", "f1")
+        assert len(_reads(fake_session)) == 4
+
+    def test_failed_write_keeps_the_cached_fragment(self, fake_session):
+        fake_session.handler = _object_handler
+        cache = ResponseCache()
+        frg, _ = _services(fake_session, cache)
+        frg.get_fragment("DD", "f1")
+
+        fake_session.handler = lambda method, url, **kwargs: FakeResponse(
+            403, {"ExceptionName": "Forbidden"}
+        )
+        frg.update_fragment("DD", {"ID": "f1", "Name": "x"})
+        frg.delete_fragement("DD", "f1")
+        assert ("fragment", "DD", "f1") in cache
+
+    def test_ids_match_regardless_of_case(self, fake_session):
+        guid = "8e2a5c1b-4f0d-4a1e-9b7c-0d3f6a2b9c11"
+        fake_session.handler = lambda method, url, **kwargs: (
+            FakeResponse(body={"ID": guid.upper(), "TimeStamp": "t1"})
+            if method == "GET"
+            else FakeResponse(204)
+        )
+        cache = ResponseCache()
+        frg, _ = _services(fake_session, cache)
+
+        frg.get_fragment("DD", guid)
+        assert ("fragment", "DD", guid.upper()) in cache
+        frg.get_fragment("DD", guid.upper())
+        assert len(_reads(fake_session)) == 1
+
+        # the server spells the Id in upper case, the caller writes it in lower case
+        frg.update_fragment("DD", {"ID": guid, "Name": "x"})
+        assert ("fragment", "DD", guid) not in cache
+
+        frg.get_fragment("DD", guid)
+        cache.observe_timestamp(guid.upper(), "t2")
+        assert len(cache) == 0
+
+    def test_newer_timestamp_invalidates(self, fake_session):
+        fake_session.handler = _object_handler
+        cache = ResponseCache()
+        frg, _ = _services(fake_session, cache)
+
+        frg.get_fragment("DD", "f1")
+        frg.get_fragments_list("DD", columns="ID, TimeStamp")
+        assert ("fragment", "DD", "f1") not in cache
+
+    def test_lru_and_memory_bound(self):
+        cache = ResponseCache(max_entries=2, max_bytes=10, ttl=None)
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        cache.get("a")
+        cache.put("c", b"1234")
+        assert "b" not in cache and "a" in cache
+        cache.put("d", b"123456789")
+        assert len(cache) == 1 and cache.nbytes == 9
+        assert cache.stats()["evictions"] == 3
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0)
+        cache.put("a", b"1")
+        assert cache.get("a") is None
+
+
+class TestRevalidation:
+    def test_only_moved_timestamps_are_refetched(self, fake_session):
+        server = {"a": "1", "b": "1", "c": "1"}
+
+        def handler(method, url, params=None, **kwargs):
+            if params is not None:
+                ids = re.findall(r"'([^']*)'", parse_qs(params)["where"][0])
+                rows = [{"ID": i, "TimeStamp": server[i]} for i in ids if i in server]
+                return FakeResponse(body=rows)
+            fragment_id = url.split("/")[-1].split("?")[0]
+            return FakeResponse(
+                body={"ID": fragment_id, "TimeStamp": server[fragment_id]}
+            )
+
+        fake_session.handler = handler
+        cache = ResponseCache()
+        frg, _ = _services(fake_session, cache)
+        for fragment_id in "abc":
+            frg.get_fragment("DD", fragment_id)
+
+        server["b"] = "2"
+        del server["c"]
+        report = frg.revalidate_cache("DD")
+
+        assert sorted((item.id, item.status) for item in report) == [
+            ("a", "unchanged"),
+            ("b", "refreshed"),
+            ("c", "deleted"),
+        ]
+        reads = [c for c in _reads(fake_session) if c[2].get("params") is None]
+        assert [url.split("/")[-1] for _, url, _ in reads[3:]] == ["b?full=true"]
+        assert frg.get_fragment("DD", "b")["TimeStamp"] == "2"
+        assert ("fragment", "DD", "c") not in cache
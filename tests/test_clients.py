@@ -0,0 +1,44 @@
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.Clients import ClientFactory
+from matrix42sdk.TokenCache import AccessTokenCache
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+
+def test_construction_sends_no_request(fake_session):
+    FragmentsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+    )
+    ObjectsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+    )
+    assert fake_session.calls == []
+
+
+def test_factory_clients_share_session_and_token(fake_session):
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(body={"ID": "f1"})
+    factory = ClientFactory(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+    )
+    frg, obj = factory.fragments(), factory.objects()
+    assert frg.session is obj.session is factory.session
+    assert frg.policy is obj.policy
+    assert frg.schema_registry is factory.fragments().schema_registry
+    assert fake_session.calls == []
+
+    frg.get_fragment("SPSSoftwareTypeClassBase", "f1")
+    obj.get_object("SPSSoftwareType", "f1")
+    token_calls = [call for call in fake_session.calls if "ApiToken" in call[1]]
+    assert len(token_calls) == 1 and len(fake_session.calls) == 3
@@ -0,0 +1,99 @@
+import threading
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.Coalescing import SingleFlight
+from matrix42sdk.TokenCache import AccessTokenCache
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+CALLERS = 8
+
+
+def _blocking_handler(release):
+    def handler(method, url, **kwargs):
+        release.wait(5)
+        if "/objects/" in url:
+            return FakeResponse(
+                body={"ID": "o1", "SPSSoftwareTypeClassBase": {"ID": "o1"}}
+            )
+        if "?" in url:
+            return FakeResponse(body={"ID": "f1", "TimeStamp": "t1"})
+        return FakeResponse(body=[{"ID": "f1"}, {"ID": "f2"}])
+
+    return handler
+
+
+def _concurrently(call, flight):
+    results = [None] * CALLERS
+
+    def run(index):
+        results[index] = call()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    # every caller but the first one has joined the request in flight
+    while flight.coalesced < CALLERS - 1:
+        threading.Event().wait(0.001)
+    return results, threads
+
+
+def _services(fake_session, flight):
+    kwargs = dict(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+        _single_flight=flight,
+    )
+    return FragmentsDataService(**kwargs), ObjectsDataService(**kwargs)
+
+
+def _data_calls(fake_session):
+    return [c for c in fake_session.calls if "ApiToken" not in c[1]]
+
+
+def test_identical_reads_share_one_request(fake_session):
+    release = threading.Event()
+    fake_session.handler = _blocking_handler(release)
+    flight = SingleFlight()
+    frg, obj = _services(fake_session, flight)
+
+    for call in (
+        lambda: frg.get_fragment("DD", "f1"),
+        lambda: obj.get_object("CI", "o1"),
+        lambda: frg.get_fragments_list("DD", columns="Name", pageSize=2),
+    ):
+        before = len(_data_calls(fake_session))
+        flight.coalesced = 0
+        release.clear()
+        results, threads = _concurrently(call, flight)
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(_data_calls(fake_session)) == before + 1
+        assert all(result is results[0] for result in results)
+        assert results[0] is not None
+
+
+def test_errors_are_shared_and_writes_start_new_requests(fake_session):
+    flight = SingleFlight()
+    calls = list()
+
+    def failing():
+        calls.append(1)
+        raise ValueError("boom")
+
+    for _ in range(2):
+        try:
+            flight.do(("key",), failing)
+        except ValueError:
+            pass
+    # nothing stays in flight after a failure
+    assert len(calls) == 2
+
+    frg, _ = _services(fake_session, flight)
+    flight._calls[(frg._token_key(), "fragment", "DD", "f1")] = object()
+    frg.delete_fragement("DD", "f1")
+    assert flight._calls == dict()
@@ -0,0 +1,36 @@
+import json
+import pytest
+from matrix42sdk import Codec
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+DOCUMENT = {"ID": "1", "Name": "Größe", "Count": 3, "Tags": [1.5, None, True]}
+
+
+@pytest.fixture(params=[Codec.StdlibCodec, Codec.OrjsonCodec])
+def codec(request):
+    if request.param is Codec.OrjsonCodec and Codec.orjson is None:
+        pytest.skip("orjson is not installed")
+    Codec.set_codec(request.param)
+    yield request.param
+    Codec.set_codec(None)
+
+
+def test_round_trip(codec):
+    body = Codec.dumps(DOCUMENT)
+    assert isinstance(body, bytes)
+    assert json.loads(body) == DOCUMENT
+    assert Codec.loads(body) == DOCUMENT
+    assert Codec.loads(body.decode()) == DOCUMENT
+
+
+def test_update_fragment_takes_dict(codec, fake_session):
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(204)
+    frg = FragmentsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+
+    frg.update_fragment("DD", DOCUMENT)
+    frg.update_fragment("DD", json.dumps(DOCUMENT))
+    bodies = [kw["data"] for method, url, kw in fake_session.calls if method == "PUT"]
+    assert [json.loads(body) for body in bodies] == [DOCUMENT, DOCUMENT]
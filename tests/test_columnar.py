@@ -0,0 +1,68 @@
+import pytest
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Columnar import ColumnarResult, projection_names
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+
+ROWS = [
+    {"ID": "a", "Name": "x", "Count": 1, "Price": 2.5, "Active": True},
+    {"ID": "b", "Name": "x", "Count": None, "Price": 3, "Active": False},
+    {"ID": "c", "Name": None, "Count": 3, "Price": None, "Parent": "p"},
+]
+
+
+def test_projection_names():
+    columns = "ID, Name, ISNULL(Price, 0) as Price, [Parent.Name] AS ParentName"
+    assert projection_names(columns) == ["ID", "Name", "Price", "ParentName"]
+    assert projection_names(None) == ["ID"]
+
+
+def test_columns_round_trip():
+    result = ColumnarResult("Name, ID")
+    result.append_rows(ROWS[:2])
+    result.append_rows(ROWS[2:])
+    assert len(result) == 3
+    assert result.names == ["Name", "ID", "Count", "Price", "Active", "Parent"]
+    assert result["Count"].typecode == "q"
+    assert result["Price"].typecode == "d"
+    assert result["Name"].typecode is None
+    assert result["Name"].values[0] is result["Name"].values[1]
+
+    expected = [dict(row) for row in ROWS]
+    for row in expected:
+        for name in result.names:
+            row.setdefault(name, None)
+    assert list(result.iter_rows()) == expected
+
+    # a string in a number column turns it into a plain list
+    result.append_rows([{"ID": "d", "Count": "many"}])
+    assert list(result["Count"]) == [1, None, 3, "many"]
+
+
+def test_numpy_views():
+    numpy = pytest.importorskip("numpy")
+    result = ColumnarResult()
+    result.append_rows([{"ID": str(i), "Count": i} for i in range(5)])
+    result.append_rows([{"ID": "x", "Count": None}])
+    arrays = result.to_numpy()
+    assert not arrays["Count"].data.flags.owndata
+    assert arrays["Count"].dtype == numpy.int64
+    assert arrays["Count"].sum() == 10
+    assert arrays["Count"].mask.tolist() == [False] * 5 + [True]
+
+
+def test_get_fragments_columnar(fake_session):
+    def handler(method, url, params=None, **kwargs):
+        query = parse_qs(params)
+        page, size = int(query["pageNumber"][0]), int(query["pageSize"][0])
+        rows = [{"ID": str(i), "Count": i} for i in range(25)]
+        return FakeResponse(body=rows[page * size : (page + 1) * size])
+
+    fake_session.handler = handler
+    frg = FragmentsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+    result = frg.get_fragments_columnar("DD", columns="Count", page_size=10)
+    assert result.names == ["Count", "ID"]
+    assert list(result["Count"]) == list(range(25))
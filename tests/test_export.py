@@ -0,0 +1,80 @@
+import gzip
+import json
+import pytest
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Export import export_fragments, output_options
+from matrix42sdk.TokenCache import AccessTokenCache
+from requests.exceptions import HTTPError
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+ROWS = [{"ID": "f%03d" % i, "Name": "Software %d" % i, "Tags": [i]} for i in range(25)]
+
+
+def _pages(fail_page=None):
+    def handler(method, url, **kwargs):
+        query = parse_qs(kwargs["params"])
+        size, number = int(query["pageSize"][0]), int(query["pageNumber"][0])
+        if number == fail_page:
+            return FakeResponse(404, {"ExceptionName": "NotFound"})
+        return FakeResponse(body=ROWS[size * number : size * (number + 1)])
+
+    return handler
+
+
+def _service(fake_session):
+    return FragmentsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+    )
+
+
+def test_output_options_follow_the_file_name():
+    assert output_options("dump.csv.gz") == ("csv", "gzip")
+    assert output_options("dump.ndjson") == ("ndjson", None)
+    assert output_options("dump.xz", format="csv") == ("csv", "xz")
+
+
+def test_resumes_compressed_export_from_checkpoint(fake_session, tmp_path):
+    path, checkpoint = str(tmp_path / "dump.ndjson.gz"), str(tmp_path / "export.json")
+    kwargs = dict(columns="Name, Tags", page_size=4, max_workers=2, checkpoint=checkpoint)
+    kwargs["checkpoint_pages"] = 2
+
+    fake_session.handler = _pages(fail_page=5)
+    with pytest.raises(HTTPError):
+        export_fragments(
+            _service(fake_session), "SPSSoftwareTypeClassBase", path, **kwargs
+        )
+
+    fake_session.calls.clear()
+    fake_session.handler = _pages()
+    stats = export_fragments(
+        _service(fake_session), "SPSSoftwareTypeClassBase", path, **kwargs
+    )
+    # pages 0 to 3 were committed before the failure, the rest is loaded again
+    numbers = sorted(
+        int(parse_qs(call[2]["params"])["pageNumber"][0])
+        for call in fake_session.calls
+        if "ApiToken" not in call[1]
+    )
+    assert numbers[0] == 4
+    assert stats.rows == 25 and stats.new_rows == 9 and stats.done
+    with gzip.open(path) as f:
+        assert [json.loads(line) for line in f] == ROWS
+
+
+def test_writes_csv_with_projection_header(fake_session, tmp_path):
+    fake_session.handler = _pages()
+    path = str(tmp_path / "dump.csv")
+    stats = export_fragments(
+        _service(fake_session), "SPSSoftwareTypeClassBase", path, columns="Name, Tags"
+    )
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "Name,Tags"
+    assert lines[1] == "Software 0,[0]"
+    assert len(lines) == 26 and stats.megabytes_per_second > 0
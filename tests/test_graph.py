@@ -0,0 +1,67 @@
+import re
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Graph import GraphLoader
+from matrix42sdk.TokenCache import AccessTokenCache
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+
+# tickets t1 and t2 share user u2, t3 has no users, users u1 and u2 work in department d1
+RELATIONS = {
+    ("Tickets", "t1", "AttachedUsers"): ["u1", "u2"],
+    ("Tickets", "t2", "AttachedUsers"): ["u2"],
+    ("Tickets", "t3", "AttachedUsers"): [],
+    ("Users", "u1", "Department"): ["d1"],
+    ("Users", "u2", "Department"): ["d1"],
+}
+
+
+def _handler(method, url, params=None, **kwargs):
+    ddname = url.split("/fragments/")[1]
+    query = parse_qs(params)
+    ids = re.findall(r"'([^']+)'", query["where"][0])
+    if "RelatedID" in query["columns"][0]:
+        relation = query["columns"][0].split(", ")[1].split(".")[0]
+        rows = [
+            {"ID": i.upper(), "RelatedID": related}
+            for i in ids
+            for related in RELATIONS.get((ddname, i, relation)) or [None]
+        ]
+        size, number = int(query["pageSize"][0]), int(query["pageNumber"][0])
+        return FakeResponse(body=rows[size * number : size * (number + 1)])
+    return FakeResponse(body=[{"ID": i, "Name": "name of " + i} for i in ids])
+
+
+def test_loads_relation_path_level_by_level(fake_session):
+    fake_session.handler = _handler
+    frg = FragmentsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+    )
+    graph = GraphLoader(frg).load(
+        "Tickets",
+        ["t1", "t2", "t3"],
+        "AttachedUsers.Department",
+        targets={"AttachedUsers": "Users", "Department": "Departments"},
+        columns={"Users": "Name", "Departments": "Name"},
+    )
+
+    assert [n.id for n in graph.related("t1", "AttachedUsers")] == ["u1", "u2"]
+    assert graph.related("t3", "AttachedUsers") == []
+    assert [n.id for n in graph.walk("t2", "AttachedUsers.Department")] == ["d1"]
+    assert graph["d1"]["Name"] == "name of d1" and graph["d1"].ddname == "Departments"
+    assert graph["t1"].data == {"ID": "t1"}
+    assert [n.id for n in graph.referrers("u2", "AttachedUsers")] == ["t1", "t2"]
+
+    urls = [call[1] for call in fake_session.calls if "ApiToken" not in call[1]]
+    # one batched list query per level for the relations and one for the attributes, u2 is read once
+    assert sorted(u.split("/fragments/")[1] for u in urls) == [
+        "Departments",
+        "Tickets",
+        "Users",
+        "Users",
+    ]
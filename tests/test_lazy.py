@@ -0,0 +1,92 @@
+import re
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.TokenCache import AccessTokenCache
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+MULTI = "SPSCommonClassBase"
+
+
+def _handler(method, url, **kwargs):
+    if "/objects/" in url:
+        objectId = re.search(r"/objects/CI/([^?]+)", url).group(1)
+        fragment = {"ID": "fr-" + objectId, "Name": "n"}
+        core = {"ID": objectId, "SPSSoftwareTypeClassBase": fragment}
+        if url.endswith("full=true"):
+            core[MULTI] = [{"ID": "m-" + objectId, "Value": "full"}]
+        return FakeResponse(body=core)
+    if "/AttachedUsers" in url:
+        # relations are read from the fragment, not from the object
+        fragmentId = re.search(r"/SPSSoftwareTypeClassBase/([^/]+)/", url).group(1)
+        if not fragmentId.startswith("fr-"):
+            return FakeResponse(404, {"ExceptionName": "NotFound"})
+        query = parse_qs(kwargs["params"])
+        return FakeResponse(body=[{"ID": "u1"}] if query["pageNumber"][0] == "0" else [])
+    query = parse_qs(kwargs["params"])
+    ids = re.findall(r"'([^']+)'", query["where"][0])
+    if query["pageNumber"][0] != "0":
+        return FakeResponse(body=[])
+    rows = [{"ID": "m-" + i, "Value": "hinted", "Expression-ObjectID": i} for i in ids]
+    return FakeResponse(body=rows)
+
+
+def _service(fake_session):
+    fake_session.handler = _handler
+    return ObjectsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+    )
+
+
+def _data_urls(fake_session, start=0):
+    return [call[1] for call in fake_session.calls[start:] if "ApiToken" not in call[1]]
+
+
+def test_loads_multi_fragments_on_demand(fake_session):
+    obj = _service(fake_session)
+    lazy = obj.get_lazy_object("CI", "o1")
+
+    assert _data_urls(fake_session) == [
+        URL + "/M42Services/api/data/objects/CI/o1?full=false"
+    ]
+    assert lazy["SPSSoftwareTypeClassBase"]["Name"] == "n"
+    assert lazy.loaded == ["SPSSoftwareTypeClassBase"]
+
+    assert lazy[MULTI] == [{"ID": "m-o1", "Value": "full"}]
+    assert lazy.get("SPSMissingClassBase") is None
+    # the whole object is loaded once only
+    assert _data_urls(fake_session)[1:] == [
+        URL + "/M42Services/api/data/objects/CI/o1?full=true"
+    ]
+
+
+def test_prefetch_hints_load_for_the_whole_batch(fake_session):
+    obj = _service(fake_session)
+    objects = obj.get_lazy_objects(
+        "CI",
+        ["o1", "o2", "o3"],
+        fragments={MULTI: "Value"},
+        relations={("SPSSoftwareTypeClassBase", "AttachedUsers"): "Name"},
+    )
+    start = len(fake_session.calls)
+
+    assert [lazy[MULTI][0]["Value"] for lazy in objects] == ["hinted"] * 3
+    lists = _data_urls(fake_session, start)
+    assert len(lists) == 1 and lists[0].endswith("/fragments/" + MULTI)
+    where = parse_qs(fake_session.calls[-1][2]["params"])["where"][0]
+    assert where == "[Expression-ObjectID] IN ('o1', 'o2', 'o3')"
+
+    start = len(fake_session.calls)
+    assert objects[0].related("SPSSoftwareTypeClassBase", "AttachedUsers") == [
+        {"ID": "u1"}
+    ]
+    urls = _data_urls(fake_session, start)
+    assert len(urls) == 3 and all("/fr-o" in u for u in urls)
+    assert objects[2].related("SPSSoftwareTypeClassBase", "AttachedUsers") == [
+        {"ID": "u1"}
+    ]
+    assert len(_data_urls(fake_session, start)) == 3
@@ -0,0 +1,125 @@
+from matrix42sdk import Codec
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.Cache import ResponseCache
+from matrix42sdk.Instrumentation import Instrumentation, MetricsRegistry, endpoint_name
+from matrix42sdk.Resilience import RetryPolicy, TransportPolicy
+from matrix42sdk.TokenCache import AccessTokenCache
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+
+class FakeSpan(object):
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = dict(attributes)
+        self.ended = False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.ended = True
+
+
+def _services(fake_session, instrumentation, **kwargs):
+    kwargs.update(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+        _instrumentation=instrumentation,
+    )
+    return FragmentsDataService(**kwargs), ObjectsDataService(**kwargs)
+
+
+def test_endpoint_name():
+    assert endpoint_name(URL + "/m42Services/api/data/fragments/DD/42?full=true") == (
+        "fragments/{ddname}/{id}"
+    )
+    assert endpoint_name(URL + "/m42Services/api/data/fragments/DD?where=x") == (
+        "fragments/{ddname}"
+    )
+    assert (
+        endpoint_name(URL + "/m42Services/api/data/objects/CI/42")
+        == "objects/{ciName}/{id}"
+    )
+    token_url = URL + "/m42Services/api/ApiToken/GenerateAccessTokenFromApiToken/"
+    assert endpoint_name(token_url) == "token"
+
+
+def test_records_requests_tokens_and_cache(fake_session):
+    def handler(method, url, **kwargs):
+        if "/objects/" in url:
+            return FakeResponse(
+                body={"ID": "o1", "SPSSoftwareTypeClassBase": {"ID": "o1"}}
+            )
+        return FakeResponse(body={"ID": "f1", "TimeStamp": "t1"})
+
+    fake_session.handler = handler
+    metrics = MetricsRegistry()
+    spans = list()
+    instrumentation = Instrumentation(
+        metrics,
+        start_span=lambda name, attributes: spans.append(FakeSpan(name, attributes))
+        or spans[-1],
+    )
+    events = list()
+    instrumentation.add_response_hook(events.append)
+    frg, obj = _services(fake_session, instrumentation, _cache=ResponseCache())
+
+    frg.get_fragment("DD", "f1")
+    frg.get_fragment("DD", "f1")
+    obj.get_object("CI", "o1")
+
+    assert [e.endpoint for e in events] == [
+        "token",
+        "fragments/{ddname}/{id}",
+        "objects/{ciName}/{id}",
+    ]
+    assert events[1].status == 200
+    assert events[1].bytes_received == len(b'{"ID": "f1", "TimeStamp": "t1"}')
+    assert metrics.value("matrix42sdk_token_refreshes_total", outcome="ok") == 1
+    assert (
+        metrics.value("matrix42sdk_cache_requests_total", kind="fragment", result="hit")
+        == 1
+    )
+    assert (
+        metrics.value("matrix42sdk_cache_requests_total", kind="fragment", result="miss")
+        == 1
+    )
+    assert metrics.latency("fragments/{ddname}/{id}", "GET")[0] == 1
+    assert all(span.ended for span in spans)
+    assert spans[1].attributes["http.status_code"] == 200
+
+    text = metrics.to_prometheus()
+    assert (
+        'matrix42sdk_request_duration_seconds_count{endpoint="objects/{ciName}/{id}",method="GET"} 1'
+        in text
+    )
+    assert (
+        'matrix42sdk_requests_total{endpoint="token",method="POST",status="200"} 1'
+        in text
+    )
+
+
+def test_counts_retries_and_sent_bytes(fake_session, monkeypatch):
+    answers = [FakeResponse(503), FakeResponse(204)]
+    fake_session.handler = lambda method, url, **kwargs: answers.pop(0)
+    monkeypatch.setattr("matrix42sdk.Resilience.time.sleep", lambda seconds: None)
+    metrics = MetricsRegistry()
+    frg, _ = _services(
+        fake_session,
+        Instrumentation(metrics),
+        _policy=TransportPolicy(retry=RetryPolicy(backoff_base=0)),
+    )
+
+    frg.update_fragment("DD", {"ID": "f1"})
+
+    labels = dict(endpoint="fragments/{ddname}", method="PUT")
+    assert metrics.value("matrix42sdk_retries_total", **labels) == 1
+    assert metrics.value("matrix42sdk_requests_total", status="503", **labels) == 1
+    sent = len(Codec.dumps({"ID": "f1"}))
+    assert metrics.value("matrix42sdk_sent_bytes_total", **labels) == 2 * sent
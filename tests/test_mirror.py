@@ -0,0 +1,85 @@
+import threading
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Mirror import SqliteMirror
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+FRAGMENTS = URL + "/M42Services/api/data/fragments/"
+
+
+def _handler(method, url, params=None, **kwargs):
+    query = parse_qs(params)
+    page = int(query["pageNumber"][0])
+    size = int(query["pageSize"][0])
+    if url == FRAGMENTS + "Asset":
+        rows = [
+            {"ID": "a%d" % i, "Name": "asset %d" % i, "Tags": ["x"]} for i in range(7)
+        ]
+    elif url == FRAGMENTS + "User":
+        rows = [{"ID": "u%d" % i, "Name": "user %d" % i} for i in range(3)]
+    else:
+        # Asset/<id>/AttachedUsers: every asset is attached to u0, a1 also to u2
+        fragment_id = url.split("/")[-2]
+        rows = [{"ID": "u0"}] + ([{"ID": "u2"}] if fragment_id == "a1" else [])
+    return FakeResponse(body=rows[page * size : (page + 1) * size])
+
+
+def test_mirror(fake_session):
+    fake_session.handler = _handler
+    frg = FragmentsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+
+    with SqliteMirror(":memory:") as mirror:
+        assert mirror.load_fragments(frg, "Asset", page_size=3, indexes=["Name"]) == 7
+        assert mirror.load_fragments(frg, "User") == 3
+        assert mirror.load_relations(frg, "Asset", "AttachedUsers", max_workers=2) == 8
+        assert sorted(mirror.tables()) == ["Asset", "User"]
+
+        rows = mirror.query(
+            "Asset", where="Name > ?", params=("asset 4",), sort="ID DESC"
+        )
+        assert [row["ID"] for row in rows] == ["a6", "a5"]
+        assert rows[0]["Tags"] == '["x"]'
+
+        related = mirror.related("Asset", "a1", "AttachedUsers", "User", sort="t.ID")
+        assert [row["Name"] for row in related] == ["user 0", "user 2"]
+
+        sink = mirror.sink("Asset")
+        sink.upsert([{"ID": "a0", "Name": "renamed", "Location": "Berlin"}])
+        sink.delete(["a1"])
+        assert mirror.query("Asset", where="ID = 'a0'")[0]["Location"] == "Berlin"
+        # an update keeps the columns the row does not carry
+        mirror.upsert("Asset", [{"ID": "a0", "Location": "Hamburg"}])
+        row = mirror.query("Asset", where="ID = 'a0'")[0]
+        assert (row["Name"], row["Location"], row["Tags"]) == (
+            "renamed",
+            "Hamburg",
+            '["x"]',
+        )
+        assert mirror.related("Asset", "a1", "AttachedUsers", "User") == []
+        assert len(mirror.query("Asset")) == 6
+
+        # a reload replaces the mirrored fragments
+        assert mirror.load_fragments(frg, "Asset", columns="Name") == 7
+        assert mirror.query("Asset", columns="COUNT(*) AS n")[0]["n"] == 7
+
+
+def test_mirror_is_usable_while_pages_are_loaded(fake_session):
+    frg = FragmentsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+    mirror = SqliteMirror(":memory:")
+    read = list()
+
+    def handler(method, url, **kwargs):
+        # another thread reads the mirror while the loader waits for the server
+        reader = threading.Thread(target=lambda: read.append(mirror.tables()))
+        reader.start()
+        reader.join(timeout=5)
+        assert not reader.is_alive()
+        return _handler(method, url, **kwargs)
+
+    fake_session.handler = handler
+    mirror.load_fragments(frg, "Asset", page_size=3)
+    assert mirror.load_relations(frg, "Asset", "AttachedUsers", max_workers=2) == 8
+    assert read[0] == [] and read[-1] == ["Asset"]
+    mirror.close()
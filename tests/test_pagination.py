@@ -0,0 +1,101 @@
+import itertools
+import random
+import time
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Pagination import (
+    iter_pages,
+    iter_pages_parallel,
+    page_plan,
+    tune_page_size,
+)
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+
+
+def _paged_rows(total):
+    """Handler serving `total` rows page by page, like the list operations do."""
+
+    def handler(method, url, params=None, **kwargs):
+        query = parse_qs(params)
+        size = int(query["pageSize"][0])
+        number = int(query["pageNumber"][0])
+        rows = [
+            {"ID": str(i)} for i in range(number * size, min(total, (number + 1) * size))
+        ]
+        return FakeResponse(body=rows)
+
+    return handler
+
+
+class TestIterPages:
+    def test_stops_after_short_page(self):
+        requested = []
+
+        def fetch_page(size, number):
+            requested.append(number)
+            return list(range(size)) if number < 2 else [0]
+
+        pages = list(iter_pages(fetch_page, page_size=3))
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert requested == [0, 1, 2]
+
+    def test_stops_at_empty_page(self):
+        pages = list(iter_pages(lambda size, number: [] if number else [1, 2], 2))
+        assert pages == [[1, 2]]
+
+
+class TestParallelPages:
+    def test_pages_come_back_in_order(self):
+        def fetch_page(size, number):
+            time.sleep(random.random() / 100)
+            start = number * size
+            return list(range(start, min(start + size, 95)))
+
+        pages = list(iter_pages_parallel(fetch_page, page_size=10, max_workers=4))
+        assert [row for page in pages for row in page] == list(range(95))
+
+    def test_tuned_plan_covers_rows_without_gaps(self):
+        size = tune_page_size(500, seconds=0.1, nbytes=50000)
+        assert size == 4000
+        offsets = [s * n for s, n in itertools.islice(page_plan(500, size), 8)]
+        assert offsets == [500 * i for i in range(1, 8)] + [4000]
+
+    def test_tuning_shrinks_slow_pages(self):
+        assert tune_page_size(500, seconds=4.0, nbytes=1000) == 125
+        assert list(itertools.islice(page_plan(500, 125), 2)) == [(125, 4), (125, 5)]
+
+
+class TestIterFragments:
+    def test_yields_all_rows_lazily(self, fake_session):
+        fake_session.handler = _paged_rows(25)
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        rows = frg.iter_fragments("SPSSoftwareType", columns="ID", page_size=10)
+        assert next(rows) == {"ID": "0"}
+        assert [row["ID"] for row in rows] == [str(i) for i in range(1, 25)]
+
+    def test_relations_are_paged(self, fake_session):
+        fake_session.handler = _paged_rows(4)
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        rows = list(frg.iter_fragment_relations("DD", "42", "AttachedUsers", page_size=2))
+        assert len(rows) == 4
+        assert fake_session.calls[-1][1] == URL + (
+            "/M42Services/api/data/fragments/DD/42/AttachedUsers"
+        )
+
+    def test_parallel_list_is_complete(self, fake_session):
+        fake_session.handler = _paged_rows(1234)
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+
+        rows = frg.get_fragments_list_parallel("SPSSoftwareType", sort="ID ASC")
+        assert [row["ID"] for row in rows] == [str(i) for i in range(1234)]
@@ -0,0 +1,68 @@
+import multiprocessing
+import pytest
+from matrix42sdk import AuthNClient
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.RateLimit import FileTokenBucket, RateLimiter, TokenBucket
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+
+def test_token_bucket_owes_tokens():
+    bucket = TokenBucket(rate=10, capacity=2)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    assert waits[2:] == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+
+
+def test_file_bucket_is_shared(tmp_path):
+    path = str(tmp_path / "budget")
+    first = FileTokenBucket(path, rate=10, capacity=1)
+    second = FileTokenBucket(path, rate=10, capacity=1)
+    assert first.reserve() == 0.0
+    assert second.reserve() == pytest.approx(0.1, abs=0.01)
+    assert first.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def _reserve_many(path, count, queue):
+    bucket = FileTokenBucket(path, rate=10, capacity=1)
+    queue.put([bucket.reserve() for _ in range(count)])
+
+
+def test_file_bucket_across_processes(tmp_path):
+    path = str(tmp_path / "budget")
+    queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(target=_reserve_many, args=(path, 10, queue))
+        for _ in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    waits = sorted(w for _ in workers for w in queue.get(timeout=30))
+    for worker in workers:
+        worker.join()
+    # 30 requests at 10/s with a burst of one: the last one waits 2.9 s, minus the
+    # tokens refilled while the processes start
+    assert waits[0] == 0.0
+    assert 2.4 < waits[-1] <= 2.91
+
+
+def test_reads_and_writes_have_own_budgets(fake_session, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(AuthNClient.time, "sleep", sleeps.append)
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(204)
+    limiter = RateLimiter(
+        read=TokenBucket(rate=10, capacity=1), write=TokenBucket(rate=1, capacity=1)
+    )
+    frg = FragmentsDataService(
+        _url=URL, _api_token="api-token", _session=fake_session, _rate_limiter=limiter
+    )
+
+    frg.get_fragments_list("DD")
+    frg.get_fragments_list("DD")
+    frg.delete_fragement("DD", "1")
+    frg.delete_fragement("DD", "2")
+    assert sleeps[0] == sleeps[2] == 0.0
+    assert sleeps[1] == pytest.approx(0.1, abs=0.01)
+    assert sleeps[3] == pytest.approx(1.0, abs=0.01)
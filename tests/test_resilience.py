@@ -0,0 +1,100 @@
+import email.utils
+import pytest
+import time
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Exceptions import CircuitOpenError
+from matrix42sdk.Resilience import (
+    AIMDLimiter,
+    CircuitBreaker,
+    RetryPolicy,
+    TransportPolicy,
+    retry_after,
+)
+from requests.exceptions import ConnectionError
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+
+def test_retry_after():
+    assert retry_after(FakeResponse(503, headers={"Retry-After": "2"})) == 2.0
+    date = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 25 < retry_after(FakeResponse(503, headers={"Retry-After": date})) <= 30
+    assert retry_after(FakeResponse(503)) is None
+
+
+def test_retry_decisions():
+    retry = RetryPolicy(max_retries=2, backoff_base=1.0)
+    assert 0 <= retry.delay("GET", 0, FakeResponse(503)) <= 1.0
+    assert 0 <= retry.delay("GET", 1, FakeResponse(504)) <= 2.0
+    assert retry.delay("GET", 2, FakeResponse(503)) is None
+    assert retry.delay("GET", 0, FakeResponse(500)) is None
+    assert retry.delay("POST", 0, FakeResponse(503)) is None
+    # an update may have reached the server before the gateway failed
+    assert retry.delay("PUT", 0, FakeResponse(502)) is None
+    assert retry.delay("PUT", 0, FakeResponse(503)) is not None
+    assert retry.delay("PUT", 0, error=ConnectionError()) is None
+    assert retry.delay("POST", 0, FakeResponse(429, headers={"Retry-After": "1"})) == 1.0
+    assert (
+        retry.delay("GET", 0, FakeResponse(429, headers={"Retry-After": "600"})) is None
+    )
+    assert retry.delay("DELETE", 0, error=ConnectionError()) is not None
+    assert retry.delay("POST", 0, error=ConnectionError()) is None
+
+
+def test_aimd_limiter():
+    limiter = AIMDLimiter(initial=2, maximum=4)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    limiter.release()
+    assert limiter.limit == pytest.approx(2.9)
+
+    assert limiter.try_acquire()
+    limiter.release(overloaded=True)
+    assert limiter.limit == pytest.approx(1.45)
+    assert limiter.in_flight == 0
+
+
+def test_retries_overloaded_reads(fake_session):
+    answers = [
+        FakeResponse(503, headers={"Retry-After": "0"}),
+        FakeResponse(429, headers={"Retry-After": "0"}),
+        FakeResponse(body={"ID": "1"}),
+    ]
+    fake_session.handler = lambda method, url, **kwargs: answers.pop(0)
+    policy = TransportPolicy(RetryPolicy(), AIMDLimiter(initial=4), CircuitBreaker())
+    frg = FragmentsDataService(
+        _url=URL, _api_token="api-token", _session=fake_session, _policy=policy
+    )
+
+    assert frg.get_fragment("DD", "1") == {"ID": "1"}
+    assert answers == []
+    assert policy.limiter.limit < 4
+    assert policy.limiter.in_flight == 0
+
+
+def test_circuit_breaker(fake_session):
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(500)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    frg = FragmentsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _policy=TransportPolicy(breaker=breaker),
+    )
+
+    frg.get_fragment("DD", "1")
+    frg.get_fragment("DD", "1")
+    assert breaker.state == CircuitBreaker.OPEN
+    sent = len(fake_session.calls)
+    with pytest.raises(CircuitOpenError):
+        frg._request("GET", URL)
+    assert len(fake_session.calls) == sent
+
+    # after the timeout one trial request is let through
+    breaker.reset_timeout = 0
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(body={})
+    frg._request("GET", URL)
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,146 @@
+import datetime
+import pytest
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.Exceptions import SchemaError
+from matrix42sdk.Schema import DataDefinitionSchema, SchemaRegistry, parse_schema_info
+from matrix42sdk.TokenCache import AccessTokenCache
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+SCHEMA_INFO = {
+    "Columns": [
+        {"Name": "ID", "Type": "Guid"},
+        {"Name": "Name", "Type": "String"},
+        {"Name": "LastUpdate", "Type": "DateTime"},
+        {"Name": "Installations", "Type": "Int32"},
+        {"Name": "Price", "Type": "Decimal"},
+    ],
+    "Relations": [{"Name": "AttachedUsers"}],
+}
+
+
+def _service(fake_session, registry):
+    return FragmentsDataService(
+        _url=URL,
+        _api_token="api-token",
+        _session=fake_session,
+        _token_cache=AccessTokenCache(),
+        _schema_registry=registry,
+    )
+
+
+def _schema_calls(fake_session):
+    return [call for call in fake_session.calls if call[1].endswith("/schema-info")]
+
+
+def test_schema_is_fetched_once_and_persisted(fake_session, tmp_path):
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(body=SCHEMA_INFO)
+    path = str(tmp_path / "schemas.json")
+    frg = _service(fake_session, SchemaRegistry(path))
+
+    schema = frg.get_schema("SPSSoftwareTypeClassBase")
+    assert frg.get_schema("SPSSoftwareTypeClassBase") is schema
+    assert schema.relations == ["AttachedUsers"]
+    assert schema.projection(exclude=["LastUpdate"]) == "ID, Name, Installations, Price"
+    assert len(_schema_calls(fake_session)) == 1
+    assert _schema_calls(fake_session)[0][2]["params"] == "pageSize=1&pageNumber=0"
+
+    # a new process reads the file instead of asking the server
+    other = _service(fake_session, SchemaRegistry(path))
+    assert other.get_schema("SPSSoftwareTypeClassBase").columns == schema.columns
+    assert len(_schema_calls(fake_session)) == 1
+
+    # list queries do not ask for schema data
+    frg.get_fragments_list("SPSSoftwareTypeClassBase", columns="Name")
+    assert "includeLocalizations" not in fake_session.calls[-1][2]["params"]
+
+
+def test_expired_or_other_version_is_fetched_again(fake_session, tmp_path):
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(body=SCHEMA_INFO)
+    path = str(tmp_path / "schemas.json")
+    _service(fake_session, SchemaRegistry(path)).get_schema("Users")
+
+    _service(fake_session, SchemaRegistry(path, max_age=0)).get_schema("Users")
+    assert len(_schema_calls(fake_session)) == 2
+
+    registry = SchemaRegistry(path)
+    state = registry._store.load(URL)
+    registry._store.save(URL, dict(state, version=0))
+    _service(fake_session, registry).get_schema("Users")
+    assert len(_schema_calls(fake_session)) == 3
+
+
+def test_validates_columns_and_converts_rows(fake_session):
+    fake_session.handler = lambda method, url, **kwargs: FakeResponse(body=SCHEMA_INFO)
+    frg = _service(fake_session, SchemaRegistry())
+
+    columns = "Name, AttachedUsers.LastName as UserName, COUNT(ID) as Count"
+    assert frg.validate_columns("Users", columns) == columns
+    with pytest.raises(SchemaError, match="Version"):
+        frg.validate_columns("Users", "Name, Version")
+    # the unknown column made the schema be fetched again before failing
+    assert len(_schema_calls(fake_session)) == 2
+
+    row = frg.get_schema("Users").convert(
+        {
+            "ID": "f1",
+            "LastUpdate": "2021-06-01T12:00:00.1234567Z",
+            "Installations": "12",
+            "Price": 1.5,
+            "Name": "Office",
+        }
+    )
+    assert row["LastUpdate"] == datetime.datetime(
+        2021, 6, 1, 12, 0, 0, 123456, tzinfo=datetime.timezone.utc
+    )
+    assert row["Installations"] == 12 and row["Price"] == 1.5 and row["Name"] == "Office"
+
+
+@pytest.mark.parametrize(
+    "typeName, value, expected",
+    [
+        ("Byte", "7", 7),
+        ("SByte", "-7", -7),
+        ("Int16", "12", 12),
+        ("Int32", "12", 12),
+        ("Int64", "12", 12),
+        ("UInt16", "12", 12),
+        ("UInt32", "12", 12),
+        ("UInt64", "12", 12),
+        ("Decimal", "1.5", 1.5),
+        ("Double", "1.5", 1.5),
+        ("Single", "1.5", 1.5),
+        ("Date", "2021-06-01", datetime.datetime(2021, 6, 1)),
+        ("DateTime", "2021-06-01T12:00:00", datetime.datetime(2021, 6, 1, 12)),
+        (
+            "DateTimeOffset",
+            "2021-06-01T12:00:00Z",
+            datetime.datetime(2021, 6, 1, 12, tzinfo=datetime.timezone.utc),
+        ),
+        ("Timestamp", "2021-06-01T12:00:00", datetime.datetime(2021, 6, 1, 12)),
+        # types which only contain the name of a converted one keep their values
+        ("TimeSpan", "01:00:00", "01:00:00"),
+        ("Point", "1", "1"),
+        ("ConstraintName", "1", "1"),
+    ],
+)
+def test_converts_the_esm_types(typeName, value, expected):
+    schema = DataDefinitionSchema("DD", [("Value", typeName)])
+    assert schema.convert({"Value": value}) == {"Value": expected}
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        [{"Name": "Name", "Type": "String"}],
+        {"Attributes": [{"Name": "Name", "Type": "String"}]},
+        {"Columns": [{"ColumnName": "Name", "Type": "String"}]},
+        {"Columns": [{"Name": "Name"}]},
+        {"Columns": [], "Relations": ["AttachedUsers"]},
+    ],
+)
+def test_other_schema_info_layouts_raise(body):
+    with pytest.raises(SchemaError):
+        parse_schema_info("DD", body)
@@ -0,0 +1,57 @@
+import json
+import pytest
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.Streaming import iter_array, iter_members
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+
+def _chunks(document, size):
+    body = json.dumps(document, ensure_ascii=False).encode()
+    return [body[i : i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 4096])
+def test_iter_array(size):
+    rows = [
+        {"ID": "a", "Name": 'Größe "1", [x]', "Count": 12345, "Tags": [1.5, None, True]},
+        123456789,
+        [],
+        "ü",
+    ]
+    assert list(iter_array(_chunks(rows, size))) == rows
+    assert list(iter_array(_chunks([], size))) == []
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_iter_members(size):
+    document = {"ID": "1", "SPSAssetClassBase": {"Name": "NB-1"}, "Count": 10}
+    assert list(iter_members(_chunks(document, size))) == list(document.items())
+
+
+def test_truncated_body():
+    with pytest.raises(ValueError):
+        list(iter_array([b'[{"ID": "a"}, {"ID"']))
+
+
+def test_streamed_endpoints(fake_session):
+    rows = [{"ID": str(i)} for i in range(50)]
+    responses = []
+
+    def handler(method, url, stream=False, **kwargs):
+        assert stream
+        response = FakeResponse(body={"ID": "1", "A": {}} if "objects" in url else rows)
+        responses.append(response)
+        return response
+
+    fake_session.handler = handler
+    frg = FragmentsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+    assert list(frg.get_fragments_list("DD", stream=True)) == rows
+    assert list(frg.get_fragment_relations_list("DD", "1", "R", stream=True)) == rows
+
+    obj = ObjectsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+    assert dict(obj.get_object("CI", "1", stream=True)) == {"ID": "1", "A": {}}
+    assert all(response.closed for response in responses)
@@ -0,0 +1,97 @@
+import re
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.State import JsonStateStore
+from matrix42sdk.Sync import CallbackSink, DeltaSync
+from tests.conftest import FakeResponse
+from urllib.parse import parse_qs
+
+
+URL = "https://esm.example.com"
+
+
+class _Table(object):
+    """Evaluates the where clauses of the sync queries against in-memory rows."""
+
+    def __init__(self, rows):
+        self.rows = dict((row["ID"], dict(row)) for row in rows)
+        self.fetched = 0
+
+    def _match(self, row, where):
+        for condition in re.findall(r"\((.*?)\)(?: AND |$)", where):
+            m = re.fullmatch(r"ID > '(.*)'", condition)
+            if m and not row["ID"] > m.group(1):
+                return False
+            m = re.fullmatch(r"LastUpdate >= '(.*)'", condition)
+            if m and not row["LastUpdate"] >= m.group(1):
+                return False
+            m = re.fullmatch(
+                r"LastUpdate > '(.*)' OR \(LastUpdate = '(.*)' AND ID > '(.*)'\)",
+                condition,
+            )
+            if m and not (
+                row["LastUpdate"] > m.group(1)
+                or (row["LastUpdate"] == m.group(2) and row["ID"] > m.group(3))
+            ):
+                return False
+        return True
+
+    def __call__(self, method, url, params=None, **kwargs):
+        query = parse_qs(params)
+        where = query.get("where", [""])[0]
+        rows = [row for row in self.rows.values() if self._match(row, where)]
+        sort = query["sort"][0]
+        if sort.startswith("LastUpdate DESC"):
+            rows.sort(key=lambda row: row["LastUpdate"], reverse=True)
+        elif sort.startswith("LastUpdate"):
+            rows.sort(key=lambda row: (row["LastUpdate"], row["ID"]))
+        else:
+            rows.sort(key=lambda row: row["ID"])
+        assert query["pageNumber"] == ["0"]
+        rows = rows[: int(query["pageSize"][0])]
+        columns = [c.strip() for c in query["columns"][0].split(",")]
+        self.fetched += len(rows)
+        return FakeResponse(body=[dict((c, row[c]) for c in columns) for row in rows])
+
+
+def test_delta_sync(fake_session, tmp_path):
+    table = _Table(
+        {"ID": "%03d" % i, "LastUpdate": "2021-01-01T00:00:%02d" % (i % 10), "Name": "n"}
+        for i in range(25)
+    )
+    fake_session.handler = table
+    frg = FragmentsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+    mirror = dict()
+
+    def delete(ids):
+        for i in ids:
+            del mirror[i]
+
+    sink = CallbackSink(lambda rows: mirror.update((r["ID"], r) for r in rows), delete)
+    sync = DeltaSync(
+        frg,
+        "DD",
+        JsonStateStore(str(tmp_path / "state.json")),
+        columns="Name",
+        page_size=4,
+    )
+
+    result = sync.run(sink)
+    assert result.upserted == 25 and sorted(mirror) == sorted(table.rows)
+    assert result.watermark == "2021-01-01T00:00:09"
+
+    table.rows["003"].update(LastUpdate="2021-01-02T00:00:00", Name="changed")
+    table.rows["100"] = {"ID": "100", "LastUpdate": "2021-01-02T00:00:00", "Name": "new"}
+    del table.rows["007"]
+    table.fetched = 0
+
+    result = sync.run(sink)
+    assert result.deleted == ["007"]
+    assert mirror["003"]["Name"] == "changed" and "100" in mirror
+    assert sorted(mirror) == sorted(table.rows)
+    assert result.watermark == "2021-01-02T00:00:00"
+    # rows at the old watermark, the two changes and the Id-only pass
+    assert result.upserted == 4
+    assert table.fetched == result.upserted + len(table.rows)
+
+    result = sync.run(sink, detect_deletions=False)
+    assert (result.upserted, result.deleted) == (2, [])
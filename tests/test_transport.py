@@ -0,0 +1,109 @@
+import base64
+import json
+import threading
+import time
+from matrix42sdk.api_endpoints.fragments import FragmentsDataService
+from matrix42sdk.api_endpoints.objects import ObjectsDataService
+from matrix42sdk.AuthNClient import Matrix42RestClient
+from matrix42sdk.TokenCache import AccessToken, AccessTokenCache
+from tests.conftest import FakeResponse
+
+
+URL = "https://esm.example.com"
+
+
+class TestPooledSession:
+    def test_default_session_pool_size(self, fake_session):
+        client = Matrix42RestClient(_url=URL, _api_token="api-token", _pool_size=3)
+        adapter = client.session.get_adapter(URL)
+        assert adapter._pool_maxsize == 3
+
+    def test_services_reuse_given_session(self, fake_session):
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session
+        )
+        obj = ObjectsDataService(_url=URL, _api_token="api-token", _session=fake_session)
+        frg.get_fragment("SPSSoftwareType", "42")
+        obj.get_object("SPSSoftwareType", "42")
+
+        urls = [url for _, url, _ in fake_session.calls]
+        assert frg.session is obj.session is fake_session
+        assert urls[-2:] == [
+            URL + "/M42Services/api/data/fragments/SPSSoftwareType/42?full=true",
+            URL + "/M42Services/api/data/objects/SPSSoftwareType/42?full=true",
+        ]
+
+
+def _jwt(exp):
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode()
+    return "header.%s.signature" % claims.rstrip("=")
+
+
+class TestAccessTokenCache:
+    def test_expiry_is_read_from_jwt(self):
+        token = AccessToken.from_response({"RawToken": _jwt(1600000000)})
+        assert token.expires_at == 1600000000
+
+    def test_expiry_falls_back_to_valid_to(self):
+        token = AccessToken.from_response(
+            {"RawToken": "opaque", "ValidTo": "2020-09-13T12:26:40.1234567Z"}
+        )
+        assert token.expires_at == 1600000000.123456
+
+    def test_clients_share_one_token(self, fake_session):
+        cache = AccessTokenCache()
+        for _ in range(3):
+            FragmentsDataService(
+                _url=URL,
+                _api_token="api-token",
+                _session=fake_session,
+                _token_cache=cache,
+            ).get_fragment("SPSActivityClassBase", "f1")
+        token_calls = [c for c in fake_session.calls if "ApiToken" in c[1]]
+        assert len(token_calls) == 1
+
+    def test_single_flight_refresh(self):
+        cache = AccessTokenCache()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.05)
+            return AccessToken("fresh", time.time() + 3600)
+
+        threads = [
+            threading.Thread(target=cache.get, args=(("u", "t"), fetch))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+
+    def test_refresh_ahead_keeps_serving_current_token(self):
+        cache = AccessTokenCache(refresh_margin=60)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return AccessToken("new", time.time() + 3600)
+
+        cache.get(("u", "t"), lambda: AccessToken("old", time.time() + 30))
+        assert cache.get(("u", "t"), fetch) == "old"
+        assert refreshed.wait(1)
+        time.sleep(0.01)
+        assert cache.get(("u", "t"), fetch) == "new"
+
+    def test_401_refreshes_token_and_retries(self, fake_session):
+        cache = AccessTokenCache()
+        statuses = iter([401, 200])
+        fake_session.handler = lambda method, url, **kw: FakeResponse(
+            next(statuses), body={"ID": "42"}
+        )
+        frg = FragmentsDataService(
+            _url=URL, _api_token="api-token", _session=fake_session, _token_cache=cache
+        )
+        assert frg.get_fragment("SPSSoftwareType", "42") == {"ID": "42"}
+        token_calls = [c for c in fake_session.calls if "ApiToken" in c[1]]
+        assert len(token_calls) == 2